@@ -1,33 +1,94 @@
+import argparse
 import googlemaps
 import numpy as np
-import pickle
-from userdata_mining.utils import get_key
+from userdata_mining.utils import get_key, get_usernames, info
+from userdata_mining.embedding import load_profile
 from userdata_mining.mining import *
-from userdata_mining.visualization import EmbeddingVisualizer
 
 
-if __name__ == '__main__':
-    # Check for cache
-    if os.path.exists('./saved/embeddings/rahul.pickle'):
-        with open('./saved/embeddings/rahul.pickle', 'rb') as f:
-            embeddings = pickle.load(f)
-    else:
-        fbminer = FbInstaDataMiner(user='rahul', data_path='.')
-        fb_embeddings = fbminer.mine_data()
+def get_argparser() -> argparse.ArgumentParser:
+    """
+    Returns the parser of the command-line options.
+    """
+    argparser = argparse.ArgumentParser(description='Mines and visualizes user data.')
+    argparser.add_argument('--user', default='rahul',
+                           help='the user in data/ to mine')
+    argparser.add_argument('--all-users', action='store_true',
+                           help='mine every user in data/ with a shared pool of workers')
+    argparser.add_argument('--workers', type=int, default=0,
+                           help='number of embedding worker processes; with --all-users, '
+                                'number of users mined at once (default: one per core)')
+    argparser.add_argument('--parse-workers', type=int, default=4,
+                           help='number of sources parsed at once')
+    argparser.add_argument('--pipeline', action='store_true',
+                           help='embed sources while they are still being parsed')
+    argparser.add_argument('--profile', action='store_true',
+                           help='profile each source with cProfile and tracemalloc')
+    argparser.add_argument('--model-dir', default=None,
+                           help='directory of locally saved models')
+    argparser.add_argument('--backend', choices=['flair', 'onnx', 'torchscript'], default='flair',
+                           help='how the embedding model is run')
+    argparser.add_argument('--int8-model', action='store_true',
+                           help='dynamically quantize the embedding model to int8 (CPU only)')
+    argparser.add_argument('--fast', action='store_true',
+                           help='embed with hashed word counts instead of a transformer, '
+                                'for triage runs')
+    argparser.add_argument('--quantize', choices=['none', 'float16', 'int8'], default='none',
+                           help='store the saved profile as float16 or int8 instead of float32 '
+                                '(lossy)')
+    argparser.add_argument('--plan', action='store_true',
+                           help='estimate the cost of mining, longest first, without mining')
+    argparser.add_argument('--benchmark', default=None,
+                           help='benchmark_suite report used to project mining time')
+    return argparser
+
+
+def main(argv: list = None):
+    """
+    Mines the data of one user, or of every user, and visualizes it.
+
+    :param {list} argv - The command-line options. If None, sys.argv is
+    used.
+    """
+    args = get_argparser().parse_args(argv)
 
-        miner = GoogleDataMiner(user='rahul', data_path='.')
-        google_embeddings = miner.mine_data()
+    if args.plan:
+        throughput = load_throughput('.', args.benchmark)
+        users = get_usernames('.') if args.all_users else [args.user]
+        for plan in longest_first([plan_user(x, '.', throughput) for x in users]):
+            info(format_plan(plan))
+        return
 
-        # Merge dictionaries
-        embeddings = {**google_embeddings, **fb_embeddings}
+    embedding_kwargs = {
+        'workers': args.workers,
+        'model_dir': args.model_dir
+    }
+    if not args.fast:
+        embedding_kwargs['backend'] = args.backend
+        embedding_kwargs['quantize'] = 'int8' if args.int8_model else None
 
-        # Save embeddings
-        with open('./saved/embeddings/rahul.pickle', 'wb') as f:
-            pickle.dump(embeddings, f)
+    if args.all_users:
+        embedding_kwargs.pop('workers')
+        mine_users(data_path='.', workers=args.workers or None, fast=args.fast,
+                   profile_quantize=None if args.quantize == 'none' else args.quantize,
+                   benchmark=args.benchmark, profile=args.profile, **embedding_kwargs)
+        return
+
+    # Only sources whose inputs or configuration changed are mined again.
+    profile_path = mine_user(args.user, data_path='.', fast=args.fast,
+                             profile_quantize=None if args.quantize == 'none' else args.quantize,
+                             per_user=False, parse_workers=args.parse_workers,
+                             pipeline=args.pipeline, profile=args.profile, **embedding_kwargs)
+    embeddings = load_profile(profile_path)
 
     keys = list(embeddings.keys())
     keys.remove('Travel')
-    embeddings = [np.array(embeddings[x]) for x in keys]
+    embeddings = [np.asarray(embeddings[x]) for x in keys]
 
+    from userdata_mining.visualization import EmbeddingVisualizer
     viz = EmbeddingVisualizer()
     viz.visualize(*embeddings, titles=keys, dpi=150)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+from userdata_mining.embedding.batching import token_budget_batches
+
+
+def test_batches_cover_all_inputs():
+    lengths = [5, 300, 12, 7, 512, 3, 40]
+    batches = token_budget_batches(lengths, max_tokens=600)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+
+
+def test_batches_respect_budget():
+    lengths = [5, 300, 12, 7, 512, 3, 40, 40, 41]
+    batches = token_budget_batches(lengths, max_tokens=100)
+
+    for batch in batches:
+        longest = max(lengths[i] for i in batch)
+        assert len(batch) == 1 or len(batch) * longest <= 100
+
+
+def test_batches_respect_max_batch_size():
+    batches = token_budget_batches([1] * 10, max_tokens=1000, max_batch_size=4)
+
+    assert [len(batch) for batch in batches] == [4, 4, 2]
@@ -0,0 +1,34 @@
+from userdata_mining.embedding import EmbeddingCache
+import numpy as np
+
+
+def test_cache_roundtrip(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite'))
+    vectors = np.random.rand(2, 4).astype(np.float32)
+    cache.put_many('model', ['hello world', 'foo'], vectors)
+
+    result = cache.get_many('model', ['hello   world', 'foo', 'bar'])
+    assert np.allclose(result[0], vectors[0])
+    assert np.allclose(result[1], vectors[1])
+    assert result[2] is None
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_cache_is_keyed_by_model(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite'))
+    cache.put_many('model', ['foo'], np.ones((1, 4)))
+
+    assert cache.get_many('other-model', ['foo']) == [None]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite'), max_entries=2)
+    cache.put_many('model', ['a'], np.ones((1, 4)))
+    cache.put_many('model', ['b'], np.ones((1, 4)))
+    cache.get_many('model', ['a'])
+    cache.put_many('model', ['c'], np.ones((1, 4)))
+
+    assert len(cache) == 2
+    assert cache.get_many('model', ['b']) == [None]
+    assert cache.get_many('model', ['a'])[0] is not None
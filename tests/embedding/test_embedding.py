@@ -0,0 +1,138 @@
+from userdata_mining.embedding import Embedding
+from userdata_mining.embedding.embedding import dedupe
+from userdata_mining.embedding.registry import get_tokenizer
+import numpy as np
+import pytest
+import sys
+
+
+model = 'bert-base-uncased'
+
+
+def test_embed_batch_shape():
+    embedding = Embedding(model=model)
+    result = embedding.embed_batch(['hello world', b'bytes input', ['a', 'list'], ''])
+
+    assert isinstance(result, np.ndarray)
+    assert result.shape == (4, embedding.dim)
+    assert np.isnan(result[3]).all()
+    assert not np.isnan(result[:3]).any()
+
+
+def test_embed_batch_matches_embed():
+    embedding = Embedding(model=model)
+    texts = ['the quick brown fox', 'jumps over', 'the lazy dog']
+    result = embedding.embed_batch(texts)
+
+    for text, row in zip(texts, result):
+        assert np.allclose(embedding.embed(text), row, atol=1e-4)
+
+
+def test_embed_batch_empty():
+    embedding = Embedding(model=model)
+    result = embedding.embed_batch([])
+
+    assert result.shape == (0, embedding.dim)
+
+
+def test_dedupe():
+    texts = ['a', 'b', 'a', 'c', 'b']
+    unique, inverse = dedupe(texts)
+
+    assert unique == ['a', 'b', 'c']
+    assert [unique[i] for i in inverse] == texts
+
+
+def test_embed_batch_duplicates():
+    embedding = Embedding(model=model)
+    result = embedding.embed_batch(['same text', 'other', 'same text'])
+
+    assert np.array_equal(result[0], result[2])
+
+
+def test_model_is_shared():
+    first = Embedding(model=model)
+    second = Embedding(model=model)
+
+    assert first.model is second.model
+
+
+def test_long_sentences_are_windowed():
+    embedding = Embedding(model=model, max_windows=4)
+    long_text = ' '.join(['the quick brown fox jumps over the lazy dog'] * 500)
+
+    assert len(embedding._split_windows(long_text)) == 4
+    assert embedding._split_windows('short text') == ['short text']
+    assert not np.isnan(embedding.embed_batch([long_text])).any()
+
+
+def test_exported_backend_matches_flair(tmp_path):
+    from userdata_mining.embedding.backends import ExportedBackend
+
+    texts = ['the quick brown fox', 'jumps over the lazy dog']
+    expected = Embedding(model=model).embed_batch(texts)
+    exported = Embedding(model=model, backend='torchscript',
+                         export_dir=str(tmp_path)).embed_batch(texts)
+
+    assert np.abs(exported - expected).max() <= ExportedBackend.TOLERANCE
+
+
+def test_quantized_model_is_close():
+    texts = ['the quick brown fox', 'jumps over the lazy dog']
+    expected = Embedding(model=model).embed_batch(texts)
+    result = Embedding(model=model, quantize='int8').embed_batch(texts)
+
+    cosine = (expected * result).sum(axis=1) / \
+        (np.linalg.norm(expected, axis=1) * np.linalg.norm(result, axis=1))
+    assert (cosine > 0.9).all()
+
+
+def test_lightweight_backends(tmp_path):
+    with open(tmp_path / 'vectors.txt', 'w') as f:
+        f.write('2 3\nhello 1 0 0\nworld 0 1 0\n')
+
+    for kwargs in ({'backend': 'hashing'}, {'backend': 'tfidf'},
+                   {'backend': 'static', 'model': 'vectors.txt', 'model_dir': str(tmp_path)}):
+        embedding = Embedding(**kwargs)
+        result = embedding.embed_batch(['Hello world', 'hello, world!', '...'])
+
+        assert result.shape == (3, embedding.dim)
+        assert np.allclose(result[0], result[1])
+        assert np.isnan(result[2]).all()
+
+
+def test_embed_batch_kinds():
+    embedding = Embedding(model=model)
+    for kind in ('categorical', 'identifier', 'numeric'):
+        result = embedding.embed_batch(['192.168.1.1', '192.168.1.1', '10.0.0.1'], kind=kind)
+
+        assert result.shape == (3, embedding.dim)
+        assert not np.isnan(result).any()
+        assert np.allclose(result[0], result[1])
+        assert not np.allclose(result[0], result[2])
+
+
+def test_embed_stream_logs_duplicates(capsys):
+    embedding = Embedding(backend='hashing')
+    texts = ['a page', 'another page', '', 'a page', 'another page', 'a third page']
+    chunks = list(embedding.embed_stream(iter(texts), chunk_size=2, name='pages'))
+
+    assert [len(x) for x in chunks] == [2, 2, 2]
+    assert np.allclose(np.vstack(chunks)[3], chunks[0][0])
+    assert capsys.readouterr().out.count(
+        'pages: 5 item(s), 3 unique (40.0% duplicates); 5 embedded in chunks of 2.') == 1
+
+
+def test_options_are_validated():
+    with pytest.raises(ValueError):
+        Embedding(backend='hashing', pooling='maen')
+
+
+def test_tokenizer_is_loaded_without_model():
+    assert get_tokenizer(model).tokenize('Hello world') == ['hello', 'world']
+
+
+def test_onnx_backend_needs_onnxruntime(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'onnxruntime', None)
+    with pytest.raises(ImportError, match='pip install onnxruntime'):
+        Embedding(model=model, backend='onnx')
@@ -0,0 +1,98 @@
+from userdata_mining.embedding import NpyWriter, save_embeddings, load_embeddings
+from userdata_mining.embedding import append_embeddings
+from userdata_mining.embedding import save_profile, load_profile
+import numpy as np
+
+
+def test_npy_writer_roundtrip(tmp_path):
+    path = str(tmp_path / 'source.npy')
+    chunks = [np.random.rand(3, 4), np.random.rand(0, 4), np.random.rand(5, 4)]
+
+    writer = NpyWriter(path, 4)
+    for chunk in chunks:
+        writer.write(chunk)
+    writer.close()
+
+    result = np.load(path, mmap_mode='r')
+    assert result.shape == (8, 4)
+    assert np.allclose(result, np.vstack(chunks).astype(np.float32))
+
+
+def test_npy_writer_empty(tmp_path):
+    path = str(tmp_path / 'source.npy')
+    writer = NpyWriter(path, 4)
+    writer.close()
+
+    assert np.load(path).shape == (0, 4)
+
+
+def test_save_embeddings_quantized(tmp_path):
+    path = str(tmp_path / 'source')
+    embeddings = np.random.randn(6, 8).astype(np.float32)
+    embeddings[2] = np.nan
+
+    for quantize, tolerance in [(None, 0), ('float16', 1e-2), ('int8', 5e-2)]:
+        save_embeddings(path, embeddings, quantize)
+        result = load_embeddings(path)
+
+        assert result.dtype == np.float32
+        assert np.isnan(result[2]).all()
+        assert np.nanmax(np.abs(result - embeddings)) <= tolerance
+
+
+def test_save_embeddings_list(tmp_path):
+    path = str(tmp_path / 'source')
+    save_embeddings(path, [np.ones(3), None])
+    result = load_embeddings(path)
+
+    assert result.shape == (2, 3)
+    assert np.isnan(result[1]).all()
+
+
+def test_append_embeddings(tmp_path):
+    path = str(tmp_path / 'source')
+    embeddings = np.random.randn(3, 4).astype(np.float32)
+    save_embeddings(path, embeddings)
+
+    chunks = [np.random.randn(n, 4).astype(np.float32) for n in (2, 0, 100)]
+    chunks[0][1] = np.nan
+    for chunk in chunks:
+        append_embeddings(path, chunk)
+
+    result = load_embeddings(path)
+    expected = np.vstack([embeddings] + chunks)
+    assert result.shape == expected.shape
+    assert np.isnan(result[4]).all()
+    assert np.allclose(np.nan_to_num(result), np.nan_to_num(expected))
+
+
+def test_profile_roundtrip(tmp_path):
+    path = str(tmp_path / 'profile')
+    profile = {'YouTube watch history': np.random.rand(4, 8), 'Email': [], 'Travel': 12.5}
+    save_profile(path, profile)
+    result = load_profile(path)
+
+    assert set(result.keys()) == set(profile.keys())
+    assert result['Travel'] == 12.5
+    assert np.allclose(result['YouTube watch history'], profile['YouTube watch history'])
+    assert len(result['Email']) == 0
+
+
+def test_profile_is_lazy(tmp_path):
+    path = str(tmp_path / 'profile')
+    save_profile(path, {'Email': np.random.rand(4, 8), 'Movies': np.random.rand(2, 8)})
+    result = load_profile(path)
+
+    assert isinstance(result['Email'], np.memmap)
+    assert list(result._loaded.keys()) == ['Email']
+
+
+def test_profile_keeps_similar_names_and_none(tmp_path):
+    path = str(tmp_path / 'profile')
+    profile = {'Maps places': np.ones((2, 4)), 'Maps-Places': np.zeros((3, 4)), 'Fit': None}
+    save_profile(path, profile)
+    result = load_profile(path)
+
+    assert np.allclose(result['Maps places'], 1.)
+    assert np.allclose(result['Maps-Places'], 0.)
+    assert result['Fit'] is None
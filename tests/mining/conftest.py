@@ -0,0 +1,26 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def browser_history(tmp_path):
+    """
+    Returns a function that writes a fake Takeout export under tmp_path,
+    with a Chrome browser history of the given page titles.
+    """
+    def write(titles, user='user'):
+        """
+        Writes data/<user>/Takeout/Chrome/BrowserHistory.json.
+
+        :param {list} titles - Page titles, one per visit.
+        :param {str} user - The user whose export to write.
+        :return {pathlib.Path} Path to the file
+        """
+        path = tmp_path / 'data' / user / 'Takeout' / 'Chrome'
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / 'BrowserHistory.json', 'w') as f:
+            json.dump({'Browser History': [{'title': x} for x in titles]}, f)
+
+        return path / 'BrowserHistory.json'
+
+    return write
@@ -0,0 +1,33 @@
+from userdata_mining.mining import *
+from userdata_mining.embedding import load_profile
+import os
+
+
+def test_mine_users(tmp_path, browser_history):
+    titles = {'alice': ['a page'], 'bob': ['a page', 'another page', 'a third page']}
+    for user, pages in titles.items():
+        browser_history(pages, user)
+
+    profiles = mine_users(data_path=str(tmp_path), workers=2, backend='hashing')
+    assert list(profiles) == ['alice', 'bob']
+
+    for user, pages in titles.items():
+        assert profiles[user] == get_profile_path(user, str(tmp_path))
+        assert len(load_profile(profiles[user])['Browser History']) == len(pages)
+        assert os.path.exists(tmp_path / 'saved' / 'embeddings' / user / 'manifest.json')
+
+    # Saved profiles are not mined again.
+    assert mine_users(data_path=str(tmp_path), workers=2, backend='hashing') == profiles
+
+
+def test_stale_profile_is_mined_again(tmp_path, browser_history):
+    browser_history(['a page'], 'alice')
+
+    profile = mine_user('alice', str(tmp_path), backend='hashing', parse_workers=0)
+    assert len(load_profile(profile)['Browser History']) == 1
+
+    browser_history(['a page', 'another page'], 'alice')
+
+    assert mine_users(data_path=str(tmp_path), workers=1, backend='hashing') == \
+        {'alice': profile}
+    assert len(load_profile(profile)['Browser History']) == 2
@@ -0,0 +1,124 @@
+from userdata_mining.mining import *
+import numpy as np
+import os
+
+
+def test_manifest_detects_changes(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    (data / 'a.json').write_text('[1, 2]')
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    config = {'model': 'bert-base-uncased', 'version': 1}
+
+    inputs = manifest.fingerprint(str(data), ['*.json'])
+    assert list(inputs) == ['a.json']
+    assert not manifest.is_fresh('a', inputs, config)
+
+    manifest.record('a', inputs, config)
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    assert manifest.is_fresh('a', manifest.fingerprint(str(data), ['*.json']), config)
+    assert not manifest.is_fresh('a', inputs, {'model': 'gpt2', 'version': 1})
+
+    # Touching a file does not invalidate the cache; changing it does.
+    os.utime(data / 'a.json', (0, 0))
+    assert manifest.is_fresh('a', manifest.fingerprint(str(data), ['*.json']), config)
+
+    (data / 'a.json').write_text('[1, 3]')
+    assert not manifest.is_fresh('a', manifest.fingerprint(str(data), ['*.json']), config)
+
+    (data / 'b.json').write_text('[]')
+    assert not manifest.is_fresh('a', manifest.fingerprint(str(data), ['*.json']), config)
+
+
+def test_miner_reembeds_changed_sources(tmp_path, browser_history):
+    browser_history(['a page'])
+
+    def mine():
+        miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                                parse_workers=0)
+        return miner._mine(miner._embedding())['Browser History']
+
+    assert len(mine()) == 1
+    assert len(mine()) == 1
+
+    browser_history(['a page', 'another page'])
+    assert len(mine()) == 2
+
+
+def test_record_keys():
+    keys = RecordKeys()
+    assert list(keys.filter(['a', 'b', 'a'])) == ['a', 'b', 'a']
+    assert len(set(keys.keys)) == 3
+
+    delta = RecordKeys(keys.keys)
+    assert list(delta.filter(['c', 'a', 'b', 'a', 'a'])) == ['c', 'a']
+    assert delta.complete
+    assert not RecordKeys(keys.keys).complete
+
+
+def test_miner_embeds_only_new_records(tmp_path, browser_history):
+    def mine(titles, pipeline=False):
+        browser_history(titles)
+
+        miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                                parse_workers=0, pipeline=pipeline)
+        embedding = miner._embedding()
+        embedded = []
+        embed_batch = embedding.embed_batch
+        embedding.embed_batch = lambda texts, **kwargs: embedded.extend(texts) or \
+            embed_batch(texts, **kwargs)
+
+        return miner._mine(embedding)['Browser History'], embedded
+
+    result, embedded = mine(['a page', 'another page'])
+    assert embedded == ['a page', 'another page']
+
+    result, embedded = mine(['a page', 'another page', 'a new page', 'a page'])
+    assert embedded == ['a new page', 'a page']
+    assert len(result) == 4
+
+    result, embedded = mine(['a page', 'another page', 'a new page', 'a page', 'a newer page'],
+                            pipeline=True)
+    assert embedded == ['a newer page']
+    assert len(result) == 5
+
+    # A removed record means the cache is rebuilt.
+    result, embedded = mine(['another page'])
+    assert embedded == ['another page']
+    assert len(result) == 1
+
+
+def test_interrupted_run_resumes(tmp_path, browser_history):
+    titles = [f'page {x}' for x in range(10)]
+    browser_history(titles)
+
+    def mine(limit=None, pipeline=False):
+        miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                                parse_workers=0, pipeline=pipeline, chunk_size=3)
+        embedding = miner._embedding()
+        embedded = []
+        embed_batch = embedding.embed_batch
+
+        def interrupted(texts, **kwargs):
+            if limit is not None and len(embedded) + len(texts) > limit:
+                raise KeyboardInterrupt
+            embedded.extend(texts)
+            return embed_batch(texts, **kwargs)
+
+        embedding.embed_batch = interrupted
+        try:
+            return miner._mine(embedding)['Browser History'], embedded
+        except KeyboardInterrupt:
+            return None, embedded
+
+    expected = np.asarray(mine()[0])
+    for pipeline in (False, True):
+        for file in (tmp_path / 'saved' / 'embeddings').iterdir():
+            file.unlink()
+
+        # The first two chunks are saved before the run dies.
+        assert mine(limit=7, pipeline=pipeline) == (None, titles[:6])
+        result, embedded = mine(pipeline=pipeline)
+        assert embedded == titles[6:]
+        assert np.allclose(result, expected)
+        assert not os.path.exists(tmp_path / 'saved' / 'embeddings' / 'browser_history.journal.json')
@@ -45,5 +45,5 @@ def test_parse_maps_data():
 
 def test_cache_works():
     results = parse_maps_data('rahul')
-    caches = os.listdir('./caches/')
+    caches = os.listdir('./caches/rahul/')
     assert '.maps.cache' in caches
@@ -0,0 +1,56 @@
+from userdata_mining.mining import *
+import json
+
+
+def test_estimate_records(tmp_path):
+    (tmp_path / 'a.mbox').write_text('From 1\nhi\nFrom 2\nFrom: x\n\nFrom 3\n')
+    (tmp_path / 'a.json').write_text(json.dumps(
+        {'Browser History': [{'title': f'page {x}, [{x}]'} for x in range(50)]}))
+    (tmp_path / 'a.csv').write_text('a,b\n1,2\n3,4')
+    (tmp_path / 'a.tcx').write_text('<xml/>')
+
+    assert estimate_records(str(tmp_path / 'a.mbox')) == 3
+    assert estimate_records(str(tmp_path / 'a.json')) == 50
+    assert estimate_records(str(tmp_path / 'a.csv')) == 2
+    assert estimate_records(str(tmp_path / 'a.tcx')) == 1
+
+    # Partial scans are scaled up to the size of the file.
+    assert 40 <= estimate_records(str(tmp_path / 'a.json'), sample_bytes=500) <= 60
+
+
+def test_plan_user(tmp_path, browser_history):
+    for user, pages in (('small', 10), ('large', 1000)):
+        path = browser_history([f'page {x}' for x in range(pages)], user)
+        (path.parent / 'Unknown.json').write_text('[]')
+
+    reports = tmp_path / 'saved' / 'reports'
+    reports.mkdir(parents=True)
+    with open(reports / 'run.json', 'w') as f:
+        json.dump({'stages': [{'source': 'Browser History', 'stage': 'embed',
+                               'wall_time': 2., 'rows': 100}]}, f)
+
+    throughput = load_throughput(str(tmp_path))
+    plans = [plan_user(x, str(tmp_path), throughput) for x in ('small', 'large')]
+    assert [x['user'] for x in longest_first(plans)] == ['large', 'small']
+
+    plan = plans[1]
+    history = plan['sources'][0]
+    assert history['source'] == 'Browser History'
+    assert history['records'] == 1000
+    assert history['embed_seconds'] == 20.
+    assert plan['unread_files'] == 1
+    assert 'Browser History' in format_plan(plan)
+
+
+def test_order_sources(tmp_path, browser_history):
+    browser_history([f'page {x}' for x in range(100)])
+
+    miner = GoogleDataMiner(data_path=str(tmp_path), user='user')
+    order = miner._longest_first(miner.sources)
+    assert order[0].key == 'Browser History'
+    assert sorted(x.key for x in order) == sorted(x.key for x in miner.sources)
+
+    # Sources are planned once per miner.
+    plans = dict(miner._plans)
+    miner._longest_first(miner.sources[:3])
+    assert all(miner._plans[x] is plans[x] for x in plans)
@@ -0,0 +1,117 @@
+from userdata_mining.mining import *
+import numpy as np
+import pickle
+
+
+def test_sources_are_unique():
+    for sources in (FB_INSTA_SOURCES, GOOGLE_SOURCES):
+        keys = [x.key for x in sources]
+        caches = [x.cache for x in sources if x.cache is not None]
+
+        assert len(keys) == len(set(keys))
+        assert len(caches) == len(set(caches))
+
+
+def test_parsers_are_picklable():
+    for source in FB_INSTA_SOURCES + GOOGLE_SOURCES:
+        if not source.io_bound:
+            pickle.dumps(source.parser)
+
+
+def test_parse_concurrently_matches_sequential(tmp_path, browser_history):
+    browser_history(['a page', 'another page'])
+
+    sequential = GoogleDataMiner(data_path=str(tmp_path), user='user', parse_workers=0)
+    concurrent = GoogleDataMiner(data_path=str(tmp_path), user='user', parse_workers=2)
+
+    assert sequential._parse() == concurrent._parse()
+    assert sequential._parse()['Browser History'] == ['a page', 'another page']
+
+
+def test_pipeline_matches_sequential(tmp_path, browser_history):
+    browser_history([f'page {i}' for i in range(5)])
+
+    sequential = GoogleDataMiner(data_path=str(tmp_path / 'a'), user='user', backend='hashing',
+                                 parse_workers=0)
+    pipelined = GoogleDataMiner(data_path=str(tmp_path / 'b'), user='user', backend='hashing',
+                                pipeline=True, queue_size=1, chunk_size=2)
+    sequential.data_path = pipelined.data_path = str(tmp_path)
+
+    expected = sequential._mine(sequential._embedding())
+    actual = pipelined._mine(pipelined._embedding())
+
+    assert list(actual) == list(expected)
+    assert np.allclose(actual['Browser History'], expected['Browser History'])
+    assert actual['Fit'] == expected['Fit']
+
+    # Rows are counted in the stages that embed them.
+    rows = pipelined.report.stages['Browser History', 'embed'].counters['rows']
+    assert rows == sequential.report.stages['Browser History', 'embed'].counters['rows'] == 5
+
+
+def test_lazy_results(tmp_path, browser_history):
+    browser_history([f'page {i}' for i in range(5)])
+
+    eager = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                            parse_workers=0).mine_data()
+    miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                            parse_workers=0)
+    lazy = miner.mine_data(lazy=True)
+    assert list(lazy) == list(eager)
+
+    # Only the sources accessed are mined, and the model is not loaded
+    # for results that need no embedding.
+    assert np.allclose(lazy['Browser History'], eager['Browser History'])
+    assert lazy['Travel'] == eager['Travel'] == 0
+    assert {x for x, _ in miner.report.stages} == {'Browser History', 'Maps'}
+    assert lazy._embedding is None
+
+    lazy.materialize()
+    assert {x: len(lazy[x]) for x in lazy if x != 'Travel'} == \
+        {x: len(eager[x]) for x in eager if x != 'Travel'}
+    lazy.close()
+
+
+def test_report_counts_rows(tmp_path, browser_history):
+    browser_history([f'page {i}' for i in range(5)])
+
+    miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                            parse_workers=0)
+    miner._mine(miner._embedding())
+    assert miner.report.stages['Browser History', 'embed'].counters['rows'] == 5
+
+    # Cached embeddings are counted when loaded.
+    miner._mine(miner._embedding())
+    assert miner.report.stages['Browser History', 'load'].counters['rows'] == 5
+
+
+def test_fast_mode_does_not_depend_on_chunks(tmp_path, browser_history):
+    browser_history([f'page {i} of {i % 3}' for i in range(6)])
+
+    results = []
+    for chunk_size in (2, 6):
+        miner = GoogleDataMiner(data_path=str(tmp_path / str(chunk_size)), user='user',
+                                fast=True, parse_workers=0, chunk_size=chunk_size)
+        miner.data_path = str(tmp_path)
+        results.append(miner._mine(miner._embedding())['Browser History'])
+
+    assert np.allclose(results[0], results[1])
+
+
+def test_pipeline_keeps_cache_of_emptied_source(tmp_path, browser_history):
+    browser_history([f'page {i}' for i in range(5)])
+
+    GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                    parse_workers=0).mine_data()
+    browser_history([])
+
+    results = []
+    for pipeline in (False, True):
+        miner = GoogleDataMiner(data_path=str(tmp_path), user='user', backend='hashing',
+                                parse_workers=0, pipeline=pipeline)
+        results.append(miner._mine(miner._embedding()))
+        # The cache of the previous export is kept.
+        assert len(np.load(tmp_path / 'saved' / 'embeddings' / 'browser_history.npy')) == 5
+
+    assert list(results[0]) == list(results[1])
+    assert len(results[0]['Browser History']) == len(results[1]['Browser History']) == 0
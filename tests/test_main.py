@@ -0,0 +1,17 @@
+import main
+
+
+def test_all_users(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, 'mine_users', lambda **kwargs: calls.append(kwargs))
+
+    main.main(['--all-users', '--int8-model', '--workers', '2'])
+    main.main(['--all-users', '--quantize', 'float16'])
+    main.main(['--all-users', '--fast'])
+
+    assert calls[0]['quantize'] == 'int8'
+    assert calls[0]['profile_quantize'] is None
+    assert calls[0]['workers'] == 2
+    assert calls[1]['quantize'] is None
+    assert calls[1]['profile_quantize'] == 'float16'
+    assert 'quantize' not in calls[2] and calls[2]['fast']
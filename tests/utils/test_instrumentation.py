@@ -0,0 +1,43 @@
+from userdata_mining.utils.instrumentation import RunReport, count, measured
+from userdata_mining.utils.profiling import Profiler
+import json
+import pickle
+
+
+def test_run_report_merges_stages(tmp_path):
+    report = RunReport()
+    for hits in (3, 1):
+        with report.stage('Chat', 'embed') as stage:
+            count('cache_hits', hits)
+            count('cache_misses', 1)
+            stage.count('rows', 5)
+
+    result, stage = measured('Chat', 'parse', lambda: count('api_calls') or [1, 2])
+    report.add(pickle.loads(pickle.dumps(stage)))
+    count('api_calls')
+
+    report.save(str(tmp_path / 'report.json'))
+    with open(tmp_path / 'report.json') as f:
+        stages = {x['stage']: x for x in json.load(f)['stages']}
+
+    assert result == [1, 2]
+    assert stages['parse']['api_calls'] == 1
+    assert stages['embed']['rows'] == 10
+    assert stages['embed']['cache_hit_rate'] == round(4 / 6, 4)
+    assert 'Chat' in report.summary()
+
+
+def test_profiler_writes_reports(tmp_path):
+    profiler = Profiler(str(tmp_path))
+    report = RunReport(profiler)
+    for _ in range(2):
+        with report.stage('Chat', 'parse'):
+            sorted(str(x) for x in range(1000))
+
+    profiler.summary()
+    profiler.close()
+
+    files = sorted(x.name for x in tmp_path.iterdir())
+    assert files == ['chat_parse.allocations.txt', 'chat_parse.prof',
+                     'chat_parse_1.allocations.txt', 'chat_parse_1.prof', 'summary.txt']
+    assert 'Merged profile of 2 stage(s)' in (tmp_path / 'summary.txt').read_text()
@@ -0,0 +1,50 @@
+from userdata_mining.utils.metrics import get_metrics, get_predictions
+from scipy.spatial import distance_matrix
+import json
+import numpy as np
+import os
+
+
+def test_metrics():
+    y_true = [1, 0, 1, 0, 1]
+    metrics = get_metrics(y_true, [0, 1])
+
+    assert metrics['precision'] == 0.5
+    assert metrics['recall'] == 1 / 3
+    assert metrics['accuracy'] == 0.4
+    assert metrics['popt20'] == 0.2
+
+
+def test_get_predictions_skips_missing_rows():
+    products = np.eye(3, dtype=np.float32)
+    profile = {
+        'Google Search': np.array([[0., 1., 0.], [np.nan] * 3]),
+        'FB Posts': np.array([[1., 0., 0.]])
+    }
+
+    assert get_predictions(profile, products, k=1) == [1]
+
+
+def test_metrics_match_notebook():
+    # The functions these were ported from, run as the notebook defines them.
+    path = os.path.join(os.path.dirname(__file__), '../../notebooks/Predictions.ipynb')
+    with open(path, 'r') as f:
+        cells = [''.join(x['source']) for x in json.load(f)['cells'] if x['cell_type'] == 'code']
+
+    notebook = {'np': np, 'distance_matrix': distance_matrix}
+    for name in ('popt20', 'accuracy', 'precision', 'recall', 'f1_score', 'get_predictions'):
+        exec(next(x for x in cells if x.startswith(f'def {name}(')), notebook)
+
+    rng = np.random.default_rng(0)
+    products = rng.random((50, 8))
+    profile = {'Google Search': rng.random((10, 8)), 'Chrome': rng.random((4, 8)),
+               'FB Posts': rng.random((5, 8))}
+    y_true = list(rng.integers(0, 2, size=50))
+
+    preds = get_predictions(profile, products)
+    assert preds == notebook['get_predictions'](profile, products)
+
+    metrics = get_metrics(y_true, preds)
+    for name, func in (('popt20', 'popt20'), ('accuracy', 'accuracy'), ('precision', 'precision'),
+                       ('recall', 'recall'), ('f1', 'f1_score')):
+        assert np.isclose(metrics[name], notebook[func](y_true, preds))
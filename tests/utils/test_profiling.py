@@ -0,0 +1,22 @@
+from userdata_mining.utils.profiling import Profiler
+import os
+import tracemalloc
+
+
+def test_profiler_without_reset_peak(tmp_path, monkeypatch):
+    # tracemalloc.reset_peak is missing before Python 3.9.
+    if hasattr(tracemalloc, 'reset_peak'):
+        monkeypatch.delattr(tracemalloc, 'reset_peak')
+
+    profiler = Profiler(str(tmp_path))
+    for _ in range(2):
+        state = profiler.start()
+        data = [bytes(1 << 20) for _ in range(4)]
+        profiler.stop(state, 'Email', 'embed')
+        del data
+
+    assert os.path.exists(profiler.summary())
+    with open(tmp_path / 'email_embed_1.allocations.txt', 'r') as f:
+        peak = float(f.readline().split('peak traced memory ')[1].split(' MB')[0])
+    assert 4 <= peak < 8
+    profiler.close()
@@ -1 +1,6 @@
 from userdata_mining.embedding.embedding import Embedding
+from userdata_mining.embedding.cache import EmbeddingCache
+from userdata_mining.embedding.registry import get_model
+from userdata_mining.embedding.store import NpyWriter, save_embeddings, load_embeddings
+from userdata_mining.embedding.store import append_embeddings, truncate_embeddings
+from userdata_mining.embedding.store import save_profile, load_profile, Profile
@@ -0,0 +1,339 @@
+import hashlib
+import os
+import re
+import numpy as np
+import torch
+from abc import ABC, abstractmethod
+from flair.data import Sentence
+from transformers import AutoModel, AutoTokenizer
+from userdata_mining.utils import info
+
+
+class Backend(ABC):
+    """
+    A base class for embedding backends other than flair. Backends embed
+    batches of prepared sentences into fixed-length vectors.
+    """
+
+    #: Length of each vector.
+    dim = None
+
+    #: A Hugging Face tokenizer, used to batch and window sentences. None
+    #: if the backend does not use one.
+    tokenizer = None
+
+    @abstractmethod
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Embeds a batch of sentences.
+
+        :param {list} texts - A list of non-empty str.
+        :return {np.ndarray} A (len(texts), dim) float32 matrix
+        """
+        pass
+
+
+def import_onnxruntime():
+    """
+    Imports ONNX Runtime, which only the onnx backend needs.
+
+    :return The onnxruntime module
+    """
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("backend='onnx' needs onnxruntime. Install it with "
+                          "`pip install onnxruntime`, or use backend='torchscript' "
+                          "or 'flair'.") from None
+    return onnxruntime
+
+
+class ExportedBackend(Backend):
+    """
+    Runs a Hugging Face model exported to ONNX (through ONNX Runtime) or
+    TorchScript. The model is exported once and the artifact is reused
+    from disk. Vectors are pooled the same way as flair's
+    TransformerDocumentEmbeddings: the first token for models that
+    prepend a [CLS] token, the last token otherwise.
+    """
+
+    #: Largest absolute difference from the eager model that is accepted
+    #: when an artifact is exported.
+    TOLERANCE = 1e-4
+
+    FORMATS = ('onnx', 'torchscript')
+
+    def __init__(self, source: str, format: str = 'onnx', export_dir: str = 'saved/models'):
+        """
+        Loads the exported model, exporting it first if needed.
+
+        :param {str} source - A model name or a local model directory.
+        :param {str} format - 'onnx' or 'torchscript'.
+        :param {str} export_dir - Directory for exported artifacts.
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f'format must be one of {self.FORMATS}')
+        if format == 'onnx':
+            import_onnxruntime()
+
+        self.format = format
+        self.tokenizer = AutoTokenizer.from_pretrained(source)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.max_length = min(self.tokenizer.model_max_length, 512)
+
+        ids = self.tokenizer.encode('a', add_special_tokens=True)
+        self.initial_cls_token = self.tokenizer.cls_token_id is not None and \
+            ids[0] == self.tokenizer.cls_token_id
+
+        slug = re.sub(r'\W+', '_', source).strip('_')
+        extension = 'onnx' if format == 'onnx' else 'pt'
+        path = f'{export_dir}/{slug}.{extension}'
+
+        if not os.path.exists(path):
+            # Exported under a temporary name, so that processes loading
+            # the same model never read a half-written artifact.
+            os.makedirs(export_dir, exist_ok=True)
+            self._export(source, f'{path}.{os.getpid()}.tmp')
+            os.replace(f'{path}.{os.getpid()}.tmp', path)
+
+        if format == 'onnx':
+            self._session = import_onnxruntime().InferenceSession(
+                path, providers=['CPUExecutionProvider'])
+        else:
+            self._module = torch.jit.load(path)
+
+        self.dim = self._run(*self._tokenize(['a'])).shape[-1]
+
+    def _tokenize(self, texts: list):
+        """
+        Tokenizes a batch the way flair does: each sentence is split into
+        words first, and the words are joined with spaces.
+
+        :param {list} texts - A list of non-empty str.
+        :return {tuple} int64 input ids and attention mask
+        """
+        texts = [Sentence(x).to_tokenized_string() for x in texts]
+        encoded = self.tokenizer(texts, padding=True, truncation=True,
+                                 max_length=self.max_length, return_tensors='np')
+        return encoded['input_ids'].astype(np.int64), encoded['attention_mask'].astype(np.int64)
+
+    def _export(self, source: str, path: str):
+        """
+        Exports the model and checks it against the eager model.
+
+        :param {str} source - A model name or a local model directory.
+        :param {str} path - Where to write the artifact.
+        """
+        info(f'Exporting {source} to {path}.')
+        model = AutoModel.from_pretrained(source, torchscript=True)
+        model.eval()
+
+        input_ids, attention_mask = (torch.from_numpy(x) for x in
+                                     self._tokenize(['an example sentence', 'another one']))
+
+        with torch.no_grad():
+            expected = model(input_ids, attention_mask=attention_mask)[0].numpy()
+
+            if self.format == 'onnx':
+                torch.onnx.export(model, (input_ids, attention_mask), path,
+                                  input_names=['input_ids', 'attention_mask'],
+                                  output_names=['last_hidden_state'],
+                                  dynamic_axes={'input_ids': {0: 'batch', 1: 'sequence'},
+                                                'attention_mask': {0: 'batch', 1: 'sequence'},
+                                                'last_hidden_state': {0: 'batch', 1: 'sequence'}},
+                                  opset_version=14)
+                self._session = import_onnxruntime().InferenceSession(
+                    path, providers=['CPUExecutionProvider'])
+            else:
+                self._module = torch.jit.trace(model, (input_ids, attention_mask))
+                self._module.save(path)
+
+        difference = np.abs(self._run(input_ids.numpy(), attention_mask.numpy()) - expected).max()
+        if difference > self.TOLERANCE:
+            os.remove(path)
+            raise ValueError(f'Exported model differs from {source} by {difference}.')
+
+    def _run(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        Runs the exported model.
+
+        :return {np.ndarray} The last hidden state, (batch, sequence, dim)
+        """
+        if self.format == 'onnx':
+            return self._session.run(None, {'input_ids': input_ids,
+                                            'attention_mask': attention_mask})[0]
+
+        with torch.no_grad():
+            return self._module(torch.from_numpy(input_ids),
+                                torch.from_numpy(attention_mask))[0].numpy()
+
+    def embed(self, texts: list) -> np.ndarray:
+        input_ids, attention_mask = self._tokenize(texts)
+        hidden = self._run(input_ids, attention_mask)
+
+        if self.initial_cls_token:
+            index = np.zeros(len(texts), dtype=np.int64)
+        else:
+            index = attention_mask.sum(axis=1) - 1
+
+        return hidden[np.arange(len(texts)), index].astype(np.float32)
+
+
+#: Backends that do not run a transformer. They are cheap enough that
+#: results are neither cached nor sent to worker processes.
+LIGHTWEIGHT_BACKENDS = ('hashing', 'tfidf', 'static')
+
+_WORD = re.compile(r'\w+')
+
+
+def _words(text: str) -> list:
+    """
+    Splits a sentence into lowercase words. Identifiers such as IP
+    addresses and package names are split on their punctuation.
+    """
+    return _WORD.findall(text.lower())
+
+
+class HashingBackend(Backend):
+    """
+    Embeds sentences by hashing their words into a fixed number of
+    signed buckets and counting them. Nothing is loaded or fitted, so
+    any number of processes produce the same vectors.
+    """
+
+    def __init__(self, dim: int = 768, hashes: int = 1):
+        """
+        :param {int} dim - Length of each vector.
+        :param {int} hashes - Number of buckets each word is added to.
+        """
+        self.dim = dim
+        self.hashes = hashes
+
+    def _tokens(self, text: str) -> list:
+        """
+        Splits a sentence into the tokens that are hashed.
+
+        :param {str} text - A non-empty str.
+        :return {list} A list of str
+        """
+        return _words(text)
+
+    def _buckets(self, words: list):
+        """
+        Hashes words to buckets and signs.
+
+        :param {list} words - A list of str.
+        :return {tuple} (len(words), hashes) int64 buckets and float32
+        signs
+        """
+        digests = b''.join(hashlib.blake2b(word.encode('utf-8'), digest_size=4 * self.hashes).digest()
+                           for word in words)
+        hashed = np.frombuffer(digests, dtype='<u4').astype(np.int64).reshape(-1, self.hashes)
+        signs = np.where(hashed & 1, 1., -1.).astype(np.float32)
+        return (hashed >> 1) % self.dim, signs
+
+    def _weights(self, docs: list) -> list:
+        """
+        Weights the words of each sentence.
+
+        :param {list} docs - One list of words per sentence.
+        :return {list} One dict of word weights per sentence
+        """
+        weights = []
+        for words in docs:
+            counts = {}
+            for word in words:
+                counts[word] = counts.get(word, 0) + 1
+            weights.append(counts)
+
+        return weights
+
+    def embed(self, texts: list) -> np.ndarray:
+        weights = self._weights([self._tokens(x) for x in texts])
+        result = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        rows = np.repeat(np.arange(len(texts)), [len(x) for x in weights])
+        words = [word for doc in weights for word in doc]
+        values = np.array([value for doc in weights for value in doc.values()],
+                          dtype=np.float32)
+        if words:
+            buckets, signs = self._buckets(words)
+            np.add.at(result, (rows[:, None], buckets), signs * values[:, None])
+
+        # Sentences without words cannot be embedded.
+        norms = np.linalg.norm(result, axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(norms > 0, result / norms, np.nan).astype(np.float32)
+
+
+class TfidfBackend(HashingBackend):
+    """
+    Embeds sentences as TF-IDF vectors, projected to a fixed length with
+    a sparse random projection: each word is added to a few signed
+    buckets chosen by hashing it. Document frequencies are counted over
+    each batch passed to embed, so vectors from different batches are
+    not comparable: embed a corpus in one batch.
+    """
+
+    def __init__(self, dim: int = 768, hashes: int = 3):
+        """
+        :param {int} dim - Length of each vector.
+        :param {int} hashes - Number of buckets each word is projected to.
+        """
+        super().__init__(dim, hashes)
+
+    def _weights(self, docs: list) -> list:
+        counts = super()._weights(docs)
+
+        frequencies = {}
+        for doc in counts:
+            for word in doc:
+                frequencies[word] = frequencies.get(word, 0) + 1
+
+        # Smoothed idf, as in scikit-learn.
+        n = len(docs)
+        return [{word: count * (np.log((1 + n) / (1 + frequencies[word])) + 1)
+                 for word, count in doc.items()}
+                for doc in counts]
+
+
+class StaticVectorBackend(Backend):
+    """
+    Embeds sentences as the average of static word vectors, such as
+    GloVe or fastText, read from a local text file with one word and
+    its vector per line.
+    """
+
+    def __init__(self, path: str):
+        """
+        Loads the word vectors.
+
+        :param {str} path - Path to the vectors file. A word2vec-style
+        header line with the vocabulary size and length is skipped.
+        """
+        words = {}
+        vectors = []
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                parts = line.rstrip().split(' ')
+                if len(parts) <= 2:
+                    continue
+
+                if parts[0] not in words:
+                    words[parts[0]] = len(vectors)
+                    vectors.append(np.array(parts[1:], dtype=np.float32))
+
+        self.words = words
+        self.vectors = np.vstack(vectors)
+        self.dim = self.vectors.shape[1]
+        info(f'Loaded {len(words)} word vectors from {path}.')
+
+    def embed(self, texts: list) -> np.ndarray:
+        result = np.full((len(texts), self.dim), np.nan, dtype=np.float32)
+        for i, text in enumerate(texts):
+            idx = [self.words[word] for word in _words(text) if word in self.words]
+            if idx:
+                result[i] = self.vectors[idx].mean(axis=0)
+
+        return result
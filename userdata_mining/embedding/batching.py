@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def token_budget_batches(lengths, max_tokens: int, max_batch_size: int = 256) -> list:
+    """
+    Groups inputs into batches whose padded size stays under a token
+    budget. Inputs are sorted by length, so each batch holds inputs of
+    similar length and little compute is spent on padding. An input
+    longer than max_tokens gets a batch of its own.
+
+    :param {Iterable} lengths - Token count of each input.
+    :param {int} max_tokens - Maximum of batch size * longest input.
+    :param {int} max_batch_size - Maximum number of inputs per batch.
+    :return {list} A list of batches, each a list of input indices
+    """
+    order = np.argsort(np.asarray(lengths), kind='stable')
+
+    batches = []
+    batch = []
+    for i in order:
+        # Inputs are sorted, so the newest one is the longest.
+        if batch and ((len(batch) + 1) * lengths[i] > max_tokens or len(batch) == max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(int(i))
+
+    if batch:
+        batches.append(batch)
+
+    return batches
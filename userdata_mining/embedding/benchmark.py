@@ -0,0 +1,333 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+from userdata_mining.embedding.embedding import Embedding
+from userdata_mining.embedding.store import load_profile
+from userdata_mining.utils import info
+from userdata_mining.utils.metrics import get_metrics, get_predictions
+
+
+WORDS = ('the of and to in is for on that with this you it was are as at be by '
+         'from have or not your all new more an can our about will one my time '
+         'video music order shipping account update review watch live best free '
+         'game app photo news sale travel coffee pizza weather recipe meeting').split()
+
+
+# Word count ranges of the kinds of text in Takeout data, and how
+# often each kind appears in a mixed corpus.
+LENGTHS = {
+    'titles': (1, 6),
+    'chat': (10, 40),
+    'email': (200, 600)
+}
+MIX = {'titles': 0.6, 'chat': 0.3, 'email': 0.1}
+
+MODELS = ('bert-base-uncased', 'distilgpt2', 'gpt2-medium')
+
+BATCHING = (
+    {'batch_size': 8, 'max_tokens': None},
+    {'batch_size': 32, 'max_tokens': None},
+    {'max_tokens': 4096},
+    {'max_tokens': 16384}
+)
+
+
+def corpus(kind: str = 'mixed', n: int = 1000, seed: int = 0) -> list:
+    """
+    Generates a synthetic corpus of distinct texts whose lengths mimic
+    Takeout data. embed_batch embeds each distinct text once, so a text
+    drawn twice gets its index appended; otherwise throughput would
+    count texts that were never embedded.
+
+    :param {str} kind - 'titles', 'chat', 'email', or 'mixed' for
+    mostly titles, some chat lines and a few email bodies.
+    :param {int} n - Number of texts.
+    :param {int} seed - Random seed.
+    :return {list} A list of str
+    """
+    rng = np.random.default_rng(seed)
+    if kind == 'mixed':
+        kinds = rng.choice(list(MIX), size=n, p=list(MIX.values()))
+    else:
+        kinds = [kind] * n
+    lengths = [rng.integers(*LENGTHS[x]) for x in kinds]
+
+    texts = []
+    seen = set()
+    for i, length in enumerate(lengths):
+        text = ' '.join(rng.choice(WORDS, size=length))
+        if text in seen:
+            text = f'{text} {i}'
+        seen.add(text)
+        texts.append(text)
+
+    return texts
+
+
+def mixed_corpus(n: int = 1000, seed: int = 0) -> list:
+    """
+    Generates a corpus of mostly short titles and names, some
+    chat-length messages and a few long email bodies.
+
+    :param {int} n - Number of texts.
+    :param {int} seed - Random seed.
+    :return {list} A list of str
+    """
+    return corpus('mixed', n, seed)
+
+
+def time_embedding(embedding: Embedding, texts: list) -> float:
+    """
+    Times embed_batch over a list of texts.
+
+    :param {Embedding} embedding - The embedding object.
+    :param {list} texts - A list of str.
+    :return {float} Elapsed seconds
+    """
+    start = time.perf_counter()
+    embedding.embed_batch(texts)
+    return time.perf_counter() - start
+
+
+def benchmark_batching(model='bert-base-uncased', n=1000, batch_size=8, max_tokens=4096) -> dict:
+    """
+    Compares fixed-size batching against length-sorted, token-budgeted
+    batching on a mixed-length corpus.
+
+    :param {str} model - The model architecture.
+    :param {int} n - Number of texts.
+    :param {int} batch_size - Batch size for fixed batching.
+    :param {int} max_tokens - Token budget for dynamic batching.
+    :return {dict} Sentences/sec for each mode, and the speedup
+    """
+    texts = mixed_corpus(n)
+    embedding = Embedding(model=model, batch_size=batch_size, max_tokens=None)
+
+    # Warm up, so that one-time setup is not counted.
+    embedding.embed_batch(texts[:batch_size])
+
+    fixed = n / time_embedding(embedding, texts)
+
+    embedding.max_tokens = max_tokens
+    dynamic = n / time_embedding(embedding, texts)
+
+    return {
+        'fixed': fixed,
+        'dynamic': dynamic,
+        'speedup': dynamic / fixed
+    }
+
+
+def load_products(path: str = 'products') -> list:
+    """
+    Loads the product catalog used to evaluate recommendations.
+
+    :param {str} path - Directory of product CSV files.
+    :return {list} One str per product, in a stable order
+    """
+    products = []
+    for file in sorted(os.listdir(path)):
+        with open(f'{path}/{file}', 'r') as f:
+            lines = f.readlines()[1:]
+        products.extend(x.replace(',', ' ') for x in lines)
+
+    return products
+
+
+def benchmark_quantization(model='bert-base-uncased', n=1000, profile=None,
+                           quantized_profile=None, labels=None,
+                           products='products') -> dict:
+    """
+    Compares the float model against its dynamically int8-quantized
+    version, for speed on a mixed-length corpus and, if profiles and
+    labels are given, for recommendation quality.
+
+    :param {str} model - The model architecture.
+    :param {int} n - Number of texts to time.
+    :param {str} profile - A profile mined with the float model.
+    :param {str} quantized_profile - The same data mined with
+    quantize='int8'.
+    :param {list} labels - 0/1 labels, one per product, marking the
+    products the user would buy.
+    :param {str} products - Directory of product CSV files.
+    :return {dict} Sentences/sec and metrics for each model, the
+    speedup, and the mean cosine similarity between their vectors
+    """
+    texts = mixed_corpus(n)
+    results = {}
+    vectors = {}
+
+    for name, quantize in (('float', None), ('int8', 'int8')):
+        embedding = Embedding(model=model, quantize=quantize)
+        embedding.embed_batch(texts[:8])
+
+        start = time.perf_counter()
+        vectors[name] = embedding.embed_batch(texts)
+        results[name] = {'sentences_per_sec': n / (time.perf_counter() - start)}
+
+        path = profile if quantize is None else quantized_profile
+        if path is not None and labels is not None:
+            product_embeddings = embedding.embed_batch(load_products(products))
+            preds = get_predictions(load_profile(path), product_embeddings)
+            results[name].update(get_metrics(labels, preds))
+
+    a, b = vectors['float'], vectors['int8']
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+    results['speedup'] = results['int8']['sentences_per_sec'] / \
+        results['float']['sentences_per_sec']
+    results['cosine'] = float(np.nanmean(cosine))
+    return results
+
+
+def _run_config(model: str, kind: str, n: int, kwargs: dict) -> dict:
+    """
+    Measures one model, corpus and batch configuration. Meant to run in
+    a fresh process, so that its peak RSS is its own.
+    """
+    texts = corpus(kind, n)
+    embedding = Embedding(model=model, **kwargs)
+    embedding.embed_batch(texts[:8])
+
+    # Time every forward pass.
+    latencies = []
+    embed_sentences = embedding._embed_sentences
+
+    def timed(batch):
+        start = time.perf_counter()
+        result = embed_sentences(batch)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    embedding._embed_sentences = timed
+
+    start = time.perf_counter()
+    embedding.embed_batch(texts)
+    elapsed = time.perf_counter() - start
+
+    if embedding.tokenizer is not None:
+        tokens = sum(embedding._token_lengths(texts))
+    else:
+        tokens = sum(len(x.split()) for x in texts)
+
+    return {
+        'model': model,
+        'corpus': kind,
+        'n': n,
+        'config': kwargs,
+        'sentences_per_sec': len(texts) / elapsed,
+        'tokens_per_sec': tokens / elapsed,
+        'batches': len(latencies),
+        'p50_latency': float(np.percentile(latencies, 50)) if latencies else None,
+        'p99_latency': float(np.percentile(latencies, 99)) if latencies else None,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+
+def _environment() -> dict:
+    """
+    Describes the code and hardware a benchmark ran on.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'threads': torch.get_num_threads()
+    }
+
+
+def benchmark_suite(models=MODELS, corpora=('titles', 'chat', 'email', 'mixed'), n=1000,
+                    batching=BATCHING, output=None) -> dict:
+    """
+    Measures sentences/sec, tokens/sec, p50 and p99 latency per forward
+    pass, and peak RSS for every model, corpus and batch configuration.
+    Each configuration runs in its own process.
+
+    :param {Iterable} models - Model names.
+    :param {Iterable} corpora - Corpus kinds; see corpus.
+    :param {int} n - Number of texts per corpus.
+    :param {Iterable} batching - Keyword arguments passed to Embedding,
+    one dict per configuration.
+    :param {str} output - If given, the results are written to this
+    JSON file.
+    :return {dict} The environment and a list of results
+    """
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for model in models:
+        for kind in corpora:
+            for kwargs in batching:
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    result = executor.submit(_run_config, model, kind, n, dict(kwargs)).result()
+
+                info(f'{model}, {kind}, {kwargs}: {result["sentences_per_sec"]:.1f} sentences/sec, '
+                     f'{result["tokens_per_sec"]:.0f} tokens/sec, '
+                     f'p99 {result["p99_latency"] or 0:.3f}s, '
+                     f'{result["peak_rss_mb"]:.0f} MB.')
+                results.append(result)
+
+    report = {'environment': _environment(), 'results': results}
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    return report
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description='Benchmarks embedding.')
+    argparser.add_argument('--compare', choices=['batching', 'quantization', 'suite'],
+                           default='batching', help='what to compare')
+    argparser.add_argument('--model', default='bert-base-uncased')
+    argparser.add_argument('--models', nargs='+', default=list(MODELS),
+                           help='models measured by the suite')
+    argparser.add_argument('--corpora', nargs='+', default=['titles', 'chat', 'email', 'mixed'],
+                           choices=['titles', 'chat', 'email', 'mixed'])
+    argparser.add_argument('--output', help='JSON file the suite results are written to')
+    argparser.add_argument('-n', type=int, default=1000)
+    argparser.add_argument('--batch-size', type=int, default=8)
+    argparser.add_argument('--max-tokens', type=int, default=4096)
+    argparser.add_argument('--profile', help='profile mined with the float model')
+    argparser.add_argument('--quantized-profile', help='profile mined with the int8 model')
+    argparser.add_argument('--labels', help='JSON file with a 0/1 label per product')
+    argparser.add_argument('--products', default='products')
+    args = argparser.parse_args()
+
+    if args.compare == 'batching':
+        results = benchmark_batching(args.model, args.n, args.batch_size, args.max_tokens)
+        info(f'Fixed batches of {args.batch_size}: {results["fixed"]:.1f} sentences/sec.\n' +
+             f'Token budget of {args.max_tokens}: {results["dynamic"]:.1f} sentences/sec.\n' +
+             f'Speedup: {results["speedup"]:.2f}x')
+    elif args.compare == 'suite':
+        benchmark_suite(args.models, args.corpora, args.n, output=args.output)
+    else:
+        labels = None
+        if args.labels is not None:
+            with open(args.labels, 'r') as f:
+                labels = json.load(f)
+
+        results = benchmark_quantization(args.model, args.n, args.profile,
+                                         args.quantized_profile, labels, args.products)
+        for name in ('float', 'int8'):
+            info(f'{name}: ' + ', '.join(f'{key} {value:.3f}'
+                                         for key, value in results[name].items()))
+        info(f'Speedup: {results["speedup"]:.2f}x\n' +
+             f'Mean cosine similarity: {results["cosine"]:.4f}')
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import sqlite3
+import numpy as np
+
+
+def normalize(text: str) -> str:
+    """
+    Normalizes a text for cache lookups. Sentences are tokenized on
+    whitespace before embedding, so texts that differ only in
+    whitespace embed identically.
+
+    :param {str} text - The text to normalize.
+    """
+    return ' '.join(text.split())
+
+
+class EmbeddingCache:
+    """
+    A disk-backed cache of embeddings, keyed by model name and a hash of
+    the normalized text. When the cache grows past max_entries, the
+    least recently used entries are evicted. Entries are stamped with a
+    counter of accesses rather than the time.
+    """
+
+    # SQLite limits the number of variables in one statement.
+    _CHUNK = 500
+
+    def __init__(self, path: str, max_entries: int = 1000000):
+        """
+        Opens (or creates) the cache.
+
+        :param {str} path - Path to the cache file.
+        :param {int} max_entries - Maximum number of vectors to keep.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS embeddings ('
+                           'key TEXT PRIMARY KEY, '
+                           'vector BLOB NOT NULL, '
+                           'last_used REAL NOT NULL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used '
+                           'ON embeddings (last_used)')
+        self._conn.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        """
+        Returns the cache key of a text embedded by a model.
+
+        :param {str} model - The model name.
+        :param {str} text - The text.
+        """
+        return hashlib.sha1(f'{model}\0{normalize(text)}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, model: str, texts: list) -> list:
+        """
+        Looks up a list of texts.
+
+        :param {str} model - The model name.
+        :param {list} texts - A list of str.
+        :return {list} A list of vectors, with None for misses
+        """
+        keys = [self.key(model, x) for x in texts]
+        found = {}
+        for start in range(0, len(keys), self._CHUNK):
+            chunk = keys[start:start + self._CHUNK]
+            rows = self._conn.execute(
+                f'SELECT key, vector FROM embeddings WHERE key IN ({",".join("?" * len(chunk))})',
+                chunk).fetchall()
+            found.update(rows)
+
+        now = self._stamp()
+        self._conn.executemany('UPDATE embeddings SET last_used = ? WHERE key = ?',
+                               [(now, k) for k in found])
+        self._conn.commit()
+
+        self.hits += sum(k in found for k in keys)
+        self.misses += sum(k not in found for k in keys)
+
+        return [np.frombuffer(found[k], dtype=np.float32).copy() if k in found else None
+                for k in keys]
+
+    def put_many(self, model: str, texts: list, vectors):
+        """
+        Stores vectors for a list of texts, then evicts old entries if
+        the cache is over capacity.
+
+        :param {str} model - The model name.
+        :param {list} texts - A list of str.
+        :param {Iterable} vectors - One vector per text.
+        """
+        now = self._stamp()
+        rows = [(self.key(model, text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        self._conn.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)', rows)
+        self._evict()
+        self._conn.commit()
+
+    def _stamp(self) -> float:
+        """
+        Returns the access stamp of the next lookup or store: one more
+        than the latest stamp in the cache. Unlike the time, it always
+        increases, so accesses close together are still ordered.
+        """
+        latest = self._conn.execute('SELECT MAX(last_used) FROM embeddings').fetchone()[0]
+        return (latest or 0) + 1
+
+    def _evict(self):
+        """
+        Deletes the least recently used entries over max_entries.
+        """
+        count = len(self)
+        if count > self.max_entries:
+            self._conn.execute('DELETE FROM embeddings WHERE key IN ('
+                               'SELECT key FROM embeddings ORDER BY last_used LIMIT ?)',
+                               (count - self.max_entries,))
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM embeddings').fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of lookups that were served from the cache.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.
+
+    def close(self):
+        """
+        Closes the cache file.
+        """
+        self._conn.close()
@@ -1,6 +1,35 @@
+import itertools
 import re
+import numpy as np
+from userdata_mining.embedding.backends import LIGHTWEIGHT_BACKENDS, import_onnxruntime
+from userdata_mining.embedding.cache import EmbeddingCache
+from userdata_mining.embedding.encoders import KINDS, get_encoder
+from userdata_mining.embedding.batching import token_budget_batches
+from userdata_mining.embedding.pool import EmbeddingPool
+from userdata_mining.embedding.registry import get_model, get_backend, get_dim, get_tokenizer
+from userdata_mining.utils import info
+from userdata_mining.utils.instrumentation import count
 from flair.data import Sentence
-from flair.embeddings import TransformerDocumentEmbeddings
+
+
+MODEL_QUANTIZATIONS = (None, 'int8')
+POOLINGS = ('mean', 'max')
+
+
+def dedupe(texts: list):
+    """
+    Collapses a list to its distinct items, keeping first-seen order.
+
+    :param {list} texts - A list of hashable items.
+    :return {tuple} The distinct items, and an index array such that
+    unique[inverse] rebuilds the input
+    """
+    positions = {}
+    inverse = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        inverse[i] = positions.setdefault(text, len(positions))
+
+    return list(positions), inverse
 
 
 class Embedding:
@@ -8,20 +37,138 @@ class Embedding:
     Performs embedding on sentences.
     """
 
-    def __init__(self, model='gpt2-medium'):
+    def __init__(self, model='gpt2-medium', batch_size=8, cache=None, max_tokens=4096,
+                 workers=0, model_dir=None, max_windows=None, pooling='mean',
+                 backend='flair', export_dir='saved/models', quantize=None):
         """
         Initializes the embedding model.
 
         :param {str} model - The model architecture. Must be one of
         https://huggingface.co/transformers/pretrained_models.html
+        :param {int} batch_size - Number of sentences per forward pass
+        in embed_batch, if max_tokens is None.
+        :param {str|EmbeddingCache} cache - An embedding cache, or a path
+        to one. If None, nothing is cached.
+        :param {int} max_tokens - Token budget per forward pass in
+        embed_batch. Sentences are sorted by length and grouped so that
+        batch size * longest sentence stays under it. If None, batches
+        of batch_size are used in input order.
+        :param {int} workers - If positive, embed_batch shards its input
+        across this many worker processes, each with its own copy of the
+        model. Use this inside an `if __name__ == '__main__'` guard.
+        :param {str} model_dir - A directory of locally saved models. If
+        <model_dir>/<model> exists, the model is loaded from there.
+        :param {int} max_windows - If set, sentences longer than the
+        model's maximum sequence length are split into token windows,
+        keeping at most this many, and the window embeddings are pooled.
+        Otherwise the model truncates them.
+        :param {str} pooling - How windows are pooled, 'mean' or 'max'.
+        :param {str} backend - 'flair' to run the model eagerly through
+        flair, or 'onnx' or 'torchscript' to export it once and run the
+        exported artifact. Exported models match flair to within
+        ExportedBackend.TOLERANCE. For quick, rough results, 'hashing'
+        (hashed word counts), 'tfidf' (projected TF-IDF) or 'static'
+        (averaged word vectors from the file named by model) avoid
+        transformers altogether; they ignore batching, windowing,
+        caching and workers. 'tfidf' counts document frequencies over
+        each call to embed_batch, so only vectors embedded together are
+        comparable; use 'hashing' with embed_stream.
+        :param {str} export_dir - Directory for exported artifacts.
+        :param {str} quantize - If 'int8', the linear layers of the model
+        are dynamically quantized to int8. This is faster on CPUs at a
+        small cost in quality; see benchmark.py. Only the flair backend
+        supports it.
+
+        The model itself is shared by all Embedding objects in the
+        process, and is only loaded when a sentence is first embedded.
         """
-        self.model = TransformerDocumentEmbeddings(model, batch_size=8)
+        if pooling not in POOLINGS:
+            raise ValueError(f'pooling must be one of {POOLINGS}')
+        if quantize not in MODEL_QUANTIZATIONS:
+            raise ValueError(f'quantize must be one of {MODEL_QUANTIZATIONS}')
+        if quantize is not None and backend != 'flair':
+            raise ValueError('quantize is only supported by the flair backend')
+        if backend == 'onnx':
+            # Fail before mining starts, not when the model is first used.
+            import_onnxruntime()
 
-    def embed(self, sentence: str) -> list:
+        if isinstance(cache, str):
+            cache = EmbeddingCache(cache)
+
+        self.model_name = model
+        self.batch_size = batch_size
+        self.cache = cache
+        self.max_tokens = max_tokens
+        self.model_dir = model_dir
+        self.max_windows = max_windows
+        self.pooling = pooling
+        self.backend = backend
+        self.export_dir = export_dir
+        self.quantize = quantize
+        self._encoders = {}
+
+        if workers > 0 and backend not in LIGHTWEIGHT_BACKENDS:
+            self.pool = EmbeddingPool(model, workers, batch_size=batch_size,
+                                      max_tokens=max_tokens, model_dir=model_dir,
+                                      backend=backend, export_dir=export_dir,
+                                      quantize=quantize)
+        else:
+            self.pool = None
+
+    @property
+    def model(self):
         """
-        Embeds a given sentence. If it fails, returns None.
+        The underlying flair model, loaded through the shared registry.
+        """
+        return get_model(self.model_name, self.model_dir, self.quantize)
 
-        :param {str} sentence - A cased or uncased sentence.
+    @property
+    def _cache_name(self) -> str:
+        """
+        The name vectors are cached under. Quantized models produce
+        slightly different vectors, so they are cached separately.
+        """
+        if self.quantize is not None:
+            return f'{self.model_name}:{self.quantize}'
+        return self.model_name
+
+    @property
+    def _backend(self):
+        """
+        The exported backend, loaded through the shared registry.
+        """
+        return get_backend(self.model_name, self.backend, self.model_dir, self.export_dir)
+
+    @property
+    def tokenizer(self):
+        """
+        The tokenizer of the model. If the model runs in worker
+        processes, only the tokenizer is loaded in this one.
+        """
+        if self.pool is not None:
+            return get_tokenizer(self.model_name, self.model_dir)
+        if self.backend != 'flair':
+            return self._backend.tokenizer
+        return self.model.tokenizer
+
+    @property
+    def dim(self) -> int:
+        """
+        The length of each embedding vector.
+        """
+        if self.pool is not None:
+            return self.pool.dim
+        if self.backend != 'flair':
+            return self._backend.dim
+        return get_dim(self.model_name, self.model_dir)
+
+    @staticmethod
+    def _prepare(sentence):
+        """
+        Normalizes an input the way embed expects it. Returns None for
+        inputs that cannot be embedded.
+
+        :param sentence - A str, bytes, or list of str.
         """
         if isinstance(sentence, bytes):
             sentence = sentence.decode('ascii')
@@ -32,9 +179,275 @@ class Embedding:
         if sentence == '':
             return None
 
+        return sentence
+
+    def embed(self, sentence: str) -> list:
+        """
+        Embeds a given sentence. If it fails, returns None.
+
+        :param {str} sentence - A cased or uncased sentence.
+        """
+        sentence = self._prepare(sentence)
+        if sentence is None:
+            return None
+
+        vector = self.embed_batch([sentence])[0]
+        if np.isnan(vector).any():
+            return None
+        return vector
+
+    def embed_batch(self, texts, name=None, kind='text') -> np.ndarray:
+        """
+        Embeds a list of sentences, running the model on batches
+        rather than one sentence at a time. Inputs are handled the same way
+        as embed; rows for inputs that embed would return None for are
+        filled with NaN. Each distinct sentence is embedded once and
+        copied to every row it appears in. If a cache is set, only
+        sentences missing from it are run through the model.
+
+        :param {Iterable} texts - A list of str, bytes, or lists of str.
+        :param {str} name - If given, the duplication ratio is logged
+        under this name.
+        :param {str} kind - What the sentences hold: 'text' for prose,
+        which is run through the model, or 'categorical', 'identifier'
+        or 'numeric' for values that are encoded cheaply to vectors of
+        the same length instead.
+        :return {np.ndarray} A (len(texts), dim) matrix
+        """
+        if kind not in KINDS:
+            raise ValueError(f'kind must be one of {KINDS}')
+
+        texts = [self._prepare(x) for x in texts]
+        result = np.full((len(texts), self.dim), np.nan, dtype=np.float32)
+
+        valid = [i for i, x in enumerate(texts) if x is not None]
+        unique, inverse = dedupe([texts[i] for i in valid])
+
+        if name is not None and valid:
+            info(f'{name}: {len(valid)} item(s), {len(unique)} unique '
+                 f'({1 - len(unique) / len(valid):.1%} duplicates).')
+        count('texts', len(texts))
+        count('unique_texts', len(unique))
+
+        if valid:
+            if kind != 'text':
+                if kind not in self._encoders:
+                    self._encoders[kind] = get_encoder(kind, self.dim)
+                result[valid] = self._encoders[kind].embed(unique)[inverse]
+            elif self.max_windows is None or self.backend in LIGHTWEIGHT_BACKENDS:
+                result[valid] = self._embed_unique(unique)[inverse]
+            else:
+                result[valid] = self._embed_windowed(unique)[inverse]
+
+        return result
+
+    def embed_stream(self, texts, chunk_size=1024, name=None, kind='text'):
+        """
+        Embeds an iterable of sentences lazily, consuming at most
+        chunk_size of them at a time. Memory use depends on chunk_size,
+        not on the number of sentences. Duplicates are only collapsed
+        within a chunk: a sentence repeated in a later chunk is embedded
+        again, unless a cache is set and it is found there.
+
+        :param {Iterable} texts - str, bytes, or lists of str.
+        :param {int} chunk_size - Number of sentences per chunk.
+        :param {str} name - If given, the duplication ratio of the whole
+        stream, and how many sentences were embedded after collapsing
+        duplicates within each chunk, are logged under this name when it
+        is exhausted.
+        :param {str} kind - Passed to embed_batch.
+        :return {Iterator} (n, dim) matrices, one per chunk, in order
+        """
+        texts = iter(texts)
+        valid = 0
+        embedded = 0
+        # Hashes of the distinct sentences so far, so that duplicates in
+        # different chunks are counted.
+        seen = set()
+        while True:
+            chunk = list(itertools.islice(texts, chunk_size))
+            if not chunk:
+                break
+
+            if name is not None:
+                prepared = [x for x in map(self._prepare, chunk) if x is not None]
+                valid += len(prepared)
+                embedded += len(set(prepared))
+                seen.update(hash(x) for x in prepared)
+            yield self.embed_batch(chunk, kind=kind)
+
+        if name is not None and valid:
+            cached = ' or looked up in the cache' if self.cache is not None else ''
+            info(f'{name}: {valid} item(s), {len(seen)} unique '
+                 f'({1 - len(seen) / valid:.1%} duplicates); {embedded} embedded{cached} '
+                 f'in chunks of {chunk_size}.')
+
+    def _embed_windowed(self, texts: list) -> np.ndarray:
+        """
+        Embeds a list of distinct, prepared sentences, splitting long
+        ones into windows that are embedded separately and pooled.
+
+        :param {list} texts - A list of non-empty str.
+        :return {np.ndarray} A (len(texts), dim) matrix, NaN for failures
+        """
+        windows = []
+        counts = []
+        for text in texts:
+            split = self._split_windows(text)
+            windows.extend(split)
+            counts.append(len(split))
+
+        # Long documents often share boilerplate, so windows are
+        # deduplicated too.
+        unique, inverse = dedupe(windows)
+        vectors = self._embed_unique(unique)[inverse]
+
+        pool = np.mean if self.pooling == 'mean' else np.max
+        result = np.full((len(texts), self.dim), np.nan, dtype=np.float32)
+        for i, rows in enumerate(np.split(vectors, np.cumsum(counts)[:-1])):
+            rows = rows[~np.isnan(rows).any(axis=1)]
+            if len(rows) > 0:
+                result[i] = pool(rows, axis=0)
+
+        return result
+
+    def _split_windows(self, text: str) -> list:
+        """
+        Splits a sentence into at most max_windows windows, each short
+        enough for the model. Anything past the last window is dropped.
+
+        :param {str} text - A non-empty str.
+        :return {list} A list of str
+        """
+        tokenizer = self.tokenizer
+        size = min(tokenizer.model_max_length, 512) - 2
+
+        # Tokenizers produce at most one token per byte, so short texts
+        # do not need to be tokenized.
+        if len(text.encode('utf-8')) <= size:
+            return [text]
+
+        # Only tokenize as much text as the windows can hold.
+        tokens = tokenizer.tokenize(text[:size * self.max_windows * 10])
+        if len(tokens) <= size:
+            return [text]
+
+        tokens = tokens[:size * self.max_windows]
+        return [tokenizer.convert_tokens_to_string(tokens[start:start + size])
+                for start in range(0, len(tokens), size)]
+
+    def _embed_unique(self, texts: list) -> np.ndarray:
+        """
+        Embeds a list of distinct, prepared sentences, using the cache
+        where possible.
+
+        :param {list} texts - A list of non-empty str.
+        :return {np.ndarray} A (len(texts), dim) matrix, NaN for failures
+        """
+        result = np.full((len(texts), self.dim), np.nan, dtype=np.float32)
+
+        # Lightweight backends are faster than a cache lookup.
+        cache = self.cache if self.backend not in LIGHTWEIGHT_BACKENDS else None
+
+        idx = list(range(len(texts)))
+        if cache is not None:
+            cached = cache.get_many(self._cache_name, texts)
+            for i, vector in zip(idx, cached):
+                if vector is not None:
+                    result[i] = vector
+            idx = [i for i, vector in zip(idx, cached) if vector is None]
+            count('cache_hits', len(texts) - len(idx))
+            count('cache_misses', len(idx))
+
+        if idx:
+            misses = [texts[i] for i in idx]
+            if self.pool is not None:
+                result[idx] = self.pool.embed(misses)
+            else:
+                result[idx] = self._embed_local(misses)
+
+        if cache is not None:
+            done = [i for i in idx if not np.isnan(result[i]).any()]
+            if done:
+                cache.put_many(self._cache_name, [texts[i] for i in done], result[done])
+
+        return result
+
+    def _embed_local(self, texts: list) -> np.ndarray:
+        """
+        Embeds a list of prepared sentences with this process's model.
+
+        :param {list} texts - A list of non-empty str.
+        :return {np.ndarray} A (len(texts), dim) matrix, NaN for failures
+        """
+        result = np.full((len(texts), self.dim), np.nan, dtype=np.float32)
+        for batch in self._batches(texts):
+            count('batches')
+            for i, vector in zip(batch, self._embed_sentences([texts[i] for i in batch])):
+                if vector is not None:
+                    result[i] = vector
+
+        return result
+
+    def close(self):
+        """
+        Closes the cache and stops any worker processes.
+        """
+        if self.cache is not None:
+            self.cache.close()
+        if self.pool is not None:
+            self.pool.close()
+
+    def _batches(self, texts: list) -> list:
+        """
+        Splits a list of sentences into batches for the model.
+
+        :param {list} texts - A list of non-empty str.
+        :return {list} A list of batches, each a list of indices
+        """
+        if self.backend in LIGHTWEIGHT_BACKENDS:
+            return [list(range(len(texts)))]
+
+        if self.max_tokens is None:
+            return [list(range(start, min(start + self.batch_size, len(texts))))
+                    for start in range(0, len(texts), self.batch_size)]
+
+        return token_budget_batches(self._token_lengths(texts), self.max_tokens)
+
+    def _token_lengths(self, texts: list) -> list:
+        """
+        Counts the tokens the model will see for each sentence,
+        including special tokens and capped at the model's maximum
+        sequence length.
+
+        :param {list} texts - A list of non-empty str.
+        """
+        tokenizer = self.tokenizer
+        limit = min(tokenizer.model_max_length, 512)
+
+        # Long texts are truncated by the model anyway, so only tokenize
+        # as much as can possibly fit.
+        return [min(len(tokenizer.tokenize(x[:limit * 10])) + 2, limit) for x in texts]
+
+    def _embed_sentences(self, texts: list) -> list:
+        """
+        Runs one forward pass over a batch of prepared sentences. If the
+        batch fails, falls back to embedding each sentence on its own so
+        that one bad input does not discard the rest.
+
+        :param {list} texts - A list of non-empty str.
+        :return {list} A list of vectors, with None for failures
+        """
         try:
-            sent = Sentence(sentence)
-            self.model.embed(sent)
-            return sent.embedding.detach().cpu().numpy()
+            if self.backend != 'flair':
+                return list(self._backend.embed(texts))
+
+            model = self.model
+            sentences = [Sentence(x) for x in texts]
+            model.batch_size = len(sentences)
+            model.embed(sentences)
+            return [s.embedding.detach().cpu().numpy() for s in sentences]
         except TypeError:
-            return None
+            if len(texts) == 1:
+                return [None]
+            return [self._embed_sentences([x])[0] for x in texts]
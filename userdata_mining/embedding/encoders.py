@@ -0,0 +1,89 @@
+import re
+import numpy as np
+from userdata_mining.embedding.backends import Backend, HashingBackend, _words
+
+
+#: Kinds of values a source can hold. Only 'text' is run through the
+#: embedding model; the others are encoded cheaply to the same length.
+KINDS = ('text', 'categorical', 'identifier', 'numeric')
+
+
+class CategoricalEncoder(HashingBackend):
+    """
+    Encodes values from a small, fixed set, such as cities or settings.
+    Each distinct value, ignoring case and spacing, gets its own fixed
+    random direction.
+    """
+
+    def __init__(self, dim: int):
+        """
+        :param {int} dim - Length of each vector.
+        """
+        super().__init__(dim, hashes=4)
+
+    def _tokens(self, text: str) -> list:
+        return [' '.join(text.lower().split())]
+
+
+class IdentifierEncoder(HashingBackend):
+    """
+    Encodes identifiers such as usernames, IP addresses and package
+    names by hashing their parts and character trigrams, so that
+    identifiers sharing a prefix, subnet or spelling end up close.
+    """
+
+    def __init__(self, dim: int):
+        """
+        :param {int} dim - Length of each vector.
+        """
+        super().__init__(dim, hashes=2)
+
+    def _tokens(self, text: str) -> list:
+        text = text.lower().strip()
+        padded = f'^{text}$'
+        return _words(text) + [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class NumericEncoder(Backend):
+    """
+    Encodes numbers with sinusoids of geometrically spaced frequencies
+    over a signed log scale, so that close values get close vectors.
+    Values that are not numbers cannot be encoded.
+    """
+
+    _NUMBER = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
+
+    def __init__(self, dim: int):
+        """
+        :param {int} dim - Length of each vector.
+        """
+        self.dim = dim
+        self.frequencies = 1. / 10. ** (np.arange((dim + 1) // 2) * 4. / max(1, (dim + 1) // 2))
+
+    def embed(self, texts: list) -> np.ndarray:
+        values = np.full(len(texts), np.nan)
+        for i, text in enumerate(texts):
+            match = self._NUMBER.search(text.replace(',', ''))
+            if match is not None:
+                values[i] = float(match.group())
+
+        scaled = (np.sign(values) * np.log1p(np.abs(values)))[:, None] * self.frequencies * 100.
+        result = np.hstack([np.sin(scaled), np.cos(scaled)])[:, :self.dim]
+        return (result / np.sqrt(self.dim / 2)).astype(np.float32)
+
+
+def get_encoder(kind: str, dim: int) -> Backend:
+    """
+    Returns an encoder for a kind of value other than text.
+
+    :param {str} kind - 'categorical', 'identifier' or 'numeric'.
+    :param {int} dim - Length of each vector.
+    """
+    if kind == 'categorical':
+        return CategoricalEncoder(dim)
+    if kind == 'identifier':
+        return IdentifierEncoder(dim)
+    if kind == 'numeric':
+        return NumericEncoder(dim)
+
+    raise ValueError(f'kind must be one of {KINDS[1:]}')
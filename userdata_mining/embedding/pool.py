@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import numpy as np
+import torch
+
+
+# The Embedding object owned by a worker process.
+_embedding = None
+
+
+def _init_worker(model: str, kwargs: dict, threads: int):
+    """
+    Loads the model once in a worker process.
+
+    :param {str} model - The model architecture.
+    :param {dict} kwargs - Keyword arguments passed to Embedding.
+    :param {int} threads - Intra-op threads for this worker.
+    """
+    from userdata_mining.embedding.embedding import Embedding
+
+    global _embedding
+    torch.set_num_threads(threads)
+    _embedding = Embedding(model=model, **kwargs)
+
+
+def _embed_shard(texts: list) -> np.ndarray:
+    """
+    Embeds a shard of distinct, prepared sentences in a worker.
+    """
+    return _embedding._embed_local(texts)
+
+
+def _dim(_) -> int:
+    return _embedding.dim
+
+
+class EmbeddingPool:
+    """
+    A pool of worker processes, each holding its own copy of a model.
+    Texts are split into shards that are embedded in parallel and
+    returned in order.
+    """
+
+    def __init__(self, model: str, workers: int, shard_size: int = 256, **kwargs):
+        """
+        Starts the workers.
+
+        :param {str} model - The model architecture.
+        :param {int} workers - Number of worker processes.
+        :param {int} shard_size - Number of sentences sent to a worker
+        at a time.
+        :param **kwargs - Keyword arguments passed to each worker's
+        Embedding. Caching is done by the parent, not the workers.
+        """
+        # Split the cores between workers so they do not oversubscribe.
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        self.workers = workers
+        self.shard_size = shard_size
+        self._pool = multiprocessing.get_context('spawn').Pool(
+            workers, initializer=_init_worker, initargs=(model, kwargs, threads))
+        self.dim = self._pool.map(_dim, [None])[0]
+
+    def embed(self, texts: list) -> np.ndarray:
+        """
+        Embeds a list of distinct, prepared sentences across the workers.
+
+        :param {list} texts - A list of non-empty str.
+        :return {np.ndarray} A (len(texts), dim) matrix, NaN for failures
+        """
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        shards = [texts[start:start + self.shard_size]
+                  for start in range(0, len(texts), self.shard_size)]
+        return np.vstack(self._pool.map(_embed_shard, shards, chunksize=1))
+
+    def close(self):
+        """
+        Stops the workers.
+        """
+        self._pool.close()
+        self._pool.join()
@@ -0,0 +1,139 @@
+import os
+import resource
+import threading
+import time
+import torch
+from flair.embeddings import TransformerDocumentEmbeddings
+from transformers import AutoConfig, AutoTokenizer
+from userdata_mining.embedding.backends import Backend, ExportedBackend, HashingBackend
+from userdata_mining.embedding.backends import TfidfBackend, StaticVectorBackend
+from userdata_mining.utils import info
+
+
+# Models loaded in this process, keyed by source (and backend or
+# quantization, if any), and embedding lengths and tokenizers loaded
+# without their models, keyed by source.
+_models = {}
+_dims = {}
+_tokenizers = {}
+_lock = threading.Lock()
+
+
+def _resolve(model: str, model_dir: str = None) -> str:
+    """
+    Returns where to load a model from: <model_dir>/<model> if that
+    exists, otherwise the model name itself.
+
+    :param {str} model - The model name.
+    :param {str} model_dir - A directory of locally saved models.
+    """
+    if model_dir is not None and os.path.exists(f'{model_dir}/{model}'):
+        return f'{model_dir}/{model}'
+    return model
+
+
+def get_model(model: str, model_dir: str = None,
+              quantize: str = None) -> TransformerDocumentEmbeddings:
+    """
+    Returns the process-wide instance of a model, loading it on first
+    use. The load time and memory are reported once.
+
+    :param {str} model - The model name.
+    :param {str} model_dir - A directory of locally saved models, so
+    that loading does not need the network.
+    :param {str} quantize - If 'int8', the linear layers of the model
+    are dynamically quantized.
+    """
+    source = _resolve(model, model_dir)
+    key = source if quantize is None else (source, quantize)
+    with _lock:
+        if key not in _models:
+            start = time.perf_counter()
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            if quantize is None:
+                _models[key] = TransformerDocumentEmbeddings(source)
+            else:
+                # Quantized in place, so that the float weights are
+                # not kept alongside the int8 ones.
+                _models[key] = torch.quantization.quantize_dynamic(
+                    TransformerDocumentEmbeddings(source), {torch.nn.Linear},
+                    dtype=torch.qint8, inplace=True)
+
+            elapsed = time.perf_counter() - start
+            memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+            name = model if quantize is None else f'{model} ({quantize})'
+            info(f'Loaded {name} from {source} in {elapsed:.1f}s ({memory:.0f} MB).')
+
+        return _models[key]
+
+
+def get_backend(model: str, backend: str, model_dir: str = None,
+                export_dir: str = 'saved/models') -> Backend:
+    """
+    Returns the process-wide instance of a backend other than flair,
+    loading it on first use.
+
+    :param {str} model - The model name. For 'static', the name of the
+    word vectors file. Ignored by 'hashing' and 'tfidf'.
+    :param {str} backend - 'onnx', 'torchscript', 'hashing', 'tfidf'
+    or 'static'.
+    :param {str} model_dir - A directory of locally saved models.
+    :param {str} export_dir - Directory for exported artifacts.
+    """
+    source = _resolve(model, model_dir)
+    key = (source, backend)
+    with _lock:
+        if key not in _models:
+            start = time.perf_counter()
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            if backend == 'hashing':
+                _models[key] = HashingBackend()
+            elif backend == 'tfidf':
+                _models[key] = TfidfBackend()
+            elif backend == 'static':
+                _models[key] = StaticVectorBackend(source)
+            else:
+                _models[key] = ExportedBackend(source, backend, export_dir)
+
+            elapsed = time.perf_counter() - start
+            memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss) / 1024
+            info(f'Loaded {model} ({backend}) from {source} in {elapsed:.1f}s ({memory:.0f} MB).')
+
+        return _models[key]
+
+
+def get_dim(model: str, model_dir: str = None) -> int:
+    """
+    Returns the embedding length of a model from its config, without
+    loading its weights.
+
+    :param {str} model - The model name.
+    :param {str} model_dir - A directory of locally saved models.
+    """
+    source = _resolve(model, model_dir)
+    if source in _models:
+        return _models[source].embedding_length
+
+    if source not in _dims:
+        _dims[source] = AutoConfig.from_pretrained(source).hidden_size
+    return _dims[source]
+
+
+def get_tokenizer(model: str, model_dir: str = None):
+    """
+    Returns the tokenizer of a model without loading its weights, for
+    processes that do not run the model themselves. If the model is
+    loaded in this process, its own tokenizer is returned.
+
+    :param {str} model - The model name.
+    :param {str} model_dir - A directory of locally saved models.
+    """
+    source = _resolve(model, model_dir)
+    if source in _models:
+        return _models[source].tokenizer
+
+    if source not in _tokenizers:
+        _tokenizers[source] = AutoTokenizer.from_pretrained(source)
+    return _tokenizers[source]
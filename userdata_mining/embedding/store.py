@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+from collections.abc import Mapping
+
+
+def _npy_header(shape: tuple, dtype, length: int = None) -> bytes:
+    """
+    Builds a version 1.0 .npy header.
+
+    :param {tuple} shape - The array shape.
+    :param dtype - The array dtype.
+    :param {int} length - If given, pads the header to this many bytes.
+    :return {bytes} The header
+    """
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (
+        np.lib.format.dtype_to_descr(np.dtype(dtype)), tuple(shape))
+
+    if length is None:
+        # Magic string, version, header length, header, newline; the
+        # total must be a multiple of 64.
+        length = 10 + len(header) + 1
+        length += -length % 64
+
+    header = header.ljust(length - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + np.uint16(len(header)).tobytes() + header.encode('latin1')
+
+
+class NpyWriter:
+    """
+    Writes a 2D array to a .npy file one chunk of rows at a time, so the
+    whole array never has to be in memory. The file is written under a
+    temporary name and only moved into place by close().
+    """
+
+    def __init__(self, path: str, dim: int, dtype=np.float32):
+        """
+        Opens the file for writing.
+
+        :param {str} path - Path to the .npy file.
+        :param {int} dim - Number of columns.
+        :param dtype - The array dtype.
+        """
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+
+        # Reserve room for the largest header the final shape could need.
+        self._header_length = len(_npy_header((2 ** 63, dim), self.dtype))
+        self._file = open(f'{path}.tmp', 'wb')
+        self._file.write(_npy_header((0, dim), self.dtype, self._header_length))
+
+    def write(self, rows):
+        """
+        Appends rows to the array.
+
+        :param {np.ndarray} rows - A (n, dim) matrix.
+        """
+        rows = np.ascontiguousarray(rows, dtype=self.dtype).reshape(-1, self.dim)
+        self._file.write(rows.tobytes())
+        self.rows += rows.shape[0]
+
+    def close(self):
+        """
+        Writes the final shape into the header and moves the file into
+        place.
+        """
+        self._file.seek(0)
+        self._file.write(_npy_header((self.rows, self.dim), self.dtype, self._header_length))
+        self._file.close()
+        os.replace(f'{self.path}.tmp', self.path)
+
+
+QUANTIZATIONS = (None, 'float16', 'int8')
+
+
+def to_matrix(embeddings):
+    """
+    Converts the embeddings of a source to one contiguous matrix and a
+    validity mask.
+
+    :param embeddings - A (n, dim) matrix with NaN rows for missing
+    embeddings, or a list of vectors and None.
+    :return {tuple} A float32 (n, dim) matrix with zeros for missing
+    rows, and a boolean mask that is True for valid rows
+    """
+    if not isinstance(embeddings, np.ndarray):
+        embeddings = list(embeddings)
+        dim = next((len(x) for x in embeddings if x is not None), 0)
+        embeddings = np.array([x if x is not None else np.full(dim, np.nan) for x in embeddings],
+                              dtype=np.float32).reshape(len(embeddings), dim)
+
+    matrix = np.array(embeddings, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), -1) if matrix.size else np.empty((0, 0), np.float32)
+
+    mask = ~np.isnan(matrix).any(axis=1)
+    matrix[~mask] = 0.
+    return matrix, mask
+
+
+def save_embeddings(path: str, embeddings, quantize: str = None):
+    """
+    Saves the embeddings of a source as <path>.npy, along with a
+    validity mask (<path>.mask.npy) and, for int8, per-row scales
+    (<path>.scale.npy).
+
+    :param {str} path - Path to save to, without an extension.
+    :param embeddings - A (n, dim) matrix with NaN rows for missing
+    embeddings, or a list of vectors and None.
+    :param {str} quantize - None to store float32, 'float16', or 'int8'
+    to store each row as int8 with a float32 scale.
+    """
+    if quantize not in QUANTIZATIONS:
+        raise ValueError(f'quantize must be one of {QUANTIZATIONS}')
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    matrix, mask = to_matrix(embeddings)
+
+    if quantize == 'float16':
+        matrix = matrix.astype(np.float16)
+    elif quantize == 'int8':
+        scale = np.abs(matrix).max(axis=1, initial=0.) / 127.
+        scale[scale == 0] = 1.
+        matrix = np.round(matrix / scale[:, None]).astype(np.int8)
+        np.save(f'{path}.scale.npy', scale.astype(np.float32))
+
+    # The matrix is written last, since its existence marks the source
+    # as cached.
+    np.save(f'{path}.mask.npy', mask)
+    np.save(f'{path}.npy', matrix)
+
+
+def append_embeddings(path: str, embeddings):
+    """
+    Appends rows to unquantized embeddings saved by save_embeddings or
+    NpyWriter. The rows are written in place when the .npy header has
+    room for the new shape, and the file is rewritten otherwise.
+
+    :param {str} path - Path the embeddings were saved to, without an
+    extension.
+    :param embeddings - A (n, dim) matrix with NaN rows for missing
+    embeddings, or a list of vectors and None.
+    """
+    matrix, mask = to_matrix(embeddings)
+    if len(matrix) == 0:
+        return
+
+    with open(f'{path}.npy', 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype != np.float32 or fortran_order or len(shape) != 2:
+        raise ValueError(f'{path}.npy is not an unquantized embedding matrix.')
+    if matrix.shape[1] != shape[1]:
+        raise ValueError(f'Cannot append {matrix.shape[1]}-d rows to {shape[1]}-d embeddings.')
+
+    if os.path.exists(f'{path}.mask.npy') or not mask.all():
+        if os.path.exists(f'{path}.mask.npy'):
+            old_mask = np.load(f'{path}.mask.npy')
+        else:
+            old_mask = np.ones(shape[0], dtype=bool)
+        np.save(f'{path}.mask.npy', np.concatenate([old_mask, mask]))
+
+    rows = shape[0] + len(matrix)
+    if version == (1, 0) and len(_npy_header((rows, shape[1]), dtype)) <= offset:
+        with open(f'{path}.npy', 'r+b') as f:
+            f.seek(offset + shape[0] * shape[1] * dtype.itemsize)
+            f.write(matrix.tobytes())
+            f.truncate()
+
+            # The shape is updated last, so an interrupted append leaves
+            # the old rows readable.
+            f.seek(0)
+            f.write(_npy_header((rows, shape[1]), dtype, offset))
+        return
+
+    old = np.load(f'{path}.npy', mmap_mode='r')
+    writer = NpyWriter(f'{path}.npy', shape[1])
+    for start in range(0, len(old), 65536):
+        writer.write(old[start:start + 65536])
+    writer.write(matrix)
+    writer.close()
+
+
+def truncate_embeddings(path: str, rows: int):
+    """
+    Drops the rows after the first few of unquantized embeddings saved
+    by save_embeddings or NpyWriter, such as rows appended by a run that
+    was interrupted before it could record them.
+
+    :param {str} path - Path the embeddings were saved to, without an
+    extension.
+    :param {int} rows - Number of rows to keep.
+    """
+    with open(f'{path}.npy', 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+        if version != (1, 0) or fortran_order or len(shape) != 2:
+            raise ValueError(f'{path}.npy is not an unquantized embedding matrix.')
+
+        if rows < shape[0]:
+            f.seek(0)
+            f.write(_npy_header((rows, shape[1]), dtype, offset))
+            f.truncate(offset + rows * shape[1] * dtype.itemsize)
+
+    if os.path.exists(f'{path}.mask.npy'):
+        mask = np.load(f'{path}.mask.npy')
+        if len(mask) > rows:
+            np.save(f'{path}.mask.npy', mask[:rows])
+
+
+def load_embeddings(path: str, mmap_mode: str = None) -> np.ndarray:
+    """
+    Loads embeddings saved by save_embeddings or NpyWriter.
+
+    :param {str} path - Path the embeddings were saved to, without an
+    extension.
+    :param {str} mmap_mode - Passed to np.load. Unquantized sources
+    without missing rows stay memory-mapped.
+    :return {np.ndarray} A float32 (n, dim) matrix, with NaN for
+    missing rows
+    """
+    matrix = np.load(f'{path}.npy', mmap_mode=mmap_mode)
+
+    if matrix.dtype == np.int8:
+        scale = np.load(f'{path}.scale.npy')
+        matrix = matrix * scale[:, None]
+    elif matrix.dtype != np.float32:
+        matrix = matrix.astype(np.float32)
+
+    if os.path.exists(f'{path}.mask.npy'):
+        mask = np.load(f'{path}.mask.npy')
+        if not mask.all():
+            matrix = np.array(matrix, dtype=np.float32)
+            matrix[~mask] = np.nan
+
+    return matrix
+
+
+def _slug(name: str) -> str:
+    """
+    Turns a source name into a file name. Names that differ only in case
+    or punctuation get different files, since a short hash of the name
+    is appended.
+    """
+    slug = re.sub(r'\W+', '_', name.lower()).strip('_')
+    return f'{slug}_{hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]}'
+
+
+def save_profile(path: str, profile: dict, quantize: str = None, state: dict = None):
+    """
+    Saves a merged profile, as returned by the miners, to a directory
+    with one set of files per source and an index.json, which maps
+    source names to their files. Values that are not embeddings, such as
+    the travel estimate, and sources that are None are kept in the index.
+
+    :param {str} path - The profile directory.
+    :param {dict} profile - Source names mapped to embeddings or scalars.
+    :param {str} quantize - Passed to save_embeddings.
+    :param {dict} state - What the profile was mined from, such as the
+    miners' state(). Kept in the index as Profile.state, so that a stale
+    profile can be told apart. Must be JSON-serializable.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    index = {'sources': {}, 'values': {}, 'state': state}
+    for name, value in profile.items():
+        if value is None:
+            index['values'][name] = None
+        elif np.isscalar(value):
+            index['values'][name] = float(value)
+        else:
+            index['sources'][name] = _slug(name)
+            save_embeddings(f'{path}/{_slug(name)}', value, quantize)
+
+    with open(f'{path}/index.json', 'w') as f:
+        json.dump(index, f, indent=2)
+
+
+class Profile(Mapping):
+    """
+    A profile saved by save_profile. Sources are memory-mapped and
+    loaded the first time they are accessed, so reading one source does
+    not touch the others.
+    """
+
+    def __init__(self, path: str, mmap_mode: str = 'r'):
+        """
+        Opens the profile index.
+
+        :param {str} path - The profile directory.
+        :param {str} mmap_mode - Passed to np.load. If None, sources are
+        read into memory when accessed.
+        """
+        with open(f'{path}/index.json', 'r') as f:
+            index = json.load(f)
+
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self._sources = index['sources']
+        self._values = index['values']
+        self.state = index.get('state')
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name in self._values:
+            return self._values[name]
+
+        if name not in self._loaded:
+            self._loaded[name] = load_embeddings(f'{self.path}/{self._sources[name]}',
+                                                 mmap_mode=self.mmap_mode)
+        return self._loaded[name]
+
+    def __iter__(self):
+        yield from self._sources
+        yield from self._values
+
+    def __len__(self):
+        return len(self._sources) + len(self._values)
+
+
+def load_profile(path: str, mmap_mode: str = 'r') -> Profile:
+    """
+    Opens a profile saved by save_profile. No embeddings are read until
+    a source is accessed.
+
+    :param {str} path - The profile directory.
+    :param {str} mmap_mode - Passed to np.load.
+    :return {Profile} Source names mapped to embeddings or scalars
+    """
+    return Profile(path, mmap_mode)
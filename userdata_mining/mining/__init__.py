@@ -14,4 +14,8 @@ from userdata_mining.mining.google_pay import *
 from userdata_mining.mining.access_log import *
 from userdata_mining.mining.facebook import *
 from userdata_mining.mining.instagram import *
+from userdata_mining.mining.manifest import *
+from userdata_mining.mining.sources import *
+from userdata_mining.mining.planner import *
 from userdata_mining.mining.miner import *
+from userdata_mining.mining.batch import *
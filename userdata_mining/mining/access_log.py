@@ -15,10 +15,6 @@ def parse_access_log_data(user, data_path='.'):
     Returns:
         list: A list of IP addresses used to access Google services by the user
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/access.pickle'):
-        return None
-
     path = f'{data_path}/data/{user}/Takeout/Access Log Activity/Activities - A list of Google services accessed by.csv'
 
     # Does the directory exist?
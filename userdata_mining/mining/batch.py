@@ -0,0 +1,176 @@
+import json
+import os
+import time
+import torch
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from userdata_mining.embedding import load_profile, save_profile
+from userdata_mining.mining.miner import DataMiner, FbInstaDataMiner, GoogleDataMiner
+from userdata_mining.mining.planner import load_throughput, longest_first, plan_user
+from userdata_mining.utils import get_usernames, info, warn
+
+
+def _init_worker(threads: int):
+    """
+    Sets up a batch worker process. The model is not loaded here: the
+    first user mined by the worker loads it, and every later user reuses
+    it.
+
+    :param {int} threads - Intra-op threads for this worker.
+    """
+    torch.set_num_threads(threads)
+
+
+def get_profile_path(user: str, data_path='.', fast=False) -> str:
+    """
+    Returns the directory a user's merged profile is saved to.
+
+    :param {str} user - The user directory.
+    :param {str} data_path - Path to the data/ folder.
+    :param {bool} fast - Whether the profile was mined in fast mode.
+    """
+    return f'{data_path}/saved/profiles/{user}' + ('-fast' if fast else '')
+
+
+def _miners(user: str, data_path='.', fast=False, per_user=True, **miner_kwargs) -> list:
+    """
+    Creates the Google, Facebook and Instagram miners of one user.
+    """
+    return [miner(data_path=data_path, user=user, fast=fast, per_user=per_user, **miner_kwargs)
+            for miner in (GoogleDataMiner, FbInstaDataMiner)]
+
+
+def get_profile_state(miners: list, profile_quantize: str = None) -> dict:
+    """
+    Describes what a profile mined by some miners depends on: the input
+    files and configuration of each of their sources, and how the
+    profile is stored. Round-tripped through JSON, so that it compares
+    equal to the state saved with the profile.
+
+    :param {list} miners - The miners.
+    :param {str} profile_quantize - The storage type of the profile.
+    """
+    sources = {}
+    for miner in miners:
+        sources.update(miner.state())
+    return json.loads(json.dumps({'quantize': profile_quantize, 'sources': sources}))
+
+
+def is_profile_fresh(path: str, state: dict) -> bool:
+    """
+    Returns whether a profile is saved at path and was mined from the
+    given state, so that it can be used without mining again.
+
+    :param {str} path - The profile directory.
+    :param {dict} state - As returned by get_profile_state.
+    """
+    return os.path.exists(f'{path}/index.json') and load_profile(path).state == state
+
+
+def mine_user(user: str, data_path='.', fast=False, profile_quantize: str = None,
+              per_user=True, **miner_kwargs) -> str:
+    """
+    Mines the Google, Facebook and Instagram data of one user and saves
+    the merged profile. If the profile was saved from the same input
+    files and configuration, it is kept as is. Otherwise the miners are
+    run; sources whose embeddings are still fresh are loaded from their
+    caches rather than embedded again.
+
+    :param {str} user - The user directory.
+    :param {str} data_path - Path to the data/ folder.
+    :param {bool} fast - Passed to the miners.
+    :param {str} profile_quantize - Storage type of the profile, passed
+    to save_profile as quantize.
+    :param {bool} per_user - If True, embeddings are cached under
+    saved/embeddings/<user>. Passed to the miners.
+    :param **miner_kwargs - Other options passed to the miners, including
+    quantize for the model.
+    :return {str} The profile directory
+    """
+    miners = _miners(user, data_path, fast, per_user, **miner_kwargs)
+    path = get_profile_path(user, data_path, fast)
+    state = get_profile_state(miners, profile_quantize)
+    if is_profile_fresh(path, state):
+        info(f'{user}: profile at {path} is up to date.')
+        return path
+
+    profile = {}
+    for miner in miners:
+        profile.update(miner.mine_data())
+
+    save_profile(path, profile, quantize=profile_quantize, state=state)
+    return path
+
+
+def mine_users(data_path='.', users: list = None, workers: int = None, fast=False,
+               profile_quantize: str = None, benchmark: str = None, **miner_kwargs) -> dict:
+    """
+    Mines every user in data/ with one pool of worker processes. Users
+    are planned first and queued longest first, and each is mined by the
+    next free worker, so a few large exports do not hold up the rest. A
+    worker loads the model once and keeps it for every user it mines,
+    and each user's results are written to their own directories. Users
+    whose profile was saved from their current input files and
+    configuration are skipped.
+
+    Within a worker, sources are parsed and embedded one at a time: the
+    parallelism is across users.
+
+    :param {str} data_path - Path to the data/ folder.
+    :param {list} users - The users to mine. If None, every user in
+    data/ is mined.
+    :param {int} workers - Number of worker processes. If None, one per
+    core.
+    :param {bool} fast - Passed to the miners.
+    :param {str} profile_quantize - Passed to mine_user.
+    :param {str} benchmark - A benchmark_suite report, used with earlier
+    run reports to project each user's mining time. See load_throughput.
+    :param **miner_kwargs - Other options passed to the miners, such as
+    model_dir, backend or quantize.
+    :return {dict} Users mapped to their profile directories, or to None
+    if mining them failed
+    """
+    if users is None:
+        users = get_usernames(data_path)
+
+    profiles = {}
+    todo = []
+    for user in users:
+        path = get_profile_path(user, data_path, fast)
+        state = get_profile_state(_miners(user, data_path, fast, **miner_kwargs),
+                                  profile_quantize)
+        if is_profile_fresh(path, state):
+            profiles[user] = path
+        else:
+            todo.append(user)
+
+    info(f'Mining {len(todo)} user(s); {len(users) - len(todo)} already mined.')
+    if not todo:
+        return profiles
+
+    throughput = load_throughput(data_path, benchmark,
+                                 miner_kwargs.get('model', 'bert-base-uncased'))
+    todo = [x['user'] for x in longest_first([plan_user(x, data_path, throughput)
+                                              for x in todo])]
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    miner_kwargs = {**miner_kwargs, 'parse_workers': 0, 'workers': 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(workers, mp_context=DataMiner._process_context(),
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = {pool.submit(mine_user, x, data_path, fast, profile_quantize,
+                               **miner_kwargs): x
+                   for x in todo}
+
+        for future in as_completed(futures):
+            user = futures[future]
+            try:
+                profiles[user] = future.result()
+                info(f'{user}: profile saved to {profiles[user]}.')
+            except Exception as e:
+                warn(f'{user}: mining failed: {e!r}')
+                profiles[user] = None
+
+    info(f'Mined {len(todo)} user(s) with {workers} worker(s) in '
+         f'{time.perf_counter() - start:.1f}s.')
+    return {x: profiles[x] for x in users}
@@ -3,7 +3,8 @@ import os
 import googlemaps
 import ast
 
-from userdata_mining.utils import get_key, warn
+from userdata_mining.utils import get_cache_path, get_key, warn
+from userdata_mining.utils.instrumentation import count
 from userdata_mining.mining.maps import get_nearby_places
 
 
@@ -15,8 +16,9 @@ def parse_autofill(user, data_path='.'):
     :return {list} A list of places nearby
     """
     # Check for a cache
-    if os.path.exists('caches/.autofill.cache'):
-        with open('caches/.autofill.cache', 'r') as f:
+    cache = get_cache_path('autofill', user, data_path)
+    if os.path.exists(cache):
+        with open(cache, 'r') as f:
             # Safe evaluation with ast
             result = ast.literal_eval(f.readline())
 
@@ -45,11 +47,12 @@ def parse_autofill(user, data_path='.'):
     places = []
     for address in addresses:
         coords = client.geocode(address=address)
+        count('api_calls')
         coords = list(coords[0]['geometry']['location'].values())
         places.extend(get_nearby_places(coords))
 
     # Save to cache
-    with open('caches/.autofill.cache', 'w') as f:
+    with open(cache, 'w') as f:
         f.write(str(places))
 
     return places
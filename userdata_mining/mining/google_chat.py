@@ -16,10 +16,6 @@ def parse_chats_data(user, data_path='.'):
     Returns:
         list: A list of chats.
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/chat.pickle'):
-        return None
-
     path = f'{data_path}/data/{user}/Takeout/Google Chat/Groups'
 
     # Does the directory exist?
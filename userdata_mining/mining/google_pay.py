@@ -15,10 +15,6 @@ def parse_pay_data(user, data_path='.'):
     Returns:
         list: A list of Google Pay purchase descriptions.
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/pay.pickle'):
-        return None
-
     path = f'{data_path}/data/{user}/Takeout/Google Pay/Google transactions/transactions_*.csv'
 
     # Does the directory exist?
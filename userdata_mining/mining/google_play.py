@@ -15,10 +15,6 @@ def parse_play_data(user, library_type, data_path='.'):
     Returns:
         list: A list of apps downloaded.
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/play.pickle'):
-        return None
-
     path = f'{data_path}/data/{user}/Takeout/Google Play Store/Library.json'
 
     # Does the directory exist?
@@ -4,32 +4,39 @@ import numpy as np
 from userdata_mining.utils import warn
 
 
-def parse_hangouts_data(user, data_path='.'):
+def parse_hangouts_data(user, data_path='.', lazy=False):
     """
     Mines a user's Hangouts messages. While it is possible to mine the user's
     (or, the people the user is speaking to) data selectively, we do not
-    do that distinction here. If cache exists, returns None.
+    do that distinction here.
 
     :param {str} user - The user directory.
     :param {str} data_path - Path to the data/ directory, NOT ending in a /.
+    :param {bool} lazy - If True, returns a generator that yields one
+    conversation's messages at a time instead of a list.
     :return {list} user messages
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/hangouts.pickle'):
-        return None
-
     # Does the directory exist?
     path = f'{data_path}/data/{user}/Takeout/Hangouts/Hangouts.json'
     if not os.path.exists(path):
         warn('Hangouts data path does not exist.')
         return []
 
+    messages = _iter_hangouts(path)
+    return messages if lazy else list(messages)
+
+
+def _iter_hangouts(path):
+    """
+    Yields the messages in a Hangouts.json file.
+
+    :param {str} path - Path to Hangouts.json.
+    """
     with open(path, 'r') as f:
         data = json.load(f)
 
     # The conversation key only has metadata, skip it.
-    conversations = [x['events'] for x in data['conversations']]
-    messages = []
+    conversations = (x['events'] for x in data['conversations'])
 
     for conversation in conversations:
         content = [x['chat_message']['message_content'].get('segment', [{'type': 'foo'}])
@@ -40,7 +47,4 @@ def parse_hangouts_data(user, data_path='.'):
 
         if segments.shape[0] > 1:
             segments = segments.squeeze()
-        messages.extend(segments)
-
-    # Return the messages.
-    return messages
+        yield from segments
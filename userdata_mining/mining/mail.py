@@ -109,18 +109,16 @@ class GmailMboxMessage():
         return msg_text
 
 
-def parse_mail_data(user, data_path='.'):
+def parse_mail_data(user, data_path='.', lazy=False):
     """
-    Parses a user's email data in mbox format. If cache exists, returns None.
+    Parses a user's email data in mbox format.
 
     :param {str} user - The user directory.
     :param {str} data_path - Path to the data/ directory, without the trailing /.
+    :param {bool} lazy - If True, returns a generator that parses one
+    message at a time instead of a list.
     :return {list} A list of messages
     """
-    # First, check for cache
-    if os.path.exists(f'{data_path}/saved/embeddings/mail.pickle'):
-        return None
-
     path = f'{data_path}/data/{user}/Takeout/Mail/All mail Including Spam and Trash.mbox'
 
     # Check if path exists
@@ -128,12 +126,19 @@ def parse_mail_data(user, data_path='.'):
         warn('Mail path does not exist.')
         return []
 
+    messages = _iter_mail(path)
+    return messages if lazy else list(messages)
+
+
+def _iter_mail(path):
+    """
+    Yields the text of each message in an mbox file.
+
+    :param {str} path - Path to the mbox file.
+    """
     box = mailbox.mbox(path)
-    messages = []
     for message in box:
         message_obj = GmailMboxMessage(message)
         parsed_mail = message_obj.parse_email()
         if parsed_mail != [] and not re.match('\s+', parsed_mail):
-            messages.append(parsed_mail)
-
-    return messages
+            yield parsed_mail
@@ -0,0 +1,291 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from userdata_mining.embedding import NpyWriter, append_embeddings, truncate_embeddings
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 hex digest of a file, read in blocks.
+
+    :param {str} path - Path to the file.
+    :param {int} block_size - Bytes read at a time.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def match_files(base: str, patterns: list) -> list:
+    """
+    Returns the files matching a source's input patterns.
+
+    :param {str} base - The directory patterns are relative to.
+    :param {list} patterns - Glob patterns, as in Source.inputs.
+    :return {list} Sorted paths, including base
+    """
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(f'{glob.escape(base)}/{pattern}', recursive=True))
+
+    return sorted(x for x in files if os.path.isfile(x))
+
+
+def stat_files(base: str, patterns: list) -> dict:
+    """
+    Describes the files matching a source's input patterns by their
+    size and mtime only, without reading them.
+
+    :param {str} base - The directory patterns are relative to.
+    :param {list} patterns - Glob patterns, as in Source.inputs.
+    :return {dict} Paths relative to base, mapped to [size, mtime]
+    """
+    result = {}
+    for file in match_files(base, patterns):
+        stat = os.stat(file)
+        result[os.path.relpath(file, base)] = [stat.st_size, stat.st_mtime]
+
+    return result
+
+
+def _contents(inputs: dict) -> dict:
+    """
+    Returns the size and hash of each input file, leaving out mtimes.
+    """
+    return {key: (value['size'], value['sha256']) for key, value in inputs.items()}
+
+
+class Manifest:
+    """
+    Records, for each cached source, the input files it was parsed from
+    (size, mtime and content hash) and the configuration it was embedded
+    with. A cache is stale once either differs from the current run.
+
+    Files are only hashed when their size or mtime has changed since
+    they were last seen, so checking an unchanged export costs one stat
+    per file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Loads the manifest, or starts an empty one.
+
+        :param {str} path - Path to the manifest JSON file.
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+
+        # Hashes of files seen so far, keyed by path, with the size and
+        # mtime they were hashed at.
+        self._stats = {}
+        for entry in self.entries.values():
+            self._stats.update(entry['inputs'])
+
+    def fingerprint(self, base: str, patterns: list) -> dict:
+        """
+        Describes the files matching a source's input patterns.
+
+        :param {str} base - The directory patterns are relative to.
+        :param {list} patterns - Glob patterns, as in Source.inputs.
+        :return {dict} Paths relative to base, mapped to their size,
+        mtime and sha256
+        """
+        result = {}
+        for file in match_files(base, patterns):
+            name = os.path.relpath(file, base)
+            stat = os.stat(file)
+            known = self._stats.get(name)
+            if known is not None and known['size'] == stat.st_size and \
+                    known['mtime'] == stat.st_mtime:
+                result[name] = known
+            else:
+                result[name] = {'size': stat.st_size, 'mtime': stat.st_mtime,
+                                'sha256': hash_file(file)}
+                self._stats[name] = result[name]
+
+        return result
+
+    def is_fresh(self, name: str, inputs: dict, config: dict) -> bool:
+        """
+        Returns whether a cache was built from the same inputs and
+        configuration. Files that were only touched (same contents,
+        new mtime) count as unchanged.
+
+        :param {str} name - The cache name.
+        :param {dict} inputs - As returned by fingerprint.
+        :param {dict} config - Anything else the cache depends on, such
+        as the model and parser version. Must be JSON-serializable.
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry['config'] != config:
+            return False
+
+        if _contents(entry['inputs']) != _contents(inputs):
+            return False
+
+        if entry['inputs'] != inputs:
+            # Keep the new mtimes, so the files are not hashed again.
+            self.record(name, inputs, config, entry.get('rows'))
+        return True
+
+    def record(self, name: str, inputs: dict, config: dict, rows: int = None):
+        """
+        Records that a cache was built, and saves the manifest.
+
+        :param {str} name - The cache name.
+        :param {dict} inputs - As returned by fingerprint.
+        :param {dict} config - As passed to is_fresh.
+        :param {int} rows - Number of rows in the cache, so that a cache
+        left half-written by an interrupted run can be told apart.
+        """
+        self.entries[name] = {'inputs': inputs, 'config': config, 'rows': rows}
+        self.save()
+
+    def save(self):
+        """
+        Writes the manifest to disk. The file is replaced atomically, so
+        an interrupted run leaves the previous manifest intact.
+        """
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        with open(f'{self.path}.tmp', 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(f'{self.path}.tmp', self.path)
+
+
+class RecordKeys:
+    """
+    Gives each record of an append-only source a stable key, and picks
+    out the records that were not in a previous export. Parsers return
+    records without timestamps, so a key is a hash of the record and
+    of how many identical records came before it: a record that shows
+    up once more in a new export gets a new key.
+    """
+
+    def __init__(self, known=None):
+        """
+        :param known - Keys of the records already embedded, or None if
+        every record is new.
+        """
+        self.known = None if known is None else set(int(x) for x in known)
+        self.keys = []
+        self._counts = {}
+
+    def filter(self, records):
+        """
+        Keys records, and yields those whose keys are not known.
+
+        :param {Iterable} records - The parsed records of the source.
+        """
+        for record in records:
+            digest = hashlib.blake2b(str(record).encode('utf-8', 'replace'),
+                                     digest_size=8).digest()
+            count = self._counts.get(digest, 0)
+            self._counts[digest] = count + 1
+
+            key = int.from_bytes(hashlib.blake2b(digest + count.to_bytes(8, 'little'),
+                                                 digest_size=8).digest(), 'little')
+            self.keys.append(key)
+            if self.known is None or key not in self.known:
+                yield record
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether every known record was seen again, i.e. the new export
+        only added records to the previous one.
+        """
+        return self.known is None or self.known.issubset(self.keys)
+
+
+class Checkpoint:
+    """
+    Saves the embeddings of a source one chunk at a time to
+    <path>.partial, and after each chunk writes to a journal how many
+    records are done. If a run is interrupted, the next one resumes
+    after the last chunk in the journal, as long as the source's inputs
+    and configuration have not changed. commit() moves the finished
+    embeddings to <path>.
+    """
+
+    def __init__(self, path: str, dim: int, inputs: dict, config: dict):
+        """
+        Resumes the journal of an interrupted run, or starts a new one.
+
+        :param {str} path - Path to save the embeddings to, without an
+        extension.
+        :param {int} dim - Number of columns.
+        :param {dict} inputs - As returned by Manifest.fingerprint.
+        :param {dict} config - As passed to Manifest.is_fresh.
+        """
+        self.path = path
+        self.partial = f'{path}.partial'
+        self.journal = f'{path}.journal.json'
+        self.inputs = inputs
+        self.config = config
+        self.items = 0
+        self.rows = 0
+
+        state = None
+        if os.path.exists(self.journal) and os.path.exists(f'{self.partial}.npy'):
+            with open(self.journal, 'r') as f:
+                state = json.load(f)
+
+        # Rows past the journal were written after the last chunk was
+        # recorded; fewer rows than the journal means the file was lost.
+        if state is not None and state['config'] == config and \
+                _contents(state['inputs']) == _contents(inputs) and \
+                len(np.load(f'{self.partial}.npy', mmap_mode='r')) >= state['rows']:
+            truncate_embeddings(self.partial, state['rows'])
+            self.items = state['items']
+            self.rows = state['rows']
+            return
+
+        if os.path.exists(f'{self.partial}.mask.npy'):
+            os.remove(f'{self.partial}.mask.npy')
+        NpyWriter(f'{self.partial}.npy', dim).close()
+        self._save()
+
+    def _save(self):
+        """
+        Writes the journal. The file is replaced atomically.
+        """
+        with open(f'{self.journal}.tmp', 'w') as f:
+            json.dump({'inputs': self.inputs, 'config': self.config,
+                       'items': self.items, 'rows': self.rows}, f)
+        os.replace(f'{self.journal}.tmp', self.journal)
+
+    def write(self, matrix, items: int):
+        """
+        Appends a chunk of embeddings and records it in the journal.
+
+        :param {np.ndarray} matrix - The embedded chunk.
+        :param {int} items - Number of records the chunk was embedded
+        from, which may be more than its rows if failed rows were
+        dropped.
+        """
+        append_embeddings(self.partial, matrix)
+        self.items += items
+        self.rows += len(matrix)
+        self._save()
+
+    def commit(self):
+        """
+        Moves the finished embeddings into place and deletes the journal.
+        """
+        if os.path.exists(f'{self.partial}.mask.npy'):
+            os.replace(f'{self.partial}.mask.npy', f'{self.path}.mask.npy')
+        elif os.path.exists(f'{self.path}.mask.npy'):
+            os.remove(f'{self.path}.mask.npy')
+
+        os.replace(f'{self.partial}.npy', f'{self.path}.npy')
+        os.remove(self.journal)
@@ -1,4 +1,5 @@
-from userdata_mining.utils import get_key
+from userdata_mining.utils import get_cache_path, get_key
+from userdata_mining.utils.instrumentation import count
 import os
 import json
 import googlemaps
@@ -16,6 +17,7 @@ def get_maps_distance(coords):
     client = googlemaps.Client(key=api_key)
     distances = client.distance_matrix(origins=coords, destinations=coords,
                                        units='metric')
+    count('api_calls')
 
     # Add up all the distances
     dist = list(map(
@@ -40,6 +42,7 @@ def get_nearby_places(coords):
     maps_res = client.places_nearby(location=coords,
                                     radius=3000,
                                     max_price=2)
+    count('api_calls')
 
     token = maps_res.get('next_page_token', None)
     places.extend([x['name'] for x in maps_res['results']])
@@ -48,6 +51,7 @@ def get_nearby_places(coords):
                                         radius=3000,
                                         max_price=2,
                                         page_token=token)
+        count('api_calls')
         token = maps_res.get('next_page_token', None)
         places.extend(maps_res['results'])
 
@@ -62,8 +66,9 @@ def parse_maps_data(user, data_path='.'):
     :return {float} Estimate of gas usage per month.
     """
     # If cache is available, use it.
-    if os.path.exists('caches/.maps.cache'):
-        with open('caches/.maps.cache') as f:
+    cache = get_cache_path('maps', user, data_path)
+    if os.path.exists(cache):
+        with open(cache) as f:
             return json.load(f)
 
     base_path = f'{data_path}/data/{user}/Takeout/Maps/My labeled places'
@@ -132,7 +137,7 @@ def parse_maps_data(user, data_path='.'):
         'fuel_needed': fuel_needed_in_liters
     }
 
-    with open('caches/.maps.cache', 'w') as f:
+    with open(cache, 'w') as f:
         json.dump(results, f)
 
     return results
@@ -2,6 +2,7 @@ import os
 import json
 import ast
 from userdata_mining.mining import get_nearby_places
+from userdata_mining.utils import get_cache_path
 
 
 def parse_maps(user, data_path='.'):
@@ -13,8 +14,9 @@ def parse_maps(user, data_path='.'):
     :return {list} user messages
     """
     # Check for a cache
-    if os.path.exists(f'{data_path}/caches/.maps_places.cache'):
-        f = open(f'{data_path}/caches/.maps_places.cache', 'r')
+    cache = get_cache_path('maps_places', user, data_path)
+    if os.path.exists(cache):
+        f = open(cache, 'r')
         return ast.literal_eval(f.readline())
 
     # Does the directory exist?
@@ -34,7 +36,7 @@ def parse_maps(user, data_path='.'):
         places.extend(get_nearby_places(coords))
 
     # Cache results
-    with open(f'{data_path}/caches/.maps_places.cache', 'w') as f:
+    with open(cache, 'w') as f:
         f.write(str(places))
 
     return places
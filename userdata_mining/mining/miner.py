@@ -1,66 +1,22 @@
-from userdata_mining.utils import get_username, debug, info
-from userdata_mining.mining import parse_fit_data
-from userdata_mining.mining import parse_autofill, parse_browser_history
-from userdata_mining.mining import parse_maps_data
-from userdata_mining.mining import parse_maps
-from userdata_mining.mining import parse_hangouts_data
-from userdata_mining.mining import parse_mail_data
-from userdata_mining.mining import parse_yt_comments, parse_yt_watch_history
-from userdata_mining.mining import parse_subscribed_channels, parse_liked_videos
-from userdata_mining.mining import parse_chats_data
-from userdata_mining.mining import parse_play_data
-from userdata_mining.mining import parse_pay_data
-from userdata_mining.mining import parse_access_log_data
-from userdata_mining.embedding import Embedding
-from userdata_mining.mining import parse_insta_ads_viewed
-from userdata_mining.mining import parse_insta_music_heard
-from userdata_mining.mining import parse_insta_videos_watched
-from userdata_mining.mining import parse_insta_ads_interest
-from userdata_mining.mining import parse_insta_your_topics
-from userdata_mining.mining import parse_insta_your_reels_topics
-from userdata_mining.mining import parse_insta_your_reels_sentiments
-from userdata_mining.mining import parse_insta_saved_posts
-from userdata_mining.mining import parse_insta_account_searches
-from userdata_mining.mining import parse_insta_monetization_eligibility
-from userdata_mining.mining import parse_insta_liked_comments
-from userdata_mining.mining import parse_insta_liked_posts
-from userdata_mining.mining import parse_insta_post_comments
-from userdata_mining.mining import parse_insta_information_submitted
-from userdata_mining.mining import parse_insta_posts_viewed
-from userdata_mining.mining import parse_insta_suggested_accounts_viewed
-from userdata_mining.mining import parse_insta_account_based_in
-from userdata_mining.mining import parse_insta_comments_allowed_from
-from userdata_mining.mining import parse_insta_use_cross_app_messaging
-from userdata_mining.mining import parse_insta_emoji_sliders
-from userdata_mining.mining import parse_insta_polls
-from userdata_mining.mining import parse_insta_quizzes
-from userdata_mining.mining import parse_insta_archived_posts
-from userdata_mining.mining import parse_insta_stories
-from userdata_mining.mining import parse_insta_followers
-from userdata_mining.mining import parse_insta_following
-from userdata_mining.mining import parse_insta_hide_story_from
-from userdata_mining.mining import parse_insta_messages
-
-from userdata_mining.mining import parse_fb_advertisers
-from userdata_mining.mining import parse_fb_apps_and_websites
-from userdata_mining.mining import parse_fb_posts_from_apps_and_websites
-from userdata_mining.mining import parse_fb_your_topics
-from userdata_mining.mining import parse_fb_comments
-from userdata_mining.mining import parse_fb_reactions
-from userdata_mining.mining import parse_fb_search_history
-from userdata_mining.mining import parse_fb_pages_you_follow
-from userdata_mining.mining import parse_fb_pages_you_liked
-from userdata_mining.mining import parse_fb_ads_interest
-from userdata_mining.mining import parse_fb_friend_peer_group
-from userdata_mining.mining import parse_fb_groups_comments
-from userdata_mining.mining import parse_fb_groups_membership
-from userdata_mining.mining import parse_fb_groups_posts
-from userdata_mining.mining import parse_fb_messages
+from userdata_mining.utils import get_username, debug, info, warn
+from userdata_mining.utils.instrumentation import RunReport, Stage, count, measured
+from userdata_mining.utils.profiling import Profiler
+from userdata_mining.embedding import Embedding, load_embeddings, append_embeddings
+from userdata_mining.mining.manifest import Checkpoint, Manifest, RecordKeys, stat_files
+from userdata_mining.mining.planner import load_throughput, order_sources, plan_user
+from userdata_mining.mining.sources import FB_INSTA_SOURCES, GOOGLE_SOURCES
 from abc import ABC
+from collections.abc import Mapping
+import multiprocessing
+import os
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from dateutil import parser
-import pickle
 import numpy as np
 import pandas as pd
 
@@ -69,23 +25,78 @@ class DataMiner(ABC):
     """
     A base class for data miners. Presents high-level functions that
     can be used by both users and subclasses, which provide more
-    detailed functionality.
+    detailed functionality. Subclasses list their sources in `sources`.
     """
 
-    def __init__(self, data_path='.', user=None):
+    #: The sources mined, in the order they appear in the profile.
+    sources = []
+
+    #: Results computed from other sources by _derive, mapped to the
+    #: sources they need. Those sources are not results themselves.
+    derived = {}
+
+    def __init__(self, data_path='.', user=None, fast=False, parse_workers=4,
+                 pipeline=False, queue_size=8, chunk_size=1024, profile=False,
+                 per_user=False, **embedding_kwargs):
         """
         Initializes the data miner.
 
         :param {str} data_path - Path to the data/ folder.
         :param {str} user - The user name. If None, infers it automatically.
+        :param {bool} fast - If True, embeds with hashed word counts
+        instead of a transformer, for quick triage runs. Results are
+        saved separately, under saved/embeddings/fast.
+        :param {int} parse_workers - Maximum number of sources parsed at
+        once, in threads for I/O-bound parsers and in processes for
+        CPU-bound ones. If 0, sources are parsed one at a time in this
+        process.
+        :param {bool} pipeline - If True, embedding starts as soon as the
+        first chunk of any source is parsed, instead of after every
+        source has been parsed.
+        :param {int} queue_size - In pipeline mode, the number of parsed
+        chunks that may wait to be embedded. Parsers block when it is
+        full, which caps memory use.
+        :param {int} chunk_size - The number of items per chunk. Each
+        chunk is saved as soon as it is embedded, so an interrupted run
+        resumes after the last chunk saved.
+        :param {bool} profile - If True, each source's parse and embed
+        stages are profiled with cProfile and tracemalloc, and the
+        reports are written to saved/profiling. Sources are then mined
+        one at a time, so that their profiles do not mix.
+        :param {bool} per_user - If True, embeddings are saved under
+        saved/embeddings/<user>, so that several users can be mined
+        from the same data path.
+        :param **embedding_kwargs - Options passed to Embedding, such as
+        workers, model_dir or backend.
         """
         self.data_path = data_path
+        self.fast = fast
+        self.parse_workers = parse_workers
+        self.pipeline = pipeline
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.profile = profile
+        self.embedding_kwargs = embedding_kwargs
 
         if user is None:
             self.user = get_username(self.data_path)
         else:
             self.user = user
 
+        self.embeddings_path = f'{data_path}/saved/embeddings'
+        if fast:
+            self.embeddings_path += '/fast'
+        if per_user:
+            self.embeddings_path += f'/{self.user}'
+        os.makedirs(self.embeddings_path, exist_ok=True)
+        self.manifest = Manifest(f'{self.embeddings_path}/manifest.json')
+        self.report = RunReport()
+
+        # Measured throughput and the plans of sources, made once for
+        # ordering sources longest first.
+        self._throughput = None
+        self._plans = {}
+
     def __getitem__(self, key):
         return self.__getattribute__(key)
 
@@ -104,845 +115,732 @@ class DataMiner(ABC):
     def mine_data(self, data_path='.'):
         return NotImplemented
 
-
-class FbInstaDataMiner(DataMiner):
-    """
-    Mines Instagram data.
-    """
-
-    def mine_data(self):
+    def _embedding_kwargs(self) -> dict:
         """
-        Mines all data of Instagram and Facebook
-        
-        :return {dict} A dictonary with mined, embedded data
+        Returns the options the Embedding used for all sources is
+        created with.
         """
-        ads_data = parse_insta_ads_viewed(self.user, data_path=self.data_path)
-        music_heard_data = parse_insta_music_heard(self.user, data_path=self.data_path)
-        videos_watched_data = parse_insta_videos_watched(self.user, data_path=self.data_path)
-        ads_interest_data = parse_insta_ads_interest(self.user, data_path=self.data_path)
-        your_topics_data = parse_insta_your_topics(self.user, data_path=self.data_path)
-        reels_topics_data = parse_insta_your_reels_topics(self.user, data_path=self.data_path)
-        reels_sentiments_data = parse_insta_your_reels_sentiments(self.user, data_path=self.data_path)
-        saved_posts_data = parse_insta_saved_posts(self.user, data_path=self.data_path)
-        account_searches_data = parse_insta_account_searches(self.user, data_path=self.data_path)
-        memo_data = parse_insta_monetization_eligibility(self.user, data_path=self.data_path)
-        liked_comments_data = parse_insta_liked_comments(self.user, data_path=self.data_path)
-        liked_posts_data = parse_insta_liked_posts(self.user, data_path=self.data_path)
-        post_comments_data = parse_insta_post_comments(self.user, data_path=self.data_path)
-        info_submitted_data = parse_insta_information_submitted(self.user, data_path=self.data_path)
-        posts_viewed_data = parse_insta_posts_viewed(self.user, data_path=self.data_path)
-        accounts_viewed_data = parse_insta_suggested_accounts_viewed(self.user, data_path=self.data_path)
-        accounts_based_in_data = parse_insta_account_based_in(self.user, data_path=self.data_path)
-        comments_data = parse_insta_comments_allowed_from(self.user, data_path=self.data_path)
-        cross_app_data = parse_insta_use_cross_app_messaging(self.user, data_path=self.data_path)
-        emojis_data = parse_insta_emoji_sliders(self.user, data_path=self.data_path)
-        polls_data = parse_insta_polls(self.user, data_path=self.data_path)
-        quizzes_data = parse_insta_quizzes(self.user, data_path=self.data_path)
-        archived_posts_data = parse_insta_archived_posts(self.user, data_path=self.data_path)
-        stories_data = parse_insta_stories(self.user, data_path=self.data_path)
-        followers_data = parse_insta_followers(self.user, data_path=self.data_path)
-        following_data = parse_insta_following(self.user, data_path=self.data_path)
-        hide_story_data = parse_insta_hide_story_from(self.user, data_path=self.data_path)
-        messages_data = parse_insta_messages(self.user, data_path=self.data_path)
-
-        info('Data parsed.')
-
-        info('Embedding text data. This may take a while.')
-        embedding = Embedding(model='bert-base-uncased')
-
-        if ads_data:
-            info('Embedding Instagram Ads data. This may take a while.')
-            self.ads_embeddings = [
-                embedding.embed(x) for x in ads_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_ads.pickle', 'wb') as f:
-                pickle.dump(self.ads_embeddings, f)
-        else:
-            self.ads_embeddings = []
-
-        if music_heard_data:
-            info('Embedding Instagram Music Heard data. This may take a while.')
-            self.music_heard_embeddings = [
-                embedding.embed(x) for x in music_heard_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_music.pickle', 'wb') as f:
-                pickle.dump(self.music_heard_embeddings, f)
-        else:
-            self.music_heard_embeddings = []
-
-        if videos_watched_data:
-            info('Embedding Instagram Videos Watched data. This may take a while.')
-            self.videos_watched_embeddings = [
-                embedding.embed(x) for x in videos_watched_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_videos.pickle', 'wb') as f:
-                pickle.dump(self.videos_watched_embeddings, f)
-        else:
-            self.videos_watched_embeddings = []
-
-        if ads_interest_data:
-            info('Embedding Instagram Ads Interest data. This may take a while.')
-            self.ads_interest_embeddings = [
-                embedding.embed(x) for x in ads_interest_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_ads_interest.pickle', 'wb') as f:
-                pickle.dump(self.ads_interest_embeddings, f)
-        else:
-            self.ads_interest_embeddings = []
-
-        if your_topics_data:
-            info('Embedding Instagram Topics data. This may take a while.')
-            self.your_topics_embeddings = [
-                embedding.embed(x) for x in your_topics_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_topics.pickle', 'wb') as f:
-                pickle.dump(self.your_topics_embeddings, f)
-        else:
-            self.your_topics_embeddings = []
-
-        if reels_topics_data:
-            info('Embedding Instagram Reels data. This may take a while.')
-            self.reels_topics_embeddings = [
-                embedding.embed(x) for x in reels_topics_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_reels_topics.pickle', 'wb') as f:
-                pickle.dump(self.reels_topics_embeddings, f)
-        else:
-            self.reels_topics_embeddings = []
-
-        if reels_sentiments_data:
-            info('Embedding Instagram Reels Sentiments data. This may take a while.')
-            self.reels_sentiments_embeddings = [
-                embedding.embed(x) for x in reels_sentiments_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_reels_sentiments.pickle', 'wb') as f:
-                pickle.dump(self.reels_sentiments_embeddings, f)
-        else:
-            self.reels_sentiments_embeddings = []
-
-        if saved_posts_data:
-            info('Embedding Instagram Saved Posts data. This may take a while.')
-            self.saved_posts_embeddings = [
-                embedding.embed(x) for x in saved_posts_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_saved_posts.pickle', 'wb') as f:
-                pickle.dump(self.saved_posts_embeddings, f)
-        else:
-            self.saved_posts_embeddings = []
-
-        if account_searches_data:
-            info('Embedding Instagram Account Searches data. This may take a while.')
-            self.account_searches_embeddings = [
-                embedding.embed(x) for x in account_searches_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_account_searches.pickle', 'wb') as f:
-                pickle.dump(self.account_searches_embeddings, f)
-        else:
-            self.account_searches_embeddings = []
-
-        if memo_data:
-            info('Embedding Instagram Memo data. This may take a while.')
-            self.memo_embeddings = [
-                embedding.embed(x) for x in memo_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_memo_data.pickle', 'wb') as f:
-                pickle.dump(self.memo_embeddings, f)
-        else:
-            self.memo_embeddings = []
-
-        if liked_comments_data:
-            info('Embedding Instagram Liked Comments data. This may take a while.')
-            self.liked_comments_embeddings = [
-                embedding.embed(x) for x in liked_comments_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_liked_comments.pickle', 'wb') as f:
-                pickle.dump(self.liked_comments_embeddings, f)
-        else:
-            self.liked_comments_embeddings = []
-
-        if liked_posts_data:
-            info('Embedding Instagram Liked Posts data. This may take a while.')
-            self.liked_posts_embeddings = [
-                embedding.embed(x) for x in liked_posts_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_liked_posts.pickle', 'wb') as f:
-                pickle.dump(self.liked_posts_embeddings, f)
-        else:
-            self.liked_posts_embeddings = []
-
-        if post_comments_data:
-            info('Embedding Instagram Post Comments data. This may take a while.')
-            self.post_comments_embeddings = [
-                embedding.embed(x) for x in post_comments_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_post_comments.pickle', 'wb') as f:
-                pickle.dump(self.post_comments_embeddings, f)
-        else:
-            self.post_comments_embeddings = []
-
-        if info_submitted_data:
-            info('Embedding Instagram Info Submitted data. This may take a while.')
-            self.info_submitted_embeddings = [
-                embedding.embed(x) for x in info_submitted_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_info_submitted.pickle', 'wb') as f:
-                pickle.dump(self.info_submitted_embeddings, f)
-        else:
-            self.info_submitted_embeddings = []
-
-        if posts_viewed_data:
-            info('Embedding Instagram Posts Viewed data. This may take a while.')
-            self.posts_viewed_embeddings = [
-                embedding.embed(x) for x in posts_viewed_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_posts_viewed.pickle', 'wb') as f:
-                pickle.dump(self.posts_viewed_embeddings, f)
-        else:
-            self.posts_viewed_embeddings = []
-
-        if accounts_viewed_data:
-            info('Embedding Instagram Accounts Viewed data. This may take a while.')
-            self.accounts_viewed_embeddings = [
-                embedding.embed(x) for x in accounts_viewed_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_accounts_viewed.pickle', 'wb') as f:
-                pickle.dump(self.accounts_viewed_embeddings, f)
-        else:
-            self.accounts_viewed_embeddings = []
-
-        if accounts_based_in_data:
-            info('Embedding Instagram Accounts Based in data. This may take a while.')
-            self.accounts_based_in_embeddings = [
-                embedding.embed(x) for x in accounts_based_in_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_accounts_based.pickle', 'wb') as f:
-                pickle.dump(self.accounts_based_in_embeddings, f)
-        else:
-            self.accounts_based_in_embeddings = []
-
-        if comments_data:
-            info('Embedding Instagram Comments data. This may take a while.')
-            self.comments_embeddings = [
-                embedding.embed(x) for x in comments_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_comments_data.pickle', 'wb') as f:
-                pickle.dump(self.comments_embeddings, f)
-        else:
-            self.comments_embeddings = []
-
-        if cross_app_data:
-            info('Embedding Instagram Cross App data. This may take a while.')
-            self.cross_app_embeddings = [
-                embedding.embed(x) for x in cross_app_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_cross_app.pickle', 'wb') as f:
-                pickle.dump(self.cross_app_embeddings, f)
-        else:
-            self.cross_app_embeddings = []
-
-        if emojis_data:
-            info('Embedding Instagram Emojis data. This may take a while.')
-            self.emojis_embeddings = [
-                embedding.embed(x) for x in emojis_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_emojis.pickle', 'wb') as f:
-                pickle.dump(self.emojis_embeddings, f)
-        else:
-            self.emojis_embeddings = []
-
-        if polls_data:
-            info('Embedding Instagram Polls data. This may take a while.')
-            self.polls_embeddings = [
-                embedding.embed(x) for x in polls_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_polls.pickle', 'wb') as f:
-                pickle.dump(self.polls_embeddings, f)
-        else:
-            self.polls_embeddings = []
-
-        if quizzes_data:
-            info('Embedding Instagram Quizzes data. This may take a while.')
-            self.quizzes_embeddings = [
-                embedding.embed(x) for x in quizzes_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_quizzes.pickle', 'wb') as f:
-                pickle.dump(self.quizzes_embeddings, f)
-        else:
-            self.quizzes_embeddings = []
-
-        if archived_posts_data:
-            info('Embedding Instagram Archived Posts data. This may take a while.')
-            self.archived_posts_embeddings = [
-                embedding.embed(x) for x in archived_posts_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_archived_posts.pickle', 'wb') as f:
-                pickle.dump(self.archived_posts_embeddings, f)
-        else:
-            self.archived_posts_embeddings = []
-
-        if stories_data:
-            info('Embedding Instagram Stories data. This may take a while.')
-            self.stories_embeddings = [
-                embedding.embed(x) for x in stories_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_stories.pickle', 'wb') as f:
-                pickle.dump(self.stories_embeddings, f)
-        else:
-            self.stories_embeddings = []
-
-        if followers_data:
-            info('Embedding Instagram Followers data. This may take a while.')
-            self.followers_embeddings = [
-                embedding.embed(x) for x in followers_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_followers.pickle', 'wb') as f:
-                pickle.dump(self.followers_embeddings, f)
-        else:
-            self.followers_embeddings = []
-
-        if following_data:
-            info('Embedding Instagram Following data. This may take a while.')
-            self.following_embeddings = [
-                embedding.embed(x) for x in following_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_following.pickle', 'wb') as f:
-                pickle.dump(self.following_embeddings, f)
-        else:
-            self.following_embeddings = []
-
-        if hide_story_data:
-            info('Embedding Instagram Hide Story data. This may take a while.')
-            self.hide_story_embeddings = [
-                embedding.embed(x) for x in hide_story_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_hide_story.pickle', 'wb') as f:
-                pickle.dump(self.hide_story_embeddings, f)
-        else:
-            self.hide_story_embeddings = []
-
-        if messages_data:
-            info('Embedding Instagram Messages data. This may take a while.')
-            self.messages_embeddings = [
-                embedding.embed(x) for x in messages_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_messgaes.pickle', 'wb') as f:
-                pickle.dump(self.messages_embeddings, f)
-        else:
-            self.messages_embeddings = []
-
-        if ads_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_ads.pickle', 'wb') as f:
-                self.ads_embeddings = pickle.load(f)
-
-        if music_heard_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_music.pickle', 'wb') as f:
-                self.music_heard_embeddings = pickle.load(f)
-
-        if videos_watched_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_videos.pickle', 'wb') as f:
-                self.videos_watched_embeddings = pickle.load(f)
-
-        if ads_interest_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_ads_interest.pickle', 'wb') as f:
-                self.ads_interest_embeddings = pickle.load(f)
-
-        if your_topics_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_topics.pickle', 'wb') as f:
-                self.your_topics_embeddings = pickle.load(f)
-
-        if reels_topics_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_reels_topics.pickle', 'wb') as f:
-                self.reels_topics_embeddings = pickle.load(f)
-
-        if reels_sentiments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_reels_sentiments.pickle', 'wb') as f:
-                self.reels_sentiments_embeddings = pickle.load(f)
-
-        if saved_posts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_saved_posts.pickle', 'wb') as f:
-                self.saved_posts_embeddings = pickle.load(f)
-
-        if account_searches_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_account_searches.pickle', 'wb') as f:
-                self.account_searches_embeddings = pickle.load(f)
-
-        if memo_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_memo_data.pickle', 'wb') as f:
-                self.memo_embeddings = pickle.load(f)
-
-        if liked_comments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_liked_comments.pickle', 'wb') as f:
-                self.liked_comments_embeddings = pickle.load(f)
-
-        if liked_posts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_liked_posts.pickle', 'wb') as f:
-                self.liked_posts_embeddings = pickle.load(f)
-
-        if post_comments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_post_comments.pickle', 'wb') as f:
-                self.post_comments_embeddings = pickle.load(f)
-
-        if info_submitted_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_info_submitted.pickle', 'wb') as f:
-                self.info_submitted_embeddings = pickle.load(f)
-
-        if posts_viewed_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_posts_viewed.pickle', 'wb') as f:
-                self.posts_viewed_embeddings = pickle.load(f)
-
-        if accounts_viewed_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_accounts_viewed.pickle', 'wb') as f:
-                self.accounts_viewed_embeddings = pickle.load(f)
-
-        if accounts_based_in_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_accounts_based.pickle', 'wb') as f:
-                self.accounts_based_in_embeddings = pickle.load(f)
-
-        if comments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_comments_data.pickle', 'wb') as f:
-                self.comments_embeddings = pickle.load(f)
-
-        if cross_app_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_cross_app.pickle', 'wb') as f:
-                self.cross_app_embeddings = pickle.load(f)
-
-        if emojis_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_emojis.pickle', 'wb') as f:
-                self.emojis_embeddings = pickle.load(f)
+        kwargs = {
+            'model': 'bert-base-uncased',
+            'cache': f'{self.embeddings_path}/cache.sqlite',
+            'max_windows': 8,
+            'export_dir': f'{self.data_path}/saved/models'
+        }
+        if self.fast:
+            # Not TF-IDF: sources are embedded in chunks, and document
+            # frequencies counted per chunk would make vectors of
+            # different chunks incomparable. Without a cache, sentences
+            # repeated across chunks are hashed again; hashing them is
+            # about as cheap as looking them up.
+            kwargs.update({'backend': 'hashing', 'cache': None})
+        kwargs.update(self.embedding_kwargs)
+        return kwargs
+
+    def _embedding(self):
+        """
+        Creates the Embedding used to embed all sources.
+        """
+        return Embedding(**self._embedding_kwargs())
 
-        if polls_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_polls.pickle', 'wb') as f:
-                self.polls_embeddings = pickle.load(f)
+    def _config(self, source) -> dict:
+        """
+        Returns what a source's cached embeddings depend on, other than
+        its input files: the parser version, the encoder and the
+        options that change the vectors.
+        """
+        kwargs = self._embedding_kwargs()
+        return {
+            'version': source.version,
+            'kind': source.kind,
+            'embedding': {x: kwargs.get(x) for x in
+                          ('model', 'backend', 'quantize', 'pooling', 'max_windows')}
+        }
 
-        if quizzes_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_quizzes.pickle', 'wb') as f:
-                self.quizzes_embeddings = pickle.load(f)
+    def _inputs(self, source) -> dict:
+        """
+        Fingerprints the files a source is parsed from.
+        """
+        return self.manifest.fingerprint(f'{self.data_path}/data/{self.user}', source.inputs)
 
-        if archived_posts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_archived_posts.pickle', 'wb') as f:
-                self.archived_posts_embeddings = pickle.load(f)
+    def state(self) -> dict:
+        """
+        Describes what the results of this miner depend on: the size and
+        mtime of each source's input files, and its configuration. Only
+        the files are stat'ed, so this is cheap to check before mining.
 
-        if stories_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_stories.pickle', 'wb') as f:
-                self.stories_embeddings = pickle.load(f)
+        :return {dict} Source names mapped to their inputs and config
+        """
+        base = f'{self.data_path}/data/{self.user}'
+        return {x.key: {'inputs': stat_files(base, x.inputs), 'config': self._config(x)}
+                for x in self.sources}
 
-        if followers_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_followers.pickle', 'wb') as f:
-                self.followers_embeddings = pickle.load(f)
+    def _count_inputs(self, source, stage):
+        """
+        Adds the number and total size of a source's input files to a
+        stage of the run report.
+        """
+        inputs = self._inputs(source)
+        stage.count('input_files', len(inputs))
+        stage.count('input_bytes', sum(x['size'] for x in inputs.values()))
 
-        if following_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_following.pickle', 'wb') as f:
-                self.following_embeddings = pickle.load(f)
+    def _cached(self, source) -> bool:
+        """
+        Returns whether a source's embeddings are cached, and were built
+        from its current input files and configuration.
+        """
+        return source.cache is not None and \
+            os.path.exists(f'{self.embeddings_path}/{source.cache}.npy') and \
+            self.manifest.is_fresh(source.cache, self._inputs(source), self._config(source))
 
-        if hide_story_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_hide_story.pickle', 'wb') as f:
-                self.hide_story_embeddings = pickle.load(f)
+    def _record(self, source, keys=None):
+        """
+        Records in the manifest that a source's embeddings were saved,
+        along with the keys of its records if it is append-only.
 
-        if messages_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/insta_messgaes.pickle', 'wb') as f:
-                self.messages_embeddings = pickle.load(f)
-
-        fb_ads_data = parse_fb_advertisers(self.user, data_path=self.data_path)
-        fb_apps_data = parse_fb_apps_and_websites(self.user, data_path=self.data_path)
-        fb_posts_apps_data = parse_fb_posts_from_apps_and_websites(self.user, data_path=self.data_path)
-        fb_your_topics_data = parse_fb_your_topics(self.user, data_path=self.data_path)
-        fb_comments_data = parse_fb_comments(self.user, data_path=self.data_path)
-        fb_reactions_data = parse_fb_reactions(self.user, data_path=self.data_path)
-        fb_search_historydata = parse_fb_search_history(self.user, data_path=self.data_path)
-        fb_saved_posts_data = parse_fb_pages_you_follow(self.user, data_path=self.data_path)
-        fb_pages_you_follow_data = parse_fb_pages_you_liked(self.user, data_path=self.data_path)
-        fb_ads_interest_data = parse_fb_ads_interest(self.user, data_path=self.data_path)
-        fb_friend_peer_group_data = parse_fb_friend_peer_group(self.user, data_path=self.data_path)
-        fb_groups_comments_data = parse_fb_groups_comments(self.user, data_path=self.data_path)
-        fb_groups_membership_data = parse_fb_groups_membership(self.user, data_path=self.data_path)
-        fb_groups_posts_data = parse_fb_groups_posts(self.user, data_path=self.data_path)
-        fb_messages_data = parse_fb_messages(self.user, data_path=self.data_path)
-
-        if fb_ads_data:
-            info('Embedding FB Ads data. This may take a while.')
-            self.fb_ads_embeddings = [
-                embedding.embed(x) for x in fb_ads_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_ads.pickle', 'wb') as f:
-                pickle.dump(self.fb_ads_embeddings, f)
-        else:
-            self.fb_ads_embeddings = []
+        :param {Source} source - The source.
+        :param {RecordKeys} keys - The keys of every record embedded.
+        """
+        path = f'{self.embeddings_path}/{source.cache}'
+        if keys is not None:
+            np.save(f'{path}.keys.tmp.npy', np.array(keys.keys, dtype=np.uint64))
+            os.replace(f'{path}.keys.tmp.npy', f'{path}.keys.npy')
 
-        if fb_apps_data:
-            info('Embedding FB Apps data. This may take a while.')
-            self.fb_apps_embeddings = [
-                embedding.embed(x) for x in fb_apps_data]
+        rows = len(np.load(f'{path}.npy', mmap_mode='r'))
+        self.manifest.record(source.cache, self._inputs(source), self._config(source), rows)
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_apps.pickle', 'wb') as f:
-                pickle.dump(self.fb_apps_embeddings, f)
-        else:
-            self.fb_apps_embeddings = []
+    def _known_keys(self, source):
+        """
+        Returns the keys of the records in a source's cache when only
+        new records need to be embedded: the source is append-only and
+        its cache was built with the current configuration. Otherwise
+        returns None.
+        """
+        path = f'{self.embeddings_path}/{source.cache}'
+        entry = self.manifest.entries.get(source.cache)
+        if not source.append_only or entry is None or entry['config'] != self._config(source) \
+                or not os.path.exists(f'{path}.npy') or not os.path.exists(f'{path}.keys.npy'):
+            return None
 
-        if fb_posts_apps_data:
-            info('Embedding FB Posts apps data. This may take a while.')
-            self.fb_posts_apps_embeddings = [
-                embedding.embed(x) for x in fb_posts_apps_data]
+        # A cache left half-appended by an interrupted run is rebuilt.
+        if entry.get('rows') != len(np.load(f'{path}.npy', mmap_mode='r')):
+            return None
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_posts_apps.pickle', 'wb') as f:
-                pickle.dump(self.fb_posts_apps_embeddings, f)
-        else:
-            self.fb_posts_apps_embeddings = []
+        return np.load(f'{path}.keys.npy')
 
-        if fb_your_topics_data:
-            info('Embedding FB Topics data. This may take a while.')
-            self.fb_your_topics_embeddings = [
-                embedding.embed(x) for x in fb_your_topics_data]
+    def plan(self, sources: list = None, throughput: dict = None) -> dict:
+        """
+        Estimates the cost of mining this user's sources, without
+        parsing or embedding them. See plan_user.
+
+        :param {list} sources - The sources to plan. If None, all of
+        them.
+        :param {dict} throughput - As returned by load_throughput. If
+        None, rates are taken from earlier run reports.
+        :return {dict} The plan
+        """
+        return plan_user(self.user, self.data_path, throughput,
+                         self.sources if sources is None else sources,
+                         chunk_size=self.chunk_size)
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_topics.pickle', 'wb') as f:
-                pickle.dump(self.fb_your_topics_embeddings, f)
-        else:
-            self.fb_your_topics_embeddings = []
+    def _longest_first(self, sources: list) -> list:
+        """
+        Orders sources by their planned cost, longest first, so that the
+        slowest ones are not started last. Each source is planned once
+        per miner.
+        """
+        if self._throughput is None:
+            self._throughput = load_throughput(self.data_path)
+        return order_sources(sources, f'{self.data_path}/data/{self.user}', self._throughput,
+                             self.chunk_size, self._plans)
 
-        if fb_comments_data:
-            info('Embedding FB Comments data. This may take a while.')
-            self.fb_comments_embeddings = [
-                embedding.embed(x) for x in fb_comments_data]
+    @staticmethod
+    def _process_context():
+        """
+        Returns the multiprocessing context for CPU-bound parsers. This
+        process may already be running torch threads, so workers are not
+        forked from it. Where possible they are forked from a server
+        that has imported the parsers once, rather than each worker
+        importing them on its own.
+        """
+        if 'forkserver' not in multiprocessing.get_all_start_methods():
+            return multiprocessing.get_context('spawn')
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_comments.pickle', 'wb') as f:
-                pickle.dump(self.fb_comments_embeddings, f)
-        else:
-            self.fb_comments_embeddings = []
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['userdata_mining.mining'])
+        return context
 
-        if fb_reactions_data:
-            info('Embedding FB Reactions data. This may take a while.')
-            self.fb_reactions_embeddings = [
-                embedding.embed(x) for x in fb_reactions_data]
+    def _parse(self, sources: list = None) -> dict:
+        """
+        Parses every source that is not cached or streamed. I/O-bound
+        parsers run in a thread pool and CPU-bound ones in a process
+        pool, so the parse phase takes about as long as the slowest
+        parser.
+
+        :param {list} sources - The sources to parse. If None, all of
+        them.
+        :return {dict} Source names mapped to parsed data
+        """
+        sources = self.sources if sources is None else sources
+        todo = [x for x in sources if not x.stream and not self._cached(x)]
+        start = time.perf_counter()
+
+        if self.parse_workers == 0 or self.profile:
+            results = {}
+            for source in todo:
+                with Stage(source.key, 'parse', profiler=self.report.profiler) as stage:
+                    data = source.parser(self.user, data_path=self.data_path)
+                results[source.key] = data, stage
+        else:
+            todo = self._longest_first(todo)
+            context = self._process_context()
+            with ThreadPoolExecutor(self.parse_workers) as threads, \
+                    ProcessPoolExecutor(self.parse_workers, mp_context=context) as processes:
+                futures = {x.key: (threads if x.io_bound else processes).submit(
+                    measured, x.key, 'parse', x.parser, self.user, data_path=self.data_path)
+                    for x in todo}
+                results = {key: future.result() for key, future in futures.items()}
+
+        parsed = {}
+        for source in todo:
+            parsed[source.key], stage = results[source.key]
+            self._count_inputs(source, stage)
+            if hasattr(parsed[source.key], '__len__'):
+                stage.count('items', len(parsed[source.key]))
+            self.report.add(stage)
+
+        info(f'Data parsed: {len(parsed)} source(s) in {time.perf_counter() - start:.1f}s.')
+        return parsed
+
+    def _mine(self, embedding) -> dict:
+        """
+        Parses and embeds every source, caching the embeddings.
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_reactions.pickle', 'wb') as f:
-                pickle.dump(self.fb_reactions_embeddings, f)
-        else:
-            self.fb_reactions_embeddings = []
+        :param {Embedding} embedding - The embedding object.
+        :return {dict} Source names mapped to embeddings, or to parsed
+        data for sources that are not embedded
+        """
+        self._start_run()
+        if self.pipeline and not self.profile:
+            return self._mine_pipelined(embedding)
 
-        if fb_search_historydata:
-            info('Embedding FB Search History data. This may take a while.')
-            self.fb_search_history_embeddings = [
-                embedding.embed(x) for x in fb_search_historydata]
+        parsed = self._parse()
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_search_history.pickle', 'wb') as f:
-                pickle.dump(self.fb_search_history_embeddings, f)
-        else:
-            self.fb_search_history_embeddings = []
+        info('Embedding text data. This may take a while.')
+        results = {}
+        for source in self.sources:
+            results[source.key] = self._mine_source(embedding, source, parsed)
 
-        if fb_saved_posts_data:
-            info('Embedding FB Saved Posts data. This may take a while.')
-            self.fb_saved_posts_embeddings = [
-                embedding.embed(x) for x in fb_saved_posts_data]
+        if embedding.cache is not None:
+            info(f'Embedding cache: {embedding.cache.hits} hit(s), '
+                 f'{embedding.cache.misses} miss(es), {len(embedding.cache)} stored.')
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_saved_posts.pickle', 'wb') as f:
-                pickle.dump(self.fb_saved_posts_embeddings, f)
-        else:
-            self.fb_saved_posts_embeddings = []
+        return results
 
-        if fb_pages_you_follow_data:
-            info('Embedding FB Pages You Follow data. This may take a while.')
-            self.fb_pages_you_follow_embeddings = [
-                embedding.embed(x) for x in fb_pages_you_follow_data]
+    def _start_run(self):
+        """
+        Starts a new run report, and a profiler if profiling.
+        """
+        self.run_id = f'{self.user}-{type(self).__name__}-{datetime.now():%Y%m%d-%H%M%S}'
+        profiler = None
+        if self.profile:
+            profiler = Profiler(f'{self.data_path}/saved/profiling/{self.run_id}')
+            info(f'Profiling to {profiler.path}. Sources are mined one at a time.')
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_pages_you_follow.pickle', 'wb') as f:
-                pickle.dump(self.fb_pages_you_follow_embeddings, f)
-        else:
-            self.fb_pages_you_follow_embeddings = []
+        self.report = RunReport(profiler)
 
-        if fb_ads_interest_data:
-            info('Embedding FB Ads Interest data. This may take a while.')
-            self.fb_ads_interest_embeddings = [
-                embedding.embed(x) for x in fb_ads_interest_data]
+    def _mine_source(self, embedding, source, parsed: dict):
+        """
+        Embeds a source, or loads its cached embeddings.
+
+        :param {Embedding} embedding - The embedding object. Not used if
+        the source is cached or not embedded.
+        :param {Source} source - The source.
+        :param {dict} parsed - As returned by _parse.
+        :return The embeddings, or the parsed data for sources that are
+        not embedded
+        """
+        if source.kind is None:
+            return parsed[source.key]
+
+        if self._cached(source):
+            # Load cached embeddings
+            with self.report.stage(source.key, 'load') as stage:
+                result = load_embeddings(f'{self.embeddings_path}/{source.cache}',
+                                         mmap_mode='r')
+                stage.count('rows', len(result))
+        elif source.stream:
+            # Parsed lazily, so parsing is part of this stage.
+            with self.report.stage(source.key, 'embed', time.process_time) as stage:
+                self._count_inputs(source, stage)
+                data = source.parser(self.user, data_path=self.data_path, lazy=True)
+                result = self._embed_stream(embedding, source, data) if data else []
+                stage.count('rows', len(result))
+        else:
+            with self.report.stage(source.key, 'embed', time.process_time) as stage:
+                result = self._embed_records(
+                    embedding, source, parsed[source.key]) if parsed[source.key] else []
+                stage.count('rows', len(result))
+        return result
+
+    def _result_keys(self) -> list:
+        """
+        Returns the keys of the results, in order: the sources, other
+        than those only used to derive results, then the derived results.
+        """
+        inputs = set(x for sources in self.derived.values() for x in sources)
+        return [x.key for x in self.sources if x.key not in inputs] + list(self.derived)
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_ads_interest.pickle', 'wb') as f:
-                pickle.dump(self.fb_ads_interest_embeddings, f)
-        else:
-            self.fb_ads_interest_embeddings = []
+    def _derive(self, key: str, results, get_embedding):
+        """
+        Computes a derived result.
+
+        :param {str} key - A key of derived.
+        :param results - Source names mapped to mined sources; it has at
+        least the sources the result needs.
+        :param {Callable} get_embedding - Returns the embedding object.
+        Only called if the result has to be embedded, so that the model
+        is not loaded otherwise.
+        """
+        raise KeyError(key)
 
-        if fb_friend_peer_group_data:
-            info('Embedding FB Friend Peer group data. This may take a while.')
-            self.fb_friend_peer_group_embeddings = [
-                embedding.embed(x) for x in fb_friend_peer_group_data]
+    def _produce(self, source, chunks, processes, stop):
+        """
+        Parses a source and puts it on the queue in chunks. Runs in a
+        parser thread; CPU-bound parsers are handed to the process pool.
+
+        :param {Source} source - The source.
+        :param {queue.Queue} chunks - The queue shared with the embedder.
+        :param {ProcessPoolExecutor} processes - The pool for CPU-bound
+        parsers, or None to parse in this thread.
+        :param {threading.Event} stop - Set if the embedder has given up,
+        so that parsers stop waiting for room in the queue.
+        """
+        def put(message):
+            while not stop.is_set():
+                try:
+                    chunks.put((source,) + message, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        try:
+            if source.io_bound or source.stream or processes is None:
+                with self.report.stage(source.key, 'parse') as stage:
+                    self._count_inputs(source, stage)
+                    data = source.parser(self.user, data_path=self.data_path,
+                                         **({'lazy': True} if source.stream else {}))
+            else:
+                data, stage = processes.submit(measured, source.key, 'parse', source.parser,
+                                               self.user, data_path=self.data_path).result()
+                self._count_inputs(source, stage)
+                self.report.add(stage)
+
+            if source.kind is None:
+                put(('value', data))
+                return
+
+            # Lazy parsers do their work as chunks are taken, which is
+            # timed separately from waiting for room in the queue.
+            items = iter(data or [])
+            while not stop.is_set():
+                with self.report.stage(source.key, 'parse') as stage:
+                    chunk = list(itertools.islice(items, self.chunk_size))
+                    stage.count('items', len(chunk))
+                if not chunk:
+                    break
+                put(('chunk', chunk))
+
+            put(('done', None))
+        except Exception as e:
+            put(('error', e))
+
+    def _mine_pipelined(self, embedding) -> dict:
+        """
+        Parses and embeds every source at the same time: parser threads
+        put chunks on a bounded queue, and this thread embeds them as
+        they arrive.
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_friend_peer_group.pickle', 'wb') as f:
-                pickle.dump(self.fb_friend_peer_group_embeddings, f)
-        else:
-            self.fb_friend_peer_group_embeddings = []
+        :param {Embedding} embedding - The embedding object.
+        :return {dict} Source names mapped to embeddings, or to parsed
+        data for sources that are not embedded
+        """
+        results = {}
+        for source in self.sources:
+            if self._cached(source):
+                # Load cached embeddings
+                with self.report.stage(source.key, 'load') as stage:
+                    results[source.key] = load_embeddings(
+                        f'{self.embeddings_path}/{source.cache}', mmap_mode='r')
+                    stage.count('rows', len(results[source.key]))
+
+        todo = self._longest_first([x for x in self.sources if x.key not in results])
+        chunks = queue.Queue(self.queue_size)
+        stop = threading.Event()
+        rows = {x.key: [] for x in todo}
+        checkpoints = {}
+        skip = {}
+        keys = {x.key: RecordKeys(self._known_keys(x)) for x in todo
+                if x.append_only and x.kind is not None}
+        start = time.perf_counter()
+
+        workers = max(1, self.parse_workers)
+        context = self._process_context()
+        with ThreadPoolExecutor(workers) as threads, \
+                ProcessPoolExecutor(workers, mp_context=context) as processes:
+            for source in todo:
+                threads.submit(self._produce, source, chunks,
+                               processes if self.parse_workers > 0 else None, stop)
+
+            remaining = len(todo)
+            try:
+                while remaining > 0:
+                    source, message, payload = chunks.get()
+
+                    if message == 'error':
+                        raise payload
+                    elif message == 'value':
+                        results[source.key] = payload
+                        remaining -= 1
+                    elif message == 'chunk':
+                        delta = keys.get(source.key)
+                        if delta is not None:
+                            payload = list(delta.filter(payload))
+
+                        if source.cache is not None and source.key not in checkpoints and \
+                                (delta is None or delta.known is None):
+                            checkpoints[source.key] = self._checkpoint(embedding, source)
+                            skip[source.key] = checkpoints[source.key].items
+
+                        # Chunks embedded by an interrupted run are skipped.
+                        if skip.get(source.key):
+                            done = min(skip[source.key], len(payload))
+                            skip[source.key] -= done
+                            payload = payload[done:]
+                        if not payload:
+                            continue
+
+                        with self.report.stage(source.key, 'embed', time.process_time) as stage:
+                            matrix = embedding.embed_batch(payload, kind=source.kind)
+                            if source.stream:
+                                matrix = matrix[~np.isnan(matrix).any(axis=1)]
+                            stage.count('rows', len(matrix))
+
+                            if source.key in checkpoints:
+                                checkpoints[source.key].write(matrix, len(payload))
+                            elif delta is not None and delta.known is not None:
+                                # Only new records are left; add them to the cache.
+                                append_embeddings(f'{self.embeddings_path}/{source.cache}',
+                                                  matrix)
+                            else:
+                                rows[source.key].append(matrix)
+                    else:
+                        # Rows were counted as their chunks were embedded.
+                        with self.report.stage(source.key, 'embed', time.process_time):
+                            results[source.key] = self._finish(
+                                embedding, source, rows.pop(source.key),
+                                checkpoints.pop(source.key, None), keys.get(source.key))
+                        info(f'{source.key}: {len(results[source.key])} item(s) after '
+                             f'{time.perf_counter() - start:.1f}s.')
+                        remaining -= 1
+            finally:
+                # Parsers still running give up instead of waiting for
+                # room in the queue.
+                stop.set()
+
+        if embedding.cache is not None:
+            info(f'Embedding cache: {embedding.cache.hits} hit(s), '
+                 f'{embedding.cache.misses} miss(es), {len(embedding.cache)} stored.')
+
+        return {x.key: results[x.key] for x in self.sources}
+
+    def _finish(self, embedding, source, rows: list, checkpoint, keys=None):
+        """
+        Saves the embeddings of a source once all of its chunks are done.
+
+        :param {Embedding} embedding - The embedding object.
+        :param {Source} source - The source.
+        :param {list} rows - Embedded chunks, for sources not cached.
+        :param {Checkpoint} checkpoint - The checkpoint chunks of a
+        cached source were written to, or None if there were no chunks.
+        :param {RecordKeys} keys - The record keys of an append-only
+        source.
+        :return The embeddings, or [] if the source is empty
+        """
+        path = f'{self.embeddings_path}/{source.cache}'
+        if keys is not None and keys.known is not None:
+            if not keys.keys:
+                # The source parsed to nothing. As in _mine_source, the
+                # cache is left as it is.
+                return []
+            if keys.complete:
+                info(f'{source.key}: {len(keys.keys) - len(keys.known)} new record(s).')
+                self._record(source, keys)
+                return load_embeddings(path, mmap_mode='r')
+
+            # Only new records were kept, so the source is parsed again.
+            warn(f'{source.key}: records were removed since the last export. '
+                 'Embedding it again.')
+            self.manifest.entries.pop(source.cache)
+            if source.stream:
+                result = self._embed_stream(
+                    embedding, source, source.parser(self.user, data_path=self.data_path, lazy=True))
+            else:
+                result = self._embed_records(
+                    embedding, source, source.parser(self.user, data_path=self.data_path))
+            count('rows', len(result))
+            return result
+
+        if checkpoint is not None:
+            checkpoint.commit()
+            self._record(source, keys)
+            return load_embeddings(path, mmap_mode='r')
+
+        if not rows:
+            return []
+        return np.vstack(rows)
+
+    def _embed_records(self, embedding, source, texts: list):
+        """
+        Embeds a parsed source and caches it. If the source is
+        append-only and an earlier export of it is cached, only the
+        records that are new are embedded, and they are appended to the
+        cache.
+
+        :param {Embedding} embedding - The embedding object.
+        :param {Source} source - The source.
+        :param {list} texts - The parsed source.
+        :return {np.ndarray} The embeddings
+        """
+        path = f'{self.embeddings_path}/{source.cache}'
+        keys = None
+        if source.append_only:
+            keys = RecordKeys(self._known_keys(source))
+            new = list(keys.filter(texts))
+
+            if keys.known is not None and keys.complete:
+                info(f'{source.key}: {len(new)} new record(s).')
+                if new:
+                    append_embeddings(path, embedding.embed_batch(
+                        new, name=source.key, kind=source.kind))
+                self._record(source, keys)
+                return load_embeddings(path, mmap_mode='r')
+            elif keys.known is not None:
+                warn(f'{source.key}: records were removed since the last export. '
+                     'Embedding it again.')
+
+        if source.cache is None:
+            return embedding.embed_batch(texts, name=source.key, kind=source.kind)
+        return self._embed_checkpointed(embedding, source, texts, keys)
+
+    def _embed_stream(self, embedding, source, texts):
+        """
+        Embeds a lazily parsed source chunk by chunk, writing each chunk
+        to disk as it is done. Rows that could not be embedded are
+        dropped. Append-only sources are handled as in _embed_records.
+
+        :param {Embedding} embedding - The embedding object.
+        :param {Source} source - The source.
+        :param {Iterable} texts - The parsed source.
+        :return {np.ndarray} The embeddings, memory-mapped from disk
+        """
+        path = f'{self.embeddings_path}/{source.cache}'
+        keys = RecordKeys(self._known_keys(source)) if source.append_only else None
 
-        if fb_groups_comments_data:
-            info('Embedding FB groups comments data. This may take a while.')
-            self.fb_groups_comments_embeddings = [
-                embedding.embed(x) for x in fb_groups_comments_data]
+        if keys is not None and keys.known is not None:
+            for chunk in embedding.embed_stream(keys.filter(texts), name=source.key,
+                                                kind=source.kind):
+                append_embeddings(path, chunk[~np.isnan(chunk).any(axis=1)])
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_comments.pickle', 'wb') as f:
-                pickle.dump(self.fb_groups_comments_embeddings, f)
-        else:
-            self.fb_groups_comments_embeddings = []
+            if keys.complete:
+                info(f'{source.key}: {len(keys.keys) - len(keys.known)} new record(s).')
+                self._record(source, keys)
+                return load_embeddings(path, mmap_mode='r')
 
-        if fb_groups_membership_data:
-            info('Embedding FB groups membership data. This may take a while.')
-            self.fb_groups_membership_embeddings = [
-                embedding.embed(x) for x in fb_groups_membership_data]
+            warn(f'{source.key}: records were removed since the last export. '
+                 'Embedding it again.')
+            self.manifest.entries.pop(source.cache)
+            return self._embed_stream(
+                embedding, source, source.parser(self.user, data_path=self.data_path, lazy=True))
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_membership.pickle', 'wb') as f:
-                pickle.dump(self.fb_groups_membership_embeddings, f)
-        else:
-            self.fb_groups_membership_embeddings = []
+        return self._embed_checkpointed(
+            embedding, source, texts if keys is None else keys.filter(texts), keys)
 
-        if fb_groups_posts_data:
-            info('Embedding FB groups posts data. This may take a while.')
-            self.fb_groups_posts_embeddings = [
-                embedding.embed(x) for x in fb_groups_posts_data]
+    def _checkpoint(self, embedding, source) -> Checkpoint:
+        """
+        Opens the checkpoint a source is embedded into, resuming an
+        interrupted run if its inputs and configuration are unchanged.
+        """
+        checkpoint = Checkpoint(f'{self.embeddings_path}/{source.cache}', embedding.dim,
+                                self._inputs(source), self._config(source))
+        if checkpoint.items:
+            info(f'{source.key}: resuming after {checkpoint.items} embedded record(s).')
+        return checkpoint
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_posts.pickle', 'wb') as f:
-                pickle.dump(self.fb_groups_posts_embeddings, f)
-        else:
-            self.fb_groups_posts_embeddings = []
+    def _embed_checkpointed(self, embedding, source, texts, keys=None):
+        """
+        Embeds a source in chunks of chunk_size records, committing each
+        chunk to disk, so that an interrupted run loses at most one
+        chunk. Rows of streamed sources that could not be embedded are
+        dropped.
+
+        :param {Embedding} embedding - The embedding object.
+        :param {Source} source - The source.
+        :param {Iterable} texts - The parsed source.
+        :param {RecordKeys} keys - The keys of an append-only source's
+        records, saved along with the embeddings.
+        :return {np.ndarray} The embeddings, memory-mapped from disk
+        """
+        checkpoint = self._checkpoint(embedding, source)
+        texts = iter(texts)
+
+        # Records embedded by an interrupted run are still read, so
+        # that they are keyed, but not embedded again.
+        for _ in itertools.islice(texts, checkpoint.items):
+            pass
+
+        for chunk in embedding.embed_stream(texts, chunk_size=self.chunk_size,
+                                            name=source.key, kind=source.kind):
+            items = len(chunk)
+            if source.stream:
+                chunk = chunk[~np.isnan(chunk).any(axis=1)]
+            checkpoint.write(chunk, items)
+
+        checkpoint.commit()
+        self._record(source, keys)
+        return load_embeddings(f'{self.embeddings_path}/{source.cache}', mmap_mode='r')
+
+    def _save_report(self):
+        """
+        Saves the run report to saved/reports and logs the costliest
+        sources. When profiling, also merges the profiles.
+        """
+        path = f'{self.data_path}/saved/reports/{self.run_id}.json'
+        self.report.save(path)
+        info(f'Run report saved to {path}. Costliest sources:\n' + self.report.summary(top=10))
 
-        if fb_messages_data:
-            info('Embedding FB Messages data. This may take a while.')
-            self.fb_messages_embeddings = [
-                embedding.embed(x) for x in fb_messages_data]
+        if self.report.profiler is not None:
+            info(f'Merged profile saved to {self.report.profiler.summary()}.')
+            self.report.profiler.close()
 
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_messages.pickle', 'wb') as f:
-                pickle.dump(self.fb_messages_embeddings, f)
-        else:
-            self.fb_messages_embeddings = []
+    @staticmethod
+    def _summary(results: dict) -> str:
+        """
+        Describes mined results, one source per line.
+        """
+        return '\n'.join(f'{key}: {len(value)} item(s).' if hasattr(value, '__len__')
+                         else f'{key}: {value}.' for key, value in results.items())
 
-        if fb_ads_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_ads.pickle', 'wb') as f:
-                self.fb_ads_embeddings = pickle.load(f)
 
-        if fb_apps_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_apps.pickle', 'wb') as f:
-                self.fb_ads_interest_embeddings = pickle.load(f)
+class LazyResults(Mapping):
+    """
+    The results of a miner, mined the first time each one is accessed
+    and kept afterwards. Sources that are never accessed are never read,
+    and the model is only loaded once a source has to be embedded.
+    """
 
-        if fb_posts_apps_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_posts_apps.pickle', 'wb') as f:
-                self.fb_posts_apps_embeddings = pickle.load(f)
+    def __init__(self, miner: DataMiner):
+        """
+        :param {DataMiner} miner - The miner.
+        """
+        self.miner = miner
+        self._keys = miner._result_keys()
+        self._sources = {}
+        self._values = {}
+        self._embedding = None
+
+    @property
+    def embedding(self):
+        """
+        The Embedding of the miner, created on first use.
+        """
+        if self._embedding is None:
+            self._embedding = self.miner._embedding()
+        return self._embedding
 
-        if fb_your_topics_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_topics.pickle', 'wb') as f:
-                self.fb_your_topics_embeddings = pickle.load(f)
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
 
-        if fb_comments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_comments.pickle', 'wb') as f:
-                self.fb_comments_embeddings = pickle.load(f)
+        if key not in self._values:
+            self.materialize([key])
+        return self._values[key]
 
-        if fb_reactions_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_reactions.pickle', 'wb') as f:
-                self.fb_reactions_embeddings = pickle.load(f)
+    def __iter__(self):
+        return iter(self._keys)
 
-        if fb_search_historydata is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_search_history.pickle', 'wb') as f:
-                self.fb_search_history_embeddings = pickle.load(f)
+    def __len__(self):
+        return len(self._keys)
 
-        if fb_saved_posts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_saved_posts.pickle', 'wb') as f:
-                self.fb_saved_posts_embeddings = pickle.load(f)
+    def materialize(self, keys: list = None):
+        """
+        Mines several results at once. Their sources are parsed
+        concurrently, as in mine_data.
 
-        if fb_pages_you_follow_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_pages_you_follow.pickle', 'wb') as f:
-                self.fb_pages_you_follow_embeddings = pickle.load(f)
+        :param {list} keys - The results to mine. If None, all of them.
+        :return {LazyResults} self
+        """
+        keys = self._keys if keys is None else keys
+        missing = [x for x in keys if x not in self._keys]
+        if missing:
+            raise KeyError(missing[0])
+
+        keys = [x for x in keys if x not in self._values]
+        needed = set(key for x in keys for key in self.miner.derived.get(x, [x]))
+        todo = [x for x in self.miner.sources if x.key in needed and x.key not in self._sources]
+
+        parsed = self.miner._parse(todo)
+        for source in todo:
+            embed = source.kind is not None and not self.miner._cached(source)
+            self._sources[source.key] = self.miner._mine_source(
+                self.embedding if embed else None, source, parsed)
+
+        for key in keys:
+            if key in self.miner.derived:
+                self._values[key] = self.miner._derive(key, self._sources,
+                                                       lambda: self.embedding)
+            else:
+                self._values[key] = self._sources[key]
+
+        return self
+
+    def close(self):
+        """
+        Closes the embedding, if one was created, and saves the run
+        report.
+        """
+        if self._embedding is not None:
+            self._embedding.close()
+            self._embedding = None
+        self.miner._save_report()
 
-        if fb_ads_interest_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_ads_interest.pickle', 'wb') as f:
-                self.fb_ads_interest_embeddings = pickle.load(f)
 
-        if fb_friend_peer_group_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_friend_peer_group.pickle', 'wb') as f:
-                self.fb_friend_peer_group_embeddings = pickle.load(f)
+class FbInstaDataMiner(DataMiner):
+    """
+    Mines Instagram data.
+    """
 
-        if fb_groups_comments_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_comments.pickle', 'wb') as f:
-                self.fb_groups_comments_embeddings = pickle.load(f)
+    sources = FB_INSTA_SOURCES
 
-        if fb_groups_membership_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_membership.pickle', 'wb') as f:
-                self.fb_groups_membership_embeddings = pickle.load(f)
+    def mine_data(self, lazy=False):
+        """
+        Mines all data of Instagram and Facebook
 
-        if fb_groups_posts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_groups_posts.pickle', 'wb') as f:
-                self.fb_groups_posts_embeddings = pickle.load(f)
+        :param {bool} lazy - If True, returns a LazyResults that mines
+        each source when it is first accessed. Call its close() when
+        done with it.
+        :return {dict} A dictonary with mined, embedded data
+        """
+        if lazy:
+            self._start_run()
+            return LazyResults(self)
 
-        if fb_messages_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/fb_messages.pickle', 'wb') as f:
-                self.fb_messages_embeddings = pickle.load(f)
-
-        info(f'Embedding complete. Data details:\n' +
-             f'Insta Advertisements Data: {len(self.ads_embeddings)} item(s).\n' +
-             f'Insta Music heard: {len(self.music_heard_embeddings)} item(s).\n' +
-             f'Insta Videos watched: {len(self.videos_watched_embeddings)} item(s).\n' +
-             f'Insta Interests: {len(self.ads_interest_embeddings)} item(s).\n' +
-             f'Insta Topics: {len(self.your_topics_embeddings)} item(s).\n' +
-             f'Insta Reels Topics: {len(self.reels_topics_embeddings)} item(s).\n' +
-             f'Insta Posts Saved: {len(self.reels_sentiments_embeddings)} item(s).\n' +
-             f'Insta Account Searches: {len(self.account_searches_embeddings)} item(s).\n' +
-             f'Insta Memo Data: {len(self.memo_embeddings)} item(s).\n' +
-             f'Insta Liked Comments: {len(self.liked_comments_embeddings)} item(s).\n' +
-             f'Insta Liked Posts: {len(self.liked_posts_embeddings)} item(s). \n' +
-             f'Insta Post Comments: {len(self.post_comments_embeddings)} item(s).\n' +
-             f'Insta Information Submitted: {len(self.info_submitted_embeddings)} item(s).\n' +
-             f'Insta Posts viewed: {len(self.posts_viewed_embeddings)} item(s).\n' +
-             f'Insta Accounts Viewed: {len(self.accounts_viewed_embeddings)} item(s).\n' +
-             f'Insta Accounts based: {len(self.accounts_based_in_embeddings)} item(s).\n' +
-             f'Insta Comments: {len(self.comments_embeddings)} item(s).\n' +
-             f'Insta Cross App Data: {len(self.cross_app_embeddings)} item(s).\n' +
-             f'Insta Emojis: {len(self.emojis_embeddings)} item(s).\n' +
-             f'Insta Polls: {len(self.polls_embeddings)} item(s).\n' +
-             f'Insta Quizzes: {len(self.quizzes_embeddings)} item(s).\n' +
-             f'Insta Archived Posts: {len(self.archived_posts_embeddings)} item(s).\n' +
-             f'Insta Stories: {len(self.stories_embeddings)} item(s). \n' +
-             f'Insta Followers: {len(self.followers_embeddings)} item(s).\n' +
-             f'Insta Following: {len(self.following_embeddings)} item(s).\n' +
-             f'Insta Hided story: {len(self.hide_story_embeddings)} item(s).\n' +
-             f'Insta Messages: {len(self.messages_embeddings)} item(s).\n' +
-             f'FB Advertisements: {len(self.fb_ads_embeddings)} item(s).\n' +
-             f'FB Apps: {len(self.fb_apps_embeddings)} item(s).\n' +
-             f'FB Posts Apps: {len(self.fb_posts_apps_embeddings)} item(s).\n' +
-             f'FB Topics: {len(self.fb_your_topics_embeddings)} item(s).\n' +
-             f'FB Comments: {len(self.fb_comments_embeddings)} item(s).\n' +
-             f'FB Reactions: {len(self.fb_reactions_embeddings)} item(s).\n' +
-             f'FB Search History: {len(self.fb_search_history_embeddings)} item(s).\n' +
-             f'FB Saved posts: {len(self.fb_saved_posts_embeddings)} item(s).\n' +
-             f'FB Pages followed: {len(self.fb_pages_you_follow_embeddings)} item(s).\n' +
-             f'FB Ad interests: {len(self.fb_ads_interest_embeddings)} item(s).\n' +
-             f'FB Friend peer group: {len(self.fb_friend_peer_group_embeddings)} item(s). \n' +
-             f'FB Group comments: {len(self.fb_groups_comments_embeddings)} item(s).\n' +
-             f'FB Group membership: {len(self.fb_groups_membership_embeddings)} item(s).\n' +
-             f'FB Group posts: {len(self.fb_groups_posts_embeddings)} item(s).\n' +
-             f'FB Messages: {len(self.fb_messages_embeddings)} item(s).')
+        embedding = self._embedding()
+        self.results = self._mine(embedding)
+        embedding.close()
 
-        return {
-            'Insta Advertisements Data': self.ads_embeddings,
-            'Insta Music heard': self.music_heard_embeddings,
-            'Insta Videos watched': self.videos_watched_embeddings,
-            'Insta Interests': self.ads_interest_embeddings,
-            'Insta Topics': self.your_topics_embeddings,
-            'Insta Reels Topics': self.reels_topics_embeddings,
-            'Insta Reels Sentiments': self.reels_sentiments_embeddings,
-            'Insta Posts Saved': self.saved_posts_embeddings,
-            'Insta Account Searches': self.account_searches_embeddings,
-            'Insta Memo Data': self.memo_embeddings,
-            'Insta Liked Comments': self.liked_comments_embeddings,
-            'Insta Liked Posts': self.liked_posts_embeddings,
-            'Insta Post Comments': self.post_comments_embeddings,
-            'Insta Information Submitted': self.info_submitted_embeddings,
-            'Insta Posts viewed': self.posts_viewed_embeddings,
-            'Insta Accounts Viewed': self.accounts_viewed_embeddings,
-            'Insta Accounts based': self.accounts_based_in_embeddings,
-            'Insta Comments': self.comments_embeddings,
-            'Insta Cross App Data': self.cross_app_embeddings,
-            'Insta Emojis': self.emojis_embeddings,
-            'Insta Polls': self.polls_embeddings,
-            'Insta Quizzes': self.quizzes_embeddings,
-            'Insta Archived Posts': self.archived_posts_embeddings,
-            'Insta Stories': self.stories_embeddings,
-            'Insta Followers': self.followers_embeddings,
-            'Insta Following': self.following_embeddings,
-            'Insta Hided story': self.hide_story_embeddings,
-            'Insta Messages': self.messages_embeddings,
-            'FB Advertisements': self.fb_ads_embeddings,
-            'FB Apps': self.fb_apps_embeddings,
-            'FB Posts Apps': self.fb_posts_apps_embeddings,
-            'FB Topics': self.fb_your_topics_embeddings,
-            'FB Comments': self.fb_comments_embeddings,
-            'FB Reactions': self.fb_reactions_embeddings,
-            'FB Search History': self.fb_search_history_embeddings,
-            'FB Saved posts': self.fb_saved_posts_embeddings,
-            'FB Pages followed': self.fb_pages_you_follow_embeddings,
-            'FB Ad interests': self.fb_ads_interest_embeddings,
-            'FB Friend peer group': self.fb_friend_peer_group_embeddings,
-            'FB Group comments': self.fb_groups_comments_embeddings,
-            'FB Group membership': self.fb_groups_membership_embeddings,
-            'FB Group posts': self.fb_groups_posts_embeddings,
-            'FB Messages': self.fb_messages_embeddings
-        }
+        info(f'Embedding complete. Data details:\n' + self._summary(self.results))
+        self._save_report()
+        return self.results
 
 
 class GoogleDataMiner(DataMiner):
@@ -950,37 +848,49 @@ class GoogleDataMiner(DataMiner):
     Mines Google data.
     """
 
-    def mine_data(self):
+    sources = GOOGLE_SOURCES
+
+    derived = {
+        'Travel': ['Maps'],
+        'Nearby Places': ['Maps', 'Maps places']
+    }
+
+    def _result_keys(self) -> list:
+        # Fit is summarized in mined_fit_data instead.
+        return [x for x in super()._result_keys() if x != 'Fit']
+
+    def _derive(self, key: str, results, get_embedding):
+        if key == 'Travel':
+            return results['Maps']['total_distance']
+
+        # Join nearby places with data from Maps (your places)
+        with self.report.stage('Nearby Places', 'embed', time.process_time):
+            places = get_embedding().embed_batch(results['Maps']['places'],
+                                                 name='Nearby Places')
+        if len(results['Maps places']):
+            places = np.vstack((places, results['Maps places']))
+        return places
+
+    def mine_data(self, lazy=False):
         """
         Mines all data.
 
+        :param {bool} lazy - If True, returns a LazyResults that mines
+        each source when it is first accessed, and mined_fit_data is not
+        computed. Call its close() when done with it.
         :return {dict} A dictionary with mined, embedded data
         """
-        fit_data = parse_fit_data(self.user, data_path=self.data_path)
-        maps_data = parse_maps_data(self.user, data_path=self.data_path)
-        autofill_data = parse_autofill(self.user, data_path=self.data_path)
-        browser_data = parse_browser_history(
-            self.user, data_path=self.data_path)
-        hangouts_data = parse_hangouts_data(
-            self.user, data_path=self.data_path)
-        mail_data = parse_mail_data(self.user, data_path=self.data_path)
-        maps_places_data = parse_maps(self.user, self.data_path)
-        yt_comments_data = parse_yt_comments(self.user, self.data_path)
-        yt_history_data = parse_yt_watch_history(self.user, self.data_path)
-        yt_subscribed_data = parse_subscribed_channels(
-            self.user, self.data_path)
-        yt_liked_data = parse_liked_videos(self.user, self.data_path)
-        chats_data = parse_chats_data(self.user, self.data_path)
-        movies_data = parse_play_data(self.user, 'movies', self.data_path)
-        apps_data = parse_play_data(self.user, 'apps', self.data_path)
-        transactions_data = parse_pay_data(self.user, self.data_path)
-        activities_data = parse_access_log_data(self.user, self.data_path)
-
-        info('Data parsed.')
+        if lazy:
+            self._start_run()
+            return LazyResults(self)
+
+        embedding = self._embedding()
+        results = self._mine(embedding)
 
         # Extract features from Fit data
         # First, get total distance, total distance in past year,
         # total calories, total calories in past year.
+        fit_data = results.pop('Fit')
         today = datetime.today()
 
         if fit_data:
@@ -1004,185 +914,13 @@ class GoogleDataMiner(DataMiner):
             'total_cal_yr': total_cal_year
         }
 
-        info('Embedding text data. This may take a while.')
-        embedding = Embedding(model='bert-base-uncased')
-
-        if activities_data:
-            self.activities_embeddings = [
-                embedding.embed(x) for x in activities_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/activities.pickle', 'wb') as f:
-                pickle.dump(self.activities_embeddings, f)
-        else:
-            self.activities_embeddings = []
-
-        if apps_data:
-            info('Embedding Google Play Apps data. This may take a while.')
-            self.apps_embeddings = [
-                embedding.embed(x) for x in apps_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/apps.pickle', 'wb') as f:
-                pickle.dump(self.apps_embeddings, f)
-        else:
-            self.apps_embeddings = []
-
-        if autofill_data:
-            self.autofill_place_embeddings = [
-                embedding.embed(x) for x in autofill_data]
-        else:
-            self.autofill_place_embeddings = []
+        sources = {x: results.pop(x) for x in ('Maps', 'Maps places')}
+        for key in self.derived:
+            results[key] = self._derive(key, sources, lambda: embedding)
 
-        if browser_data:
-            self.history_embeddings = [
-                embedding.embed(x) for x in browser_data]
-        else:
-            self.history_embeddings = []
-
-        if hangouts_data:
-            info('Embedding Hangouts data. This may take a while.')
-            self.messages_embeddings = [
-                embedding.embed(x) for x in hangouts_data]
-            self.messages_embeddings = [
-                x for x in self.messages_embeddings if x is not None]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/hangouts.pickle', 'wb') as f:
-                pickle.dump(self.messages_embeddings, f)
-        else:
-            self.messages_embeddings = []
-
-        if chats_data:
-            info('Embedding Google Chat data. This may take a while.')
-            self.chats_embeddings = [
-                embedding.embed(x) for x in chats_data]
-        else:
-            self.chats_embeddings = []
-
-        if mail_data:
-            info('Embedding email data. This may take a while.')
-            self.email_embeddings = [embedding.embed(x) for x in mail_data]
-            self.email_embeddings = [
-                x for x in self.email_embeddings if x is not None]
-
-            # Cache email embeddings
-            with open(f'{self.data_path}/saved/embeddings/mail.pickle', 'wb') as f:
-                pickle.dump(self.email_embeddings, f)
-        else:
-            self.email_embeddings = []
-
-        if movies_data:
-            info('Embedding Google Play Movies data. This may take a while.')
-            self.movies_embeddings = [
-                embedding.embed(x) for x in movies_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/movies.pickle', 'wb') as f:
-                pickle.dump(self.movies_embeddings, f)
-        else:
-            self.movies_embeddings = []
-
-        if transactions_data:
-            info('Embedding Google Pay transaction data. This may take a while.')
-            self.transactions_embeddings = [
-                embedding.embed(x) for x in transactions_data]
-
-            # Cache embeddings
-            with open(f'{self.data_path}/saved/embeddings/pay.pickle', 'wb') as f:
-                pickle.dump(self.transactions_embeddings, f)
-        else:
-            self.transactions_embeddings = []
-
-        self.distance_traveled = maps_data['total_distance']
-        self.nearby_places_embeddings = [
-            embedding.embed(x) for x in maps_data['places']]
-        self.maps_places_embeddings = [
-            embedding.embed(x) for x in maps_places_data
-        ]
-        self.yt_comments_embeddings = [
-            embedding.embed(x) for x in yt_comments_data
-        ]
-        self.yt_history_embeddings = [
-            embedding.embed(x) for x in yt_history_data
-        ]
-        self.yt_subscribed_embeddings = [
-            embedding.embed(x) for x in yt_subscribed_data
-        ]
-        self.yt_liked_embeddings = [
-            embedding.embed(x) for x in yt_liked_data
-        ]
+        embedding.close()
+        self.results = results
 
-        # Join nearby places with data from Maps (your places)
-        self.nearby_places_embeddings = np.vstack(
-            (self.nearby_places_embeddings, self.maps_places_embeddings))
-
-        if activities_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/activities.pickle', 'rb') as f:
-                self.activities_embeddings = pickle.load(f)
-
-        if apps_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/apps.pickle', 'rb') as f:
-                self.apps_embeddings = pickle.load(f)
-
-        if chats_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/chat.pkl', 'rb') as f:
-                self.chats_embeddings = pickle.load(f)
-
-        if hangouts_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/hangouts.pickle', 'rb') as f:
-                self.messages_embeddings = pickle.load(f)
-
-        if mail_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/mail.pickle', 'rb') as f:
-                self.email_embeddings = pickle.load(f)
-
-        if movies_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/movies.pickle', 'rb') as f:
-                self.movies_embeddings = pickle.load(f)
-
-        if transactions_data is None:
-            # Load cached embeddings
-            with open(f'{self.data_path}/saved/embeddings/pay.pickle', 'rb') as f:
-                self.transactions_embeddings = pickle.load(f)
-
-        info(f'Embedding complete. Data details:\n' +
-             f'Activities: {len(self.activities_embeddings)} item(s).\n' +
-             f'Apps: {len(self.apps_embeddings)} item(s).\n' +
-             f'Autofill: {len(self.autofill_place_embeddings)} item(s).\n' +
-             f'Browser history: {len(self.history_embeddings)} item(s).\n' +
-             f'Hangouts: {len(self.messages_embeddings)} item(s).\n' +
-             f'Google Chat: {len(self.chats_embeddings)} item(s).\n' +
-             f'Google Pay Transactions: {len(self.transactions_embeddings)} item(s).\n' +
-             f'Monthly travel estimate: {self.distance_traveled} km.\n' +
-             f'Nearby places: {len(self.nearby_places_embeddings)} item(s).\n' +
-             f'Email: {len(self.email_embeddings)} item(s).\n' +
-             f'Movies: {len(self.movies_embeddings)} item(s). \n' +
-             f'YouTube comments: {len(self.yt_comments_embeddings)} item(s).\n' +
-             f'YouTube subscriptions: {len(self.yt_subscribed_embeddings)} item(s).\n' +
-             f'YouTube liked videos: {len(self.yt_liked_embeddings)} item(s).\n' +
-             f'YouTube watch history: {len(self.yt_history_embeddings)} item(s).')
-
-        return {
-            'Activities': self.activities_embeddings,
-            'Apps': self.apps_embeddings,
-            'Autofill': self.autofill_place_embeddings,
-            'Browser History': self.history_embeddings,
-            'Chat': self.chats_embeddings,
-            'Hangouts': self.messages_embeddings,
-            'Travel': self.distance_traveled,
-            'Nearby Places': self.nearby_places_embeddings,
-            'Email': self.email_embeddings,
-            'Movies': self.movies_embeddings,
-            'Pay Transactions': self.transactions_embeddings,
-            'YouTube comments': self.yt_comments_embeddings,
-            'YouTube subscriptions': self.yt_subscribed_embeddings,
-            'YouTube liked videos': self.yt_liked_embeddings,
-            'YouTube watch history': self.yt_history_embeddings
-        }
+        info(f'Embedding complete. Data details:\n' + self._summary(self.results))
+        self._save_report()
+        return self.results
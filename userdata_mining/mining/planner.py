@@ -0,0 +1,310 @@
+import glob
+import json
+import os
+import re
+from userdata_mining.mining.sources import FB_INSTA_SOURCES, GOOGLE_SOURCES
+
+
+#: The directories of data/<user> that exports are unpacked into.
+ROOTS = ('Takeout', 'Instagram', 'Facebook')
+
+#: The benchmark corpus most like the texts of each text source. Other
+#: text sources hold short titles.
+CORPORA = {
+    'Chat': 'chat',
+    'Hangouts': 'chat',
+    'Insta Messages': 'chat',
+    'FB Messages': 'chat',
+    'YouTube comments': 'chat',
+    'Email': 'email'
+}
+
+# Strings, whose contents are skipped, and structural characters.
+_JSON_TOKENS = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{},]')
+
+
+def _longest_json_array(data: bytes) -> int:
+    """
+    Returns the number of elements in the longest array of a JSON
+    document, or of the part of one that was read.
+    """
+    # One [is_array, commas, has_values] entry per open container.
+    stack = []
+    longest = 0
+
+    def length(entry):
+        return entry[1] + 1 if entry[0] and (entry[1] or entry[2]) else 0
+
+    for match in _JSON_TOKENS.finditer(data):
+        token = match.group()
+        if token in (b'[', b'{'):
+            if stack and stack[-1][0]:
+                stack[-1][2] = True
+            stack.append([token == b'[', 0, False])
+        elif token in (b']', b'}'):
+            if stack:
+                longest = max(longest, length(stack.pop()))
+        elif token == b',':
+            if stack:
+                stack[-1][1] += 1
+        elif stack and stack[-1][0]:
+            stack[-1][2] = True
+
+    return max([longest] + [length(x) for x in stack])
+
+
+def estimate_records(path: str, sample_bytes: int = 1 << 20) -> int:
+    """
+    Estimates the number of records in an exported file without parsing
+    it: 'From ' lines in an mbox, the length of the longest array in a
+    JSON file, lines in a CSV file, and list items or links in an HTML
+    page. Other files count as one record. Only the first sample_bytes
+    are read, and the count is scaled up to the size of the file.
+
+    :param {str} path - Path to the file.
+    :param {int} sample_bytes - Number of bytes read.
+    :return {int} The estimated number of records
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.mbox', '.json', '.csv', '.html', '.htm'):
+        return 1
+
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    if not sample:
+        return 0
+
+    if extension == '.mbox':
+        count = sample.count(b'\nFrom ') + sample.startswith(b'From ')
+    elif extension == '.json':
+        count = _longest_json_array(sample)
+    elif extension == '.csv':
+        # Lines after the header.
+        count = max(0, sample.count(b'\n') - 1 + (not sample.endswith(b'\n')))
+    else:
+        count = sample.count(b'<li') or sample.count(b'<a ')
+
+    if len(sample) < size:
+        count = round(count * size / len(sample))
+    return count
+
+
+def load_throughput(data_path='.', benchmark: str = None, model: str = 'bert-base-uncased',
+                    reports: int = 20) -> dict:
+    """
+    Collects measured throughput to project mining time from: the run
+    reports of earlier runs in saved/reports, which give bytes parsed
+    and rows embedded per second for each source, and a report written
+    by benchmark_suite, which gives sentences embedded per second for
+    each corpus and the peak memory of the model.
+
+    :param {str} data_path - Path to the data/ folder.
+    :param {str} benchmark - Path to a benchmark_suite report, if any.
+    :param {str} model - The model whose benchmark results are used.
+    :param {int} reports - Number of recent run reports read.
+    :return {dict} Rates per source and per corpus, and the model's
+    peak RSS in MB, or None if unknown
+    """
+    throughput = {'sources': {}, 'corpora': {}, 'model_rss_mb': None}
+
+    if benchmark is not None:
+        with open(benchmark, 'r') as f:
+            results = [x for x in json.load(f)['results'] if x['model'] == model]
+
+        # The best batch configuration of each corpus.
+        for result in results:
+            corpus = result['corpus']
+            throughput['corpora'][corpus] = max(throughput['corpora'].get(corpus, 0),
+                                                result['sentences_per_sec'])
+        if results:
+            throughput['model_rss_mb'] = max(x['peak_rss_mb'] for x in results)
+
+    # Later reports replace the rates of earlier ones.
+    for path in sorted(glob.glob(f'{data_path}/saved/reports/*.json'),
+                       key=os.path.getmtime)[-reports:]:
+        with open(path, 'r') as f:
+            stages = json.load(f)['stages']
+
+        for stage in stages:
+            rates = throughput['sources'].setdefault(stage['source'], {})
+            if stage['wall_time'] <= 0:
+                continue
+
+            if stage['stage'] == 'parse' and stage.get('input_bytes'):
+                rates['parse'] = stage['input_bytes'] / stage['wall_time']
+            elif stage['stage'] == 'embed' and stage.get('rows') and \
+                    stage.get('cache_hits', 0) <= stage.get('cache_misses', 0):
+                # Runs served mostly from the embedding cache are not
+                # representative.
+                rates['embed'] = stage['rows'] / stage['wall_time']
+
+    return throughput
+
+
+def plan_source(source, base: str, throughput: dict, dim: int = 768,
+                chunk_size: int = 1024) -> dict:
+    """
+    Estimates the cost of mining one source from scratch.
+
+    :param {Source} source - The source.
+    :param {str} base - The user's directory, data/<user>.
+    :param {dict} throughput - As returned by load_throughput.
+    :param {int} dim - The embedding length.
+    :param {int} chunk_size - Records embedded at a time by streamed
+    sources.
+    :return {dict} Input files and bytes, estimated records, projected
+    parse and embed seconds (None if no rate is known), and memory in MB
+    besides the model
+    """
+    files = set()
+    for pattern in source.inputs:
+        files.update(glob.glob(f'{glob.escape(base)}/{pattern}', recursive=True))
+    files = sorted(x for x in files if os.path.isfile(x))
+
+    size = sum(os.path.getsize(x) for x in files)
+    records = sum(estimate_records(x) for x in files)
+    rates = throughput['sources'].get(source.key, {})
+    corpus_rate = throughput['corpora'].get(CORPORA.get(source.key, 'titles'))
+
+    parse = size / rates['parse'] if 'parse' in rates else None
+    if source.kind is None:
+        embed = 0.
+    elif 'embed' in rates:
+        embed = records / rates['embed']
+    elif source.kind != 'text':
+        # Encoded without the model; cheap next to parsing.
+        embed = 0.
+    elif corpus_rate:
+        embed = records / corpus_rate
+    else:
+        embed = None
+
+    # Parsed records are held as text; embeddings of streamed sources
+    # are held one chunk at a time.
+    rows = 0 if source.kind is None else min(records, chunk_size) if source.stream else records
+    memory = (rows * dim * 4 + (0 if source.stream else size)) / 2 ** 20
+
+    return {
+        'source': source.key,
+        'files': [os.path.relpath(x, base) for x in files],
+        'bytes': size,
+        'records': records,
+        'parse_seconds': parse,
+        'embed_seconds': embed,
+        'seconds': None if embed is None else (parse or 0.) + embed,
+        'memory_mb': memory
+    }
+
+
+def plan_user(user: str, data_path='.', throughput: dict = None, sources: list = None,
+              dim: int = 768, chunk_size: int = 1024) -> dict:
+    """
+    Inventories a user's exports and estimates the cost of mining them,
+    without parsing or embedding anything.
+
+    :param {str} user - The user directory.
+    :param {str} data_path - Path to the data/ folder.
+    :param {dict} throughput - As returned by load_throughput. If None,
+    it is loaded from data_path.
+    :param {list} sources - The sources to plan. If None, every Google,
+    Facebook and Instagram source.
+    :param {int} dim - The embedding length.
+    :param {int} chunk_size - Records embedded at a time by streamed
+    sources.
+    :return {dict} The plan of each source, longest first, totals, and
+    the files in the exports that no source reads
+    """
+    base = f'{data_path}/data/{user}'
+    throughput = load_throughput(data_path) if throughput is None else throughput
+    sources = GOOGLE_SOURCES + FB_INSTA_SOURCES if sources is None else sources
+
+    plans = [plan_source(x, base, throughput, dim, chunk_size) for x in sources]
+    read = set(x for plan in plans for x in plan['files'])
+
+    unread = []
+    for root in ROOTS:
+        for directory, _, files in os.walk(f'{base}/{root}'):
+            unread.extend(os.path.relpath(os.path.join(directory, x), base) for x in files)
+    unread = [x for x in unread if x not in read]
+
+    seconds = [x['seconds'] for x in plans]
+    model = throughput['model_rss_mb']
+    return {
+        'user': user,
+        'records': sum(x['records'] for x in plans),
+        'bytes': sum(x['bytes'] for x in plans),
+        'seconds': None if None in seconds else sum(seconds),
+        'peak_memory_mb': None if model is None else
+        model + max([x['memory_mb'] for x in plans] + [0]),
+        'sources': longest_first(plans),
+        'unread_files': len(unread),
+        'unread_bytes': sum(os.path.getsize(f'{base}/{x}') for x in unread)
+    }
+
+
+def longest_first(plans: list) -> list:
+    """
+    Orders plans of sources or users so that the longest is mined first.
+    Plans without a projected time are ordered by their records.
+
+    :param {list} plans - As returned by plan_source or plan_user.
+    """
+    return sorted(plans, key=lambda x: (x['seconds'] or 0., x['records']), reverse=True)
+
+
+def order_sources(sources: list, base: str, throughput: dict, chunk_size: int = 1024,
+                  plans: dict = None) -> list:
+    """
+    Orders sources so that the longest is mined first. Unlike plan_user,
+    only the given sources are planned, and the rest of the export is
+    not walked.
+
+    :param {list} sources - The sources.
+    :param {str} base - The user's directory, data/<user>.
+    :param {dict} throughput - As returned by load_throughput.
+    :param {int} chunk_size - Passed to plan_source.
+    :param {dict} plans - Plans of sources made earlier, keyed by source
+    name. Sources found in it are not planned again, and new plans are
+    added to it.
+    :return {list} The sources, longest first
+    """
+    plans = {} if plans is None else plans
+    for source in sources:
+        if source.key not in plans:
+            plans[source.key] = plan_source(source, base, throughput, chunk_size=chunk_size)
+
+    order = [x['source'] for x in longest_first([plans[x.key] for x in sources])]
+    return sorted(sources, key=lambda x: order.index(x.key))
+
+
+def format_plan(plan: dict) -> str:
+    """
+    Formats a user's plan as a table with one row per source that has
+    input files, longest first.
+
+    :param {dict} plan - As returned by plan_user.
+    :return {str} The table
+    """
+    def seconds(value):
+        return '-' if value is None else f'{value:.1f}'
+
+    rows = [x for x in plan['sources'] if x['files']]
+    width = max([len(x['source']) for x in rows] + [6])
+
+    lines = [f'{"Source":<{width}}  {"Files":>6}  {"MB":>8}  {"Records":>9}  '
+             f'{"Parse s":>8}  {"Embed s":>8}  {"Mem MB":>8}']
+    for row in rows:
+        lines.append(f'{row["source"]:<{width}}  {len(row["files"]):>6}  '
+                     f'{row["bytes"] / 2 ** 20:>8.1f}  {row["records"]:>9}  '
+                     f'{seconds(row["parse_seconds"]):>8}  {seconds(row["embed_seconds"]):>8}  '
+                     f'{row["memory_mb"]:>8.0f}')
+
+    memory = plan['peak_memory_mb']
+    lines.append(f'{plan["user"]}: {plan["records"]} record(s), {plan["bytes"] / 2 ** 20:.1f} MB, '
+                 f'{seconds(plan["seconds"])}s, peak memory '
+                 f'{"-" if memory is None else f"{memory:.0f}"} MB. '
+                 f'{plan["unread_files"]} file(s) ({plan["unread_bytes"] / 2 ** 20:.1f} MB) '
+                 'are not read by any source.')
+    return '\n'.join(lines)
+
@@ -0,0 +1,191 @@
+from functools import partial
+from userdata_mining.mining.access_log import parse_access_log_data
+from userdata_mining.mining.chrome import parse_autofill, parse_browser_history
+from userdata_mining.mining.facebook import *
+from userdata_mining.mining.fit import parse_fit_data
+from userdata_mining.mining.google_chat import parse_chats_data
+from userdata_mining.mining.google_pay import parse_pay_data
+from userdata_mining.mining.google_play import parse_play_data
+from userdata_mining.mining.hangouts import parse_hangouts_data
+from userdata_mining.mining.instagram import *
+from userdata_mining.mining.mail import parse_mail_data
+from userdata_mining.mining.maps import parse_maps_data
+from userdata_mining.mining.maps_your_places import parse_maps
+from userdata_mining.mining.youtube import parse_yt_comments, parse_yt_watch_history
+from userdata_mining.mining.youtube import parse_subscribed_channels, parse_liked_videos
+
+
+class Source:
+    """
+    A source of user data: how it is parsed, where its embeddings are
+    cached and how its items are embedded.
+    """
+
+    def __init__(self, key: str, parser, cache: str = None, kind: str = 'text',
+                 io_bound: bool = True, stream: bool = False, inputs: list = (),
+                 version: int = 1, append_only: bool = False):
+        """
+        Declares a source.
+
+        :param {str} key - The source name in the mined profile.
+        :param {Callable} parser - Called as parser(user, data_path=...).
+        Must be picklable, i.e. a module-level function or a partial of
+        one, so that it can run in a worker process.
+        :param {str} cache - Name of the cached embeddings in
+        saved/embeddings, without an extension. If None, the source is
+        embedded on every run.
+        :param {str} kind - Passed to Embedding.embed_batch. If None,
+        the parsed value is kept as is and not embedded.
+        :param {bool} io_bound - Whether parsing mostly waits on files or
+        the network, and so runs in a thread rather than a process.
+        :param {bool} stream - If True, the parser also takes lazy=True
+        and is consumed chunk by chunk while embedding, instead of being
+        parsed up front.
+        :param {list} inputs - Glob patterns of the files the parser
+        reads, relative to data/<user>/. Cached embeddings are reused
+        only while these files are unchanged.
+        :param {int} version - The parser version. Bump it when the
+        parser changes what it returns, so that cached embeddings are
+        rebuilt.
+        :param {bool} append_only - Whether new exports of the source
+        only add records to older ones, as with histories and messages.
+        If so, only the new records are embedded and appended to the
+        cache.
+        """
+        self.key = key
+        self.parser = parser
+        self.cache = cache
+        self.kind = kind
+        self.io_bound = io_bound
+        self.stream = stream
+        self.inputs = list(inputs)
+        self.version = version
+        self.append_only = append_only
+
+    def __repr__(self):
+        return f'Source({self.key!r})'
+
+
+FB_INSTA_SOURCES = [
+    Source('Insta Advertisements Data', parse_insta_ads_viewed, 'insta_ads', 'identifier',
+           inputs=['Instagram/ads_and_content/ads_viewed.json']),
+    Source('Insta Music heard', parse_insta_music_heard, 'insta_music',
+           inputs=['Instagram/ads_and_content/music_heard_in_stories.json']),
+    Source('Insta Videos watched', parse_insta_videos_watched, 'insta_videos', 'identifier',
+           inputs=['Instagram/ads_and_content/videos_watched.json']),
+    Source('Insta Interests', parse_insta_ads_interest, 'insta_ads_interest',
+           inputs=['Instagram/information_about_you/ads_interests.json']),
+    Source('Insta Topics', parse_insta_your_topics, 'insta_topics',
+           inputs=['Instagram/your_topics/your_topics.json']),
+    Source('Insta Reels Topics', parse_insta_your_reels_topics, 'insta_reels_topics',
+           inputs=['Instagram/your_topics/your_reels_topics.json']),
+    Source('Insta Reels Sentiments', parse_insta_your_reels_sentiments, 'insta_reels_sentiments',
+           inputs=['Instagram/your_topics/your_reels_topics.json']),
+    Source('Insta Posts Saved', parse_insta_saved_posts, 'insta_saved_posts', 'identifier',
+           inputs=['Instagram/saved/saved_posts.json']),
+    Source('Insta Account Searches', parse_insta_account_searches, 'insta_account_searches',
+           'identifier', inputs=['Instagram/recent_searches/account_searches.json']),
+    Source('Insta Memo Data', parse_insta_monetization_eligibility, 'insta_memo_data',
+           'categorical', inputs=['Instagram/monetization/eligibility.json']),
+    Source('Insta Liked Comments', parse_insta_liked_comments, 'insta_liked_comments',
+           'identifier', inputs=['Instagram/likes/liked_comments.json']),
+    Source('Insta Liked Posts', parse_insta_liked_posts, 'insta_liked_posts', 'identifier',
+           inputs=['Instagram/likes/liked_posts.json']),
+    Source('Insta Post Comments', parse_insta_post_comments, 'insta_post_comments',
+           inputs=['Instagram/comments/post_comments.json']),
+    Source('Insta Information Submitted', parse_insta_information_submitted,
+           'insta_info_submitted',
+           inputs=["Instagram/ads_and_businesses/information_you've_submitted_to_advertisers.json"]),
+    Source('Insta Posts viewed', parse_insta_posts_viewed, 'insta_posts_viewed', 'identifier',
+           inputs=['Instagram/ads_and_content/posts_viewed.json']),
+    Source('Insta Accounts Viewed', parse_insta_suggested_accounts_viewed, 'insta_accounts_viewed',
+           'identifier', inputs=['Instagram/ads_and_content/suggested_accounts_viewed.json']),
+    Source('Insta Accounts based', parse_insta_account_based_in, 'insta_accounts_based',
+           'categorical', inputs=['Instagram/information_about_you/account_based_in.json']),
+    Source('Insta Comments', parse_insta_comments_allowed_from, 'insta_comments_data',
+           'categorical', inputs=['Instagram/comments_settings/comments_allowed_from.json']),
+    Source('Insta Cross App Data', parse_insta_use_cross_app_messaging, 'insta_cross_app',
+           'categorical', inputs=['Instagram/comments_settings/use_cross-app_messaging.json']),
+    Source('Insta Emojis', parse_insta_emoji_sliders, 'insta_emojis', 'identifier',
+           inputs=['Instagram/story_sticker_interactions/emoji_sliders.json']),
+    Source('Insta Polls', parse_insta_polls, 'insta_polls', 'identifier',
+           inputs=['Instagram/story_sticker_interactions/polls.json']),
+    Source('Insta Quizzes', parse_insta_quizzes, 'insta_quizzes', 'identifier',
+           inputs=['Instagram/story_sticker_interactions/quizzes.json']),
+    Source('Insta Archived Posts', parse_insta_archived_posts, 'insta_archived_posts',
+           inputs=['Instagram/content/archived_posts.json']),
+    Source('Insta Stories', parse_insta_stories, 'insta_stories',
+           inputs=['Instagram/content/stories.json']),
+    Source('Insta Followers', parse_insta_followers, 'insta_followers', 'identifier',
+           inputs=['Instagram/followers_and_following/followers.json']),
+    Source('Insta Following', parse_insta_following, 'insta_following', 'identifier',
+           inputs=['Instagram/followers_and_following/following.json']),
+    Source('Insta Hided story', parse_insta_hide_story_from, 'insta_hide_story', 'identifier',
+           inputs=['Instagram/followers_and_following/hide_story_from.json']),
+    Source('Insta Messages', parse_insta_messages, 'insta_messgaes', io_bound=False,
+           append_only=True, inputs=['Instagram/messages/inbox/*/message_1.json']),
+    Source('FB Advertisements', parse_fb_advertisers, 'fb_ads', 'identifier',
+           inputs=['Facebook/ads_information/advertisers_who_uploaded_a_contact_list_with_your_information.json']),
+    Source('FB Apps', parse_fb_apps_and_websites, 'fb_apps',
+           inputs=['Facebook/apps_and_websites_off_of_facebook/apps_and_websites.json']),
+    Source('FB Posts Apps', parse_fb_posts_from_apps_and_websites, 'fb_posts_apps',
+           inputs=['Facebook/apps_and_websites_off_of_facebook/posts_from_apps_and_websites.json']),
+    Source('FB Topics', parse_fb_your_topics, 'fb_topics',
+           inputs=['Facebook/your_topics/your_topics.json']),
+    Source('FB Comments', parse_fb_comments, 'fb_comments',
+           inputs=['Facebook/comments_and_reactions/comments.json']),
+    Source('FB Reactions', parse_fb_reactions, 'fb_reactions',
+           inputs=['Facebook/comments_and_reactions/posts_and_comments.json']),
+    Source('FB Search History', parse_fb_search_history, 'fb_search_history',
+           inputs=['Facebook/search/your_search_history.json']),
+    Source('FB Saved posts', parse_fb_pages_you_follow, 'fb_saved_posts',
+           inputs=['Facebook/pages/pages_you_follow.json']),
+    Source('FB Pages followed', parse_fb_pages_you_liked, 'fb_pages_you_follow',
+           inputs=["Facebook/pages/pages_you've_liked.json"]),
+    Source('FB Ad interests', parse_fb_ads_interest, 'fb_ads_interest',
+           inputs=['Facebook/other_logged_information/ads_interests.json']),
+    Source('FB Friend peer group', parse_fb_friend_peer_group, 'fb_friend_peer_group',
+           'categorical', inputs=['Facebook/other_logged_information/friend_peer_group.json']),
+    Source('FB Group comments', parse_fb_groups_comments, 'fb_groups_comments',
+           inputs=['Facebook/groups/your_comments_in_groups.json']),
+    Source('FB Group membership', parse_fb_groups_membership, 'fb_groups_membership',
+           inputs=['Facebook/groups/your_group_membership_activity.json']),
+    Source('FB Group posts', parse_fb_groups_posts, 'fb_groups_posts',
+           inputs=['Facebook/groups/your_posts_in_groups.json']),
+    Source('FB Messages', parse_fb_messages, 'fb_messages', io_bound=False,
+           append_only=True, inputs=['Facebook/messages/inbox/*/message_1.json'])
+]
+
+# 'Fit' and 'Maps' are raw values that GoogleDataMiner turns into the
+# travel estimate and nearby places.
+GOOGLE_SOURCES = [
+    Source('Fit', parse_fit_data, kind=None, io_bound=False, inputs=['Takeout/Fit/Activities/*']),
+    Source('Maps', parse_maps_data, kind=None,
+           inputs=['Takeout/Maps/My labeled places/Labeled places.json']),
+    Source('Activities', parse_access_log_data, 'activities', 'identifier', append_only=True,
+           inputs=['Takeout/Access Log Activity/Activities - A list of Google services accessed by.csv']),
+    Source('Apps', partial(parse_play_data, library_type='apps'), 'apps',
+           inputs=['Takeout/Google Play Store/Library.json']),
+    Source('Autofill', parse_autofill, 'autofill', inputs=['Takeout/Chrome/Autofill.json']),
+    Source('Browser History', parse_browser_history, 'browser_history', io_bound=False,
+           append_only=True, inputs=['Takeout/Chrome/BrowserHistory.json']),
+    Source('Chat', parse_chats_data, 'chat',
+           append_only=True, inputs=['Takeout/Google Chat/Groups/**/messages.json']),
+    Source('Hangouts', parse_hangouts_data, 'hangouts', stream=True,
+           append_only=True, inputs=['Takeout/Hangouts/Hangouts.json']),
+    Source('Maps places', parse_maps, 'maps_places', inputs=['Reviews.json']),
+    Source('Email', parse_mail_data, 'mail', stream=True,
+           append_only=True, inputs=['Takeout/Mail/All mail Including Spam and Trash.mbox']),
+    Source('Movies', partial(parse_play_data, library_type='movies'), 'movies',
+           inputs=['Takeout/Google Play Store/Library.json']),
+    Source('Pay Transactions', parse_pay_data, 'pay',
+           append_only=True, inputs=['Takeout/Google Pay/Google transactions/transactions_*.csv']),
+    Source('YouTube comments', parse_yt_comments, 'yt_comments', io_bound=False, append_only=True,
+           inputs=['Takeout/YouTube and YouTube Music/my-comments/my-comments.html']),
+    Source('YouTube subscriptions', parse_subscribed_channels, 'yt_subscriptions',
+           inputs=['Takeout/YouTube and YouTube Music/subscriptions/subscriptions.json']),
+    Source('YouTube liked videos', parse_liked_videos, 'yt_liked',
+           inputs=['Takeout/YouTube and YouTube Music/playlists/Liked videos.csv']),
+    Source('YouTube watch history', parse_yt_watch_history, 'yt_history', io_bound=False,
+           append_only=True, inputs=['Takeout/YouTube and YouTube Music/history/watch-history.html'])
+]
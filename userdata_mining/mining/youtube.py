@@ -1,7 +1,8 @@
 import csv
 
 from bs4 import BeautifulSoup
-from userdata_mining.utils import get_key, warn
+from userdata_mining.utils import get_cache_path, get_key, warn
+from userdata_mining.utils.instrumentation import count
 from googleapiclient.discovery import build
 import os
 import ast
@@ -76,7 +77,7 @@ def parse_liked_videos(user, data_path='.'):
     :param {str} data_path - Path to the data/ directory, NOT ending in a /.
     :return {list} List of titles of liked videos
     """
-    cache_dir = f'{data_path}/caches/.yt.cache'
+    cache_dir = get_cache_path('yt', user, data_path)
 
     # Check for a cache
     if os.path.exists(cache_dir):
@@ -104,6 +105,7 @@ def parse_liked_videos(user, data_path='.'):
     liked_video_titles = []
     for i in liked_video_ids:
         res = youtube.videos().list(part='snippet', id=i).execute()
+        count('api_calls')
         if(res['items'] != []):
             stats = res['items'][0]['snippet']['title']
             liked_video_titles.append(stats)
@@ -0,0 +1,237 @@
+import json
+import os
+import resource
+import threading
+import time
+from datetime import datetime
+
+
+# The stages open in each thread, innermost last.
+_local = threading.local()
+
+
+def _peak_rss() -> float:
+    """
+    Returns the peak resident set size of this process so far, in MB.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def count(name: str, value: int = 1):
+    """
+    Adds to a counter of the innermost stage open in this thread, such
+    as the number of API calls made by a parser. Does nothing outside a
+    stage.
+
+    :param {str} name - The counter name.
+    :param {int} value - The amount to add.
+    """
+    stages = getattr(_local, 'stages', None)
+    if stages:
+        stages[-1].count(name, value)
+
+
+class Stage:
+    """
+    Measures one stage of mining a source, such as parsing or embedding
+    it: wall time, CPU time, growth of the peak RSS, and counters added
+    with count(). Used as a context manager.
+
+    Stages are plain data, so they can be returned from worker
+    processes.
+    """
+
+    def __init__(self, source: str, name: str, cpu_clock=time.thread_time, report=None,
+                 profiler=None):
+        """
+        :param {str} source - The source name.
+        :param {str} name - The stage name.
+        :param {Callable} cpu_clock - The CPU clock. The default only
+        counts this thread, so that concurrent parsers are told apart;
+        stages that use several threads, such as embedding, pass
+        time.process_time.
+        :param {RunReport} report - If given, the stage is added to it
+        when it exits.
+        :param {Profiler} profiler - If given, the stage is also
+        profiled.
+        """
+        self.source = source
+        self.name = name
+        self.wall_time = 0.
+        self.cpu_time = 0.
+        self.peak_rss_delta = 0.
+        self.counters = {}
+        self._cpu_clock = cpu_clock
+        self._report = report
+        self._profiler = profiler
+
+    def count(self, name: str, value: int = 1):
+        """
+        Adds to a counter.
+
+        :param {str} name - The counter name.
+        :param {int} value - The amount to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def __enter__(self):
+        if not hasattr(_local, 'stages'):
+            _local.stages = []
+        _local.stages.append(self)
+
+        if self._profiler is not None:
+            self._profiling = self._profiler.start()
+        self._start = (time.perf_counter(), self._cpu_clock(), _peak_rss())
+        return self
+
+    def __exit__(self, *args):
+        wall, cpu, rss = self._start
+        self.wall_time += time.perf_counter() - wall
+        self.cpu_time += self._cpu_clock() - cpu
+        self.peak_rss_delta = max(self.peak_rss_delta, _peak_rss() - rss)
+        _local.stages.remove(self)
+
+        if self._profiler is not None:
+            self._profiler.stop(self._profiling, self.source, self.name)
+        if self._report is not None:
+            self._report.add(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_cpu_clock', '_report', '_profiler', '_profiling', '_start'):
+            state.pop(name, None)
+        return state
+
+    def to_dict(self) -> dict:
+        return {
+            'source': self.source,
+            'stage': self.name,
+            'wall_time': round(self.wall_time, 4),
+            'cpu_time': round(self.cpu_time, 4),
+            'peak_rss_delta_mb': round(self.peak_rss_delta, 1),
+            **self.counters
+        }
+
+
+def measured(source: str, name: str, func, *args, **kwargs):
+    """
+    Calls a function inside a new stage. Module-level, so that it can be
+    sent to a process pool.
+
+    :param {str} source - The source name.
+    :param {str} name - The stage name.
+    :param {Callable} func - The function to call with args and kwargs.
+    :return {tuple} The result, and the Stage
+    """
+    with Stage(source, name) as stage:
+        result = func(*args, **kwargs)
+    return result, stage
+
+
+class RunReport:
+    """
+    Collects the stages of a run. Stages with the same source and name,
+    such as the chunks of a pipelined source, are merged.
+    """
+
+    def __init__(self, profiler=None):
+        """
+        :param {Profiler} profiler - If given, every stage opened with
+        stage() is also profiled.
+        """
+        self.profiler = profiler
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.stages = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def stage(self, source: str, name: str, cpu_clock=time.thread_time) -> Stage:
+        """
+        Returns a new stage that is added to the report when it exits.
+
+        :param {str} source - The source name.
+        :param {str} name - The stage name.
+        :param {Callable} cpu_clock - Passed to Stage.
+        """
+        return Stage(source, name, cpu_clock, report=self, profiler=self.profiler)
+
+    def add(self, stage: Stage):
+        """
+        Adds a finished stage, merging it with an earlier one of the same
+        source and name.
+
+        :param {Stage} stage - The stage.
+        """
+        with self._lock:
+            key = (stage.source, stage.name)
+            if key not in self.stages:
+                self.stages[key] = Stage(stage.source, stage.name)
+            merged = self.stages[key]
+
+            merged.wall_time += stage.wall_time
+            merged.cpu_time += stage.cpu_time
+            merged.peak_rss_delta = max(merged.peak_rss_delta, stage.peak_rss_delta)
+            for name, value in stage.counters.items():
+                merged.count(name, value)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the report as JSON-serializable data.
+        """
+        stages = [x.to_dict() for x in self.stages.values()]
+        for row in stages:
+            lookups = row.get('cache_hits', 0) + row.get('cache_misses', 0)
+            if lookups:
+                row['cache_hit_rate'] = round(row.get('cache_hits', 0) / lookups, 4)
+
+        return {
+            'started': self.started,
+            'wall_time': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': round(_peak_rss(), 1),
+            'stages': stages
+        }
+
+    def save(self, path: str):
+        """
+        Writes the report as JSON.
+
+        :param {str} path - Path to the report file.
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self, top: int = None) -> str:
+        """
+        Formats the report as a table with one row per source, costliest
+        first.
+
+        :param {int} top - If given, only this many sources are listed.
+        :return {str} The table
+        """
+        sources = {}
+        for stage in self.stages.values():
+            row = sources.setdefault(stage.source, {'wall': 0., 'cpu': 0., 'rss': 0.,
+                                                    'items': 0, 'hits': 0, 'lookups': 0})
+            row['wall'] += stage.wall_time
+            row['cpu'] += stage.cpu_time
+            row['rss'] = max(row['rss'], stage.peak_rss_delta)
+            row['items'] = max(row['items'], stage.counters.get('items', 0),
+                               stage.counters.get('rows', 0))
+            row['hits'] += stage.counters.get('cache_hits', 0)
+            row['lookups'] += stage.counters.get('cache_hits', 0) + \
+                stage.counters.get('cache_misses', 0)
+
+        rows = sorted(sources.items(), key=lambda x: -x[1]['wall'])[:top]
+        width = max([len(x) for x, _ in rows] + [6])
+
+        lines = [f'{"Source":<{width}}  {"Wall s":>8}  {"CPU s":>8}  {"Items":>8}  '
+                 f'{"Hit %":>6}  {"RSS +MB":>8}']
+        for name, row in rows:
+            hits = f'{100 * row["hits"] / row["lookups"]:.0f}' if row['lookups'] else '-'
+            lines.append(f'{name:<{width}}  {row["wall"]:>8.2f}  {row["cpu"]:>8.2f}  '
+                         f'{row["items"]:>8}  {hits:>6}  {row["rss"]:>8.0f}')
+
+        return '\n'.join(lines)
@@ -0,0 +1,140 @@
+import numpy as np
+from scipy.spatial.distance import cdist
+
+
+def popt20(y_true: list, y_pred: list) -> float:
+    """
+    Returns the popt20 metric, as computed in notebooks/Predictions.ipynb:
+    the fraction of products, taken in index order, that are examined
+    before 20% of all products are found to be positive, examining at
+    most one product per prediction. Lower is better.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices. Only their number
+    is used.
+    """
+    total = len(y_true)
+    count = 0
+    used = 0
+
+    for idx in range(min(len(y_pred), total)):
+        used += 1
+        if y_true[idx]:
+            count += 1
+
+        if count >= 0.2 * total:
+            break
+
+    return used / total
+
+
+def accuracy(y_true: list, y_pred: list) -> float:
+    """
+    Returns the accuracy of the predictions. Higher is better.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices.
+    """
+    y_pred = set(y_pred)
+    correct = sum((i in y_pred) == bool(true) for i, true in enumerate(y_true))
+    return correct / len(y_true)
+
+
+def precision(y_true: list, y_pred: list) -> float:
+    """
+    Returns the precision, tp / (tp + fp). Higher is better.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices.
+    """
+    y_pred = set(y_pred)
+    if not y_pred:
+        return 0.
+
+    tp = sum(1 for i in y_pred if y_true[i])
+    return tp / len(y_pred)
+
+
+def recall(y_true: list, y_pred: list) -> float:
+    """
+    Returns the recall, tp / (tp + fn). Higher is better.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices.
+    """
+    positives = sum(1 for true in y_true if true)
+    if positives == 0:
+        return 0.
+
+    tp = sum(1 for i in set(y_pred) if y_true[i])
+    return tp / positives
+
+
+def f1_score(y_true: list, y_pred: list) -> float:
+    """
+    Returns the F1-score. Higher is better.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices.
+    """
+    rec = recall(y_true, y_pred)
+    prec = precision(y_true, y_pred)
+
+    if rec + prec == 0:
+        return 0.
+    return 2 * rec * prec / (rec + prec)
+
+
+def get_metrics(y_true: list, y_pred: list) -> dict:
+    """
+    Computes all the metrics.
+
+    :param {list} y_true - 0/1 labels, one per product.
+    :param {list} y_pred - Predicted product indices.
+    :return {dict} Metric names mapped to values
+    """
+    return {
+        'accuracy': accuracy(y_true, y_pred),
+        'recall': recall(y_true, y_pred),
+        'precision': precision(y_true, y_pred),
+        'f1': f1_score(y_true, y_pred),
+        'popt20': popt20(y_true, y_pred)
+    }
+
+
+def get_predictions(profile, product_embeddings: np.ndarray, google_only: bool = True,
+                    k: int = 20) -> list:
+    """
+    Recommends products for a user: for each source in the profile, the
+    k closest (source item, product) pairs by L1 distance vote for
+    their products.
+
+    :param profile - Source names mapped to (n, dim) embeddings, as
+    returned by the miners (lazy or not) or load_profile.
+    :param {np.ndarray} product_embeddings - A (products, dim) matrix.
+    :param {bool} google_only - If True, Facebook and Instagram sources
+    are skipped.
+    :param {int} k - Number of pairs taken from each source.
+    :return {list} The distinct predicted product indices, in no
+    particular order
+    """
+    preds = []
+    for key in profile:
+        # Skipped sources are never accessed, so lazy profiles do not
+        # load or mine them.
+        if (key.startswith('Insta') or key.startswith('FB')) and google_only:
+            continue
+
+        data = np.asarray(profile[key], dtype=np.float32)
+        if data.ndim < 2 or data.shape[1] != product_embeddings.shape[1]:
+            continue
+
+        data = data[~np.isnan(data).any(axis=1)]
+        if len(data) == 0:
+            continue
+
+        distances = cdist(data, product_embeddings, 'cityblock')
+        closest = np.argsort(distances, axis=None)[:k]
+        preds.extend(np.unravel_index(closest, distances.shape)[1])
+
+    return list(set(int(x) for x in preds))
@@ -0,0 +1,126 @@
+import cProfile
+import os
+import pstats
+import re
+import tracemalloc
+
+
+class Profiler:
+    """
+    Profiles stages of a run with cProfile and tracemalloc. Each stage
+    gets a .prof file, readable with pstats or snakeviz, and a report of
+    the lines that allocated the most memory during it. summary() merges
+    the .prof files into one call-graph report.
+
+    tracemalloc traces the whole process, so stages must not overlap.
+    """
+
+    def __init__(self, path: str, top: int = 25):
+        """
+        Starts tracing allocations.
+
+        :param {str} path - Directory the profiles are written to.
+        :param {int} top - Number of functions and allocation sites
+        listed in the reports.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.top = top
+        self.files = []
+
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+
+    def _name(self, source: str, stage: str) -> str:
+        """
+        Returns the file name, without an extension, of a stage's
+        profiles. A stage that runs more than once gets numbered files.
+        """
+        name = re.sub(r'\W+', '_', f'{source}.{stage}'.lower()).strip('_')
+        count = sum(1 for x in self.files if re.fullmatch(rf'{name}(_\d+)?\.prof', x))
+        return name if count == 0 else f'{name}_{count}'
+
+    def _reset_peak(self):
+        """
+        Resets the peak traced memory, so that it is the stage's own.
+        tracemalloc.reset_peak needs Python 3.9; before that, tracing is
+        restarted instead if this profiler started it. Otherwise the
+        peak is the highest since tracing started.
+        """
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        elif self._tracing:
+            tracemalloc.stop()
+            tracemalloc.start()
+
+    def start(self):
+        """
+        Starts profiling a stage.
+
+        :return The state passed to stop
+        """
+        self._reset_peak()
+        snapshot = tracemalloc.take_snapshot()
+
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile, snapshot
+
+    def stop(self, state, source: str, stage: str):
+        """
+        Stops profiling a stage and writes its reports.
+
+        :param state - As returned by start.
+        :param {str} source - The source name.
+        :param {str} stage - The stage name.
+        """
+        profile, before = state
+        profile.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+
+        name = self._name(source, stage)
+        profile.dump_stats(f'{self.path}/{name}.prof')
+        self.files.append(f'{name}.prof')
+
+        # Allocations made by tracemalloc itself are not interesting.
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        differences = after.filter_traces(filters).compare_to(
+            before.filter_traces(filters), 'lineno')
+
+        with open(f'{self.path}/{name}.allocations.txt', 'w') as f:
+            f.write(f'{source} ({stage}): peak traced memory {peak / 2 ** 20:.1f} MB\n\n')
+            f.write(f'Top {self.top} lines by memory still allocated at the end:\n')
+            for difference in differences[:self.top]:
+                f.write(f'{difference}\n')
+
+    def summary(self) -> str:
+        """
+        Merges the profiles of every stage into summary.txt: the
+        costliest functions by cumulative time, and who called them.
+
+        :return {str} Path to the summary
+        """
+        path = f'{self.path}/summary.txt'
+        with open(path, 'w') as f:
+            if not self.files:
+                f.write('No stages were profiled.\n')
+                return path
+
+            stats = pstats.Stats(*[f'{self.path}/{x}' for x in self.files], stream=f)
+            stats.sort_stats('cumulative')
+
+            f.write(f'Merged profile of {len(self.files)} stage(s).\n')
+            stats.print_stats(self.top)
+            stats.print_callers(self.top)
+
+        return path
+
+    def close(self):
+        """
+        Stops tracing allocations, if this profiler started it.
+        """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
@@ -49,11 +49,22 @@ def error(string: str):
     print(pre + string.replace('\n', '\n' + pre))
 
 
+def get_usernames(data_path='.'):
+    """
+    Fetches every user whose data is on disk, in sorted order.
+
+    :param {str} data_path - Path to the data/ folder.
+    :return {list} The user directories in data/
+    """
+    return sorted(x for x in os.listdir(f'{data_path}/data')
+                  if os.path.isdir(f'{data_path}/data/{x}'))
+
+
 def get_username(data_path='.'):
     """
     Fetches the user whose data is on disk.
     """
-    users = os.listdir(f'{data_path}/data')
+    users = get_usernames(data_path)
     if len(users) == 0:
         warn('No users to mine.')
         return None
@@ -61,6 +72,21 @@ def get_username(data_path='.'):
         return users[0]
 
 
+def get_cache_path(name: str, user: str, data_path='.'):
+    """
+    Returns the path of a cache of API data. Each user has their own
+    caches, so that users mined from the same data path do not read
+    each other's results.
+
+    :param {str} name - The cache name, such as 'maps'.
+    :param {str} user - The user directory.
+    :param {str} data_path - Path to the data/ folder.
+    :return {str} Path to caches/<user>/.<name>.cache
+    """
+    os.makedirs(f'{data_path}/caches/{user}', exist_ok=True)
+    return f'{data_path}/caches/{user}/.{name}.cache'
+
+
 def get_key():
     # Get the API key from the .env file
     with open('.env', 'r') as f:
@@ -68,14 +94,16 @@ def get_key():
         return line.split('=')[1]
 
 
-def flush_caches():
+def flush_caches(data_path='.'):
     """
     Flushes all the caches from API data.
     Warning: calling this will permanently delete all the
     caches, requiring new API calls to fetch data. Only do this
     if you are sure.
+
+    :param {str} data_path - Path to the data/ folder.
     """
-    for file in glob.glob('caches/.*.cache'):
+    for file in glob.glob(f'{data_path}/caches/**/.*.cache', recursive=True):
         os.remove(file)
 
 